@@ -0,0 +1,189 @@
+# Description: benchmarks for the Gess engine.
+# Run with: python GessBench.py [benchmark ...]
+
+
+import argparse
+import time
+import tracemalloc
+
+from GessGame import BOARD_SIZE, GessGame, record_random_games
+from GessSparse import SparseGessGame
+from GessSearch import ParallelEngine
+
+
+def bench_make_move(games, repeat=3):
+    """
+    Times make_move by replaying the recorded games.
+    Parameters:
+        games = games from record_random_games
+        repeat = how many times every game is replayed
+    Returns:
+        dict with the number of moves, moves per second and
+        microseconds per move
+    """
+    moves = 0
+    start = time.perf_counter()
+    for x in range(repeat):
+        for game_moves in games:
+            game = GessGame()
+            for current, new in game_moves:
+                game.make_move(current, new)
+            moves += len(game_moves)
+    seconds = time.perf_counter() - start
+
+    return {
+        "moves": moves,
+        "moves_per_second": moves / seconds,
+        "us_per_move": seconds / moves * 1e6,
+    }
+
+
+def bench_allocations(games):
+    """
+    Measures the memory allocated while make_move runs, using tracemalloc.
+    The peak above the starting memory is taken for every move, which
+    counts short-lived objects (like a throwaway board) that are freed
+    before make_move returns.
+    Parameters:
+        games = games from record_random_games
+    Returns:
+        dict with the average and largest bytes allocated per move
+    """
+    peaks = []
+    tracemalloc.start()
+    for game_moves in games:
+        game = GessGame()
+        for current, new in game_moves:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            game.make_move(current, new)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    return {
+        "moves": len(peaks),
+        "average_bytes_per_move": sum(peaks) / len(peaks),
+        "max_bytes_per_move": max(peaks),
+    }
+
+
+def bench_parallel(games, workers=(1, 8, 16, 32), depth=2, positions=3):
+    """
+    Times fixed-depth ParallelEngine searches with different numbers
+    of worker processes, to see how the search speeds up with more cores.
+    The positions are taken halfway through the first recorded games.
+    Parameters:
+        games = games from record_random_games
+        workers = worker counts to compare (the first one is the baseline)
+        depth = depth of every search
+        positions = number of positions to search
+    Returns:
+        dict with the seconds and the speedup of every worker count
+    """
+    boards = []
+    for game_moves in games[:positions]:
+        game = GessGame()
+        for current, new in game_moves[:len(game_moves) // 2]:
+            game.make_move(current, new)
+        boards.append(game)
+
+    results = {}
+    for count in workers:
+        with ParallelEngine(count) as engine:
+            engine.search(boards[0], max_depth=1)  # starts the worker processes
+            start = time.perf_counter()
+            for game in boards:
+                engine.search(game, max_depth=depth)
+            results["seconds_%d" % count] = time.perf_counter() - start
+
+    baseline = results["seconds_%d" % workers[0]]
+    for count in workers:
+        results["speedup_%d" % count] = baseline / results["seconds_%d" % count]
+    return results
+
+
+def bench_scaling(games, sizes=(20, 50, 100, 200), seed=0):
+    """
+    Times make_move, evaluate and generate_legal_squares on boards of
+    different sizes, to check that a move costs about the same on a
+    large board.
+    Every size plays its own random games (the starting stones are the
+    same, so the games are alike); the standard board is timed both
+    with the bitboard GessGame and with the SparseGessGame.
+    Parameters:
+        games = number of games to record for every size
+        sizes = board sizes to compare
+        seed = seed of the recorded games
+    Returns:
+        dict with the microseconds per move, per evaluation and per move
+        list of every size (the bitboard game's as "bitboard")
+    """
+    results = {}
+    for size in sizes:
+        recorded = record_random_games(games, seed=seed, board_size=size)
+        variants = [(str(size), lambda: SparseGessGame(board_size=size))]
+        if size == BOARD_SIZE:
+            variants.insert(0, ("bitboard", GessGame))
+
+        for label, make_game in variants:
+            moves = 0
+            move_seconds = 0.0
+            evaluate_seconds = 0.0
+            list_seconds = 0.0
+            for game_moves in recorded:
+                game = make_game()
+                for current, new in game_moves:
+                    start = time.perf_counter()
+                    game.generate_legal_squares()
+                    list_seconds += time.perf_counter() - start
+                    start = time.perf_counter()
+                    game.make_move(current, new)
+                    move_seconds += time.perf_counter() - start
+                    start = time.perf_counter()
+                    game.evaluate()
+                    evaluate_seconds += time.perf_counter() - start
+                moves += len(game_moves)
+            results["us_per_move_" + label] = move_seconds / moves * 1e6
+            results["us_per_evaluate_" + label] = evaluate_seconds / moves * 1e6
+            results["us_per_move_list_" + label] = list_seconds / moves * 1e6
+    return results
+
+
+BENCHMARKS = {
+    "make_move": lambda games, args: bench_make_move(games),
+    "allocations": lambda games, args: bench_allocations(games),
+    "parallel": lambda games, args: bench_parallel(games, args.workers, args.depth),
+    "scaling": lambda games, args: bench_scaling(len(games), args.sizes, args.seed),
+}
+
+# benchmarks run when none are named (the others need more cores or time)
+DEFAULT_BENCHMARKS = ["allocations", "make_move"]
+
+
+def main():
+    """
+    Runs the benchmarks named on the command line (DEFAULT_BENCHMARKS if none)
+    and prints their results.
+    """
+    parser = argparse.ArgumentParser(description="Gess benchmarks")
+    parser.add_argument("benchmarks", nargs="*", help="any of: " + ", ".join(sorted(BENCHMARKS)))
+    parser.add_argument("--games", type=int, default=20, help="number of recorded games to replay")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the recorded games")
+    parser.add_argument("--workers", type=lambda text: [int(count) for count in text.split(",")],
+                        default=[1, 8, 16, 32], help="worker counts for the parallel benchmark, e.g. 1,8,16,32")
+    parser.add_argument("--depth", type=int, default=2, help="search depth for the parallel benchmark")
+    parser.add_argument("--sizes", type=lambda text: [int(size) for size in text.split(",")],
+                        default=[20, 50, 100, 200], help="board sizes for the scaling benchmark, e.g. 20,50,100,200")
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark: " + name)
+
+    games = record_random_games(args.games, seed=args.seed)
+    for name in args.benchmarks or DEFAULT_BENCHMARKS:
+        results = BENCHMARKS[name](games, args)
+        print(name + ": " + ", ".join("%s=%s" % (key, round(value, 1)) for key, value in results.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# Description: opening book for Gess, built from game records (see
+# GessRecord). For every position of the first moves of the games, it
+# keeps how often each move was played and how often the player who
+# played it went on to win. The book is a file of fixed-size entries
+# sorted by position hash, memory-mapped and binary searched.
+# Run with: python GessBook.py build book.bin games.gess [more.gess ...] [--max-ply N]
+#           python GessBook.py show book.bin
+
+
+import argparse
+import mmap
+import struct
+
+from GessGame import SQUARE_NAMES, GessGame, parse_square
+from GessRecord import GameReader, decode_move, encode_move
+
+
+# File layout (all numbers little-endian):
+#   header:  magic, number of entries
+#   entries: position hash, move (see GessRecord.encode_move), times played,
+#            times the player who played it won - sorted by hash, then the
+#            most played (and most won) moves first
+BOOK_MAGIC = b"GESSBOOK"
+BOOK_HEADER = struct.Struct("<8sQ")
+BOOK_ENTRY = struct.Struct("<QHII")
+HASH_FIELD = struct.Struct("<Q")
+
+
+def build_book(record_paths, path, max_ply=20, min_count=2):
+    """
+    Builds an opening book from game record files.
+    Parameters:
+        record_paths = list of GessRecord files to read the games from
+        path = the book file to write
+        max_ply = number of moves of every game that go into the book
+        min_count = moves played fewer times than this are left out
+    Returns:
+        the number of entries written
+    """
+    moves = {}  # (hash, move) -> [times played, wins]
+    for record_path in record_paths:
+        with GameReader(record_path) as reader:
+            for game_number in range(len(reader)):
+                result, squares = reader.get_game_squares(game_number)
+                game = GessGame()
+                for current_square, new_square in squares[:max_ply]:
+                    key = (game.get_hash(), encode_move(current_square, new_square))
+                    stats = moves.get(key)
+                    if stats is None:
+                        stats = moves[key] = [0, 0]
+                    stats[0] += 1
+                    if result == game.get_game_turn() + "_WON":
+                        stats[1] += 1
+                    game.move_piece(current_square, new_square)
+
+    entries = sorted((key, -count, -wins, move) for (key, move), (count, wins) in moves.items()
+                     if count >= min_count)
+    with open(path, "wb") as book_file:
+        book_file.write(BOOK_HEADER.pack(BOOK_MAGIC, len(entries)))
+        for key, count, wins, move in entries:
+            book_file.write(BOOK_ENTRY.pack(key, move, -count, -wins))
+    return len(entries)
+
+
+class OpeningBook:
+    """
+    The OpeningBook class looks up positions in a book file.
+
+    The file is memory-mapped and the entries of a position are found
+    with a binary search on the position's hash, so a lookup only
+    reads a few dozen bytes, whatever the size of the book.
+    """
+
+    def __init__(self, path):
+        """
+        Parameter:
+            path = the book file (from build_book)
+        """
+        self._file = open(path, "rb")
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._entry_count = BOOK_HEADER.unpack_from(self._data, 0)
+        if magic != BOOK_MAGIC:
+            raise ValueError("not a Gess opening book: %s" % path)
+
+    def __len__(self):
+        return self._entry_count
+
+    def lookup(self, key):
+        """
+        Finds the book moves of a position.
+        Parameter:
+            key = the position's hash (GessGame.get_hash)
+        Returns:
+            list of (current square, new square, times played, wins),
+            most played first
+        """
+        return [decode_move(move) + (count, wins) for entry_hash, move, count, wins in self._get_entries(key)]
+
+    def _get_entries(self, key):
+        """
+        Returns an iterator over the raw entries of a position.
+        """
+        start = BOOK_HEADER.size + self._find(key) * BOOK_ENTRY.size
+        end = BOOK_HEADER.size + self._find(key + 1) * BOOK_ENTRY.size
+        return BOOK_ENTRY.iter_unpack(self._data[start:end])
+
+    def _find(self, key):
+        """
+        Binary search for the first entry with a hash at or after the key.
+        """
+        data = self._data
+        start = BOOK_HEADER.size
+        low, high = 0, self._entry_count
+        while low < high:
+            middle = (low + high) // 2
+            if HASH_FIELD.unpack_from(data, start + middle * BOOK_ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get_moves(self, game):
+        """
+        Finds the book moves of a game's position that are legal in it
+        (two positions could share a hash).
+        Parameter:
+            game = the GessGame to look up
+        Returns:
+            list of ((current, new), times played, win rate), most played first
+        """
+        return [((SQUARE_NAMES[current], SQUARE_NAMES[new]), count, wins / count)
+                for current, new, count, wins in self.lookup(game.get_hash())
+                if game.get_move_error(current, new) is None]
+
+    def choose_move(self, game, min_count=1, chooser=None):
+        """
+        Picks a book move for a game's position.
+        Parameters:
+            game = the GessGame to move in
+            min_count = only use moves played at least this many times
+            chooser = optional random.Random; moves are then picked at random,
+            weighted by how often they were played. Without it, the most
+            played move is picked (ties go to the higher win rate)
+        Returns:
+            (current, new), or None if the position isn't in the book
+        """
+        entries = self._get_entries(game.get_hash())
+
+        # the entries are stored most played first, so without a chooser
+        # only the first legal one is decoded
+        if chooser is None:
+            for entry_hash, move, count, wins in entries:
+                if count < min_count:
+                    break
+                current, new = decode_move(move)
+                if game.get_move_error(current, new) is None:
+                    return SQUARE_NAMES[current], SQUARE_NAMES[new]
+            return None
+
+        moves = [entry for entry in entries if entry[2] >= min_count]
+        while moves:
+            entry = chooser.choices(moves, [entry[2] for entry in moves])[0]
+            current, new = decode_move(entry[1])
+            if game.get_move_error(current, new) is None:
+                return SQUARE_NAMES[current], SQUARE_NAMES[new]
+            moves.remove(entry)
+        return None
+
+    def close(self):
+        """
+        Unmaps and closes the book file.
+        """
+        self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def main():
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Build and inspect Gess opening books")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="build a book from game record files")
+    build_parser.add_argument("path", help="book file to write")
+    build_parser.add_argument("records", nargs="+", help="GessRecord files to read")
+    build_parser.add_argument("--max-ply", type=int, default=20, help="number of moves per game to use")
+    build_parser.add_argument("--min-count", type=int, default=2, help="leave out moves played fewer times")
+    show_parser = commands.add_parser("show", help="list the book moves of a position")
+    show_parser.add_argument("path", help="book file to read")
+    show_parser.add_argument("moves", nargs="*", help="moves leading to the position, e.g. L3-L6")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print("%d entries written" % build_book(args.records, args.path, args.max_ply, args.min_count))
+        return
+
+    game = GessGame()
+    for move in args.moves:
+        current, _, new = move.partition("-")
+        if parse_square(current) is None or not game.make_move(current, new):
+            parser.error("illegal move: " + move)
+    with OpeningBook(args.path) as book:
+        for (current, new), count, rate in book.get_moves(game):
+            print("%s-%s: played=%d win_rate=%.3f" % (current, new, count, rate))
+
+
+if __name__ == "__main__":
+    main()
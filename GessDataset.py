@@ -0,0 +1,241 @@
+# Description: streams training data out of recorded Gess games. The
+# games are replayed on a pool of worker processes, and every position
+# (before each move) becomes a sample: the board as two 20x20 planes,
+# the side to move, the move played and the game's result. Samples come
+# out in fixed-size chunks, with only a bounded number of game batches
+# in flight, so memory use doesn't grow with the size of the corpus.
+# Run with: python GessDataset.py games.gess [more.gess | games.jsonl ...] --output chunks/
+
+
+import argparse
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from GessGame import BOARD_SIZE, GessGame, parse_square
+from GessRecord import GameReader, encode_move
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional
+    numpy = None
+
+
+PLANE_SIZE = BOARD_SIZE * BOARD_SIZE
+
+# turns the '0' and '1' characters of a bitboard's binary form into 0 and 1 bytes
+PLANE_TABLE = bytes.maketrans(b"01", b"\x00\x01")
+
+# result of a game from the point of view of the player to move
+RESULT_VALUES = {"UNFINISHED": 0, "BLACK_WON": 1, "WHITE_WON": -1}
+
+
+def get_plane(mask):
+    """
+    Converts a bitboard to a board plane.
+    Parameter:
+        mask = the bitboard
+    Returns:
+        PLANE_SIZE bytes, byte n being 1 if square n is set, else 0
+    """
+    return format(mask, "0%db" % PLANE_SIZE)[::-1].encode("ascii").translate(PLANE_TABLE)
+
+
+def read_games(paths):
+    """
+    Reads games one at a time from record files (GessRecord, .gess)
+    or self-play output (JSON lines, see GessSelfPlay).
+    A JSON game with a center name that isn't a square (e.g. "Z99") is skipped.
+    Parameter:
+        paths = list of files to read
+    Returns:
+        a generator of (result, list of (current square, new square))
+    """
+    for path in paths:
+        if path.endswith(".gess"):
+            with GameReader(path) as reader:
+                for game_number in range(len(reader)):
+                    yield reader.get_game_squares(game_number)
+        else:
+            with open(path) as games:
+                for line in games:
+                    if line.strip():
+                        game_record = json.loads(line)
+                        moves = [(parse_square(current), parse_square(new)) for current, new in game_record["moves"]]
+                        if all(current is not None and new is not None for current, new in moves):
+                            yield game_record["result"], moves
+
+
+def replay_games(games):
+    """
+    Worker of the pipeline: replays a batch of games and packs a sample
+    for the position before every move. A game stops at its first
+    illegal move (the positions before it are kept, the illegal move
+    gets no sample).
+    Parameter:
+        games = list of (result, moves) from read_games
+    Returns:
+        (number of samples, planes, sides, results, moves) where planes has
+        2 * PLANE_SIZE bytes per sample (black, then white), sides and
+        results one signed byte per sample (1 for black to move / a win
+        for the player to move, -1 for white / a loss, 0 for unfinished),
+        and moves the move's GessRecord code as 2 little-endian bytes
+    """
+    count = 0
+    planes = bytearray()
+    sides = bytearray()
+    results = bytearray()
+    moves = bytearray()
+
+    for result, game_moves in games:
+        game = GessGame()
+        winner = RESULT_VALUES[result]
+        for current_square, new_square in game_moves:
+            if current_square is None or new_square is None \
+                    or game.get_move_error(current_square, new_square) is not None:
+                break
+            board = game.get_bitboard()
+            side = 1 if game.get_game_turn() == "BLACK" else -1
+            planes += get_plane(board.get_black())
+            planes += get_plane(board.get_white())
+            sides.append(side & 0xFF)
+            results.append(winner * side & 0xFF)
+            moves += encode_move(current_square, new_square).to_bytes(2, "little")
+            count += 1
+            game.move_piece(current_square, new_square)
+    return count, bytes(planes), bytes(sides), bytes(results), bytes(moves)
+
+
+def make_chunk(count, planes, sides, results, moves):
+    """
+    Builds a chunk from packed samples (see replay_games): NumPy arrays
+    if NumPy is installed, otherwise the packed bytes.
+    Returns:
+        dict with "count", "planes" (count x 2 x 20 x 20 uint8),
+        "side" (int8), "result" (int8) and "move" (uint16)
+    """
+    if numpy is None:
+        return {"count": count, "planes": planes, "side": sides, "result": results, "move": moves}
+    return {
+        "count": count,
+        "planes": numpy.frombuffer(planes, dtype=numpy.uint8).reshape(count, 2, BOARD_SIZE, BOARD_SIZE),
+        "side": numpy.frombuffer(sides, dtype=numpy.int8),
+        "result": numpy.frombuffer(results, dtype=numpy.int8),
+        "move": numpy.frombuffer(moves, dtype="<u2"),
+    }
+
+
+def iterate_chunks(paths, chunk_size=4096, workers=None, games_per_task=64, max_in_flight=None):
+    """
+    Replays the games of the files on a process pool and yields their
+    samples in chunks of chunk_size (the last one may be smaller), in
+    the order of the games. The games are read lazily, and no more than
+    max_in_flight batches are queued or being replayed at once, so the
+    memory used only depends on the settings, not on the corpus.
+    Parameters:
+        paths = list of GessRecord or JSON lines files
+        chunk_size = samples per chunk
+        workers = number of worker processes (defaults to the number of cores;
+        1 replays in this process)
+        games_per_task = games sent to a worker at a time
+        max_in_flight = most batches in flight (defaults to 2 per worker)
+    Returns:
+        a generator of chunks (see make_chunk)
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    buffers = [0, bytearray(), bytearray(), bytearray(), bytearray()]
+
+    def batches():
+        batch = []
+        for game in read_games(paths):
+            batch.append(game)
+            if len(batch) == games_per_task:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def add(replayed):
+        buffers[0] += replayed[0]
+        for buffer, data in zip(buffers[1:], replayed[1:]):
+            buffer += data
+
+        # hand out every full chunk
+        chunks = []
+        while buffers[0] >= chunk_size:
+            sizes = (2 * PLANE_SIZE, 1, 1, 2)
+            chunks.append(make_chunk(chunk_size, *[bytes(buffer[:chunk_size * size])
+                                                   for buffer, size in zip(buffers[1:], sizes)]))
+            for buffer, size in zip(buffers[1:], sizes):
+                del buffer[:chunk_size * size]
+            buffers[0] -= chunk_size
+        return chunks
+
+    if workers == 1:
+        for batch in batches():
+            yield from add(replay_games(batch))
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            pending = deque()
+            for batch in batches():
+                pending.append(executor.submit(replay_games, batch))
+                if len(pending) >= max_in_flight:
+                    yield from add(pending.popleft().result())
+            while pending:
+                yield from add(pending.popleft().result())
+
+    if buffers[0]:
+        yield make_chunk(buffers[0], *[bytes(buffer) for buffer in buffers[1:]])
+
+
+def write_chunks(chunks, directory):
+    """
+    Writes chunks to numbered files in a directory: .npz files with
+    NumPy, otherwise .bin files of fixed 2 * PLANE_SIZE + 4 byte samples
+    (planes, side, result, move).
+    Parameters:
+        chunks = chunks from iterate_chunks
+        directory = the directory to write to (created if needed)
+    Returns:
+        (number of chunks, number of samples)
+    """
+    os.makedirs(directory, exist_ok=True)
+    chunk_count = 0
+    samples = 0
+    for chunk in chunks:
+        path = os.path.join(directory, "chunk-%06d" % chunk_count)
+        if numpy is not None:
+            numpy.savez(path + ".npz", planes=chunk["planes"], side=chunk["side"], result=chunk["result"],
+                        move=chunk["move"])
+        else:
+            with open(path + ".bin", "wb") as chunk_file:
+                for index in range(chunk["count"]):
+                    chunk_file.write(chunk["planes"][index * 2 * PLANE_SIZE:(index + 1) * 2 * PLANE_SIZE])
+                    chunk_file.write(chunk["side"][index:index + 1] + chunk["result"][index:index + 1])
+                    chunk_file.write(chunk["move"][index * 2:index * 2 + 2])
+        chunk_count += 1
+        samples += chunk["count"]
+    return chunk_count, samples
+
+
+def main():
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Extract training samples from recorded Gess games")
+    parser.add_argument("paths", nargs="+", help="GessRecord (.gess) or JSON lines files")
+    parser.add_argument("--output", required=True, help="directory for the chunk files")
+    parser.add_argument("--chunk-size", type=int, default=4096, help="samples per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--games-per-task", type=int, default=64, help="games sent to a worker at a time")
+    args = parser.parse_args()
+
+    chunks, samples = write_chunks(iterate_chunks(args.paths, args.chunk_size, args.workers, args.games_per_task),
+                                   args.output)
+    print("chunks=%d samples=%d" % (chunks, samples))
+
+
+if __name__ == "__main__":
+    main()
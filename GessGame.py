@@ -2,6 +2,862 @@
 # Date: 06/03/2020
 # Description: a simulation of the board game - Gess, a Chess/Go variant.
 
+import itertools
+import random
+import sys
+
+
+# ****************
+# Bitboard Tables
+# ****************
+# The board is stored as two 400-bit integers (one per player color).
+# Squares are numbered row by row, so square = row * 20 + column,
+# where "A1" is square 0, "T1" is square 19 and "T20" is square 399.
+# The tables below are built once, when the module is loaded.
+
+BOARD_SIZE = 20
+FULL_BOARD_MASK = (1 << (BOARD_SIZE * BOARD_SIZE)) - 1
+
+# column letter + row number of every square (e.g. 'L3'), and the other way around
+SQUARE_NAMES = [chr(column + 65) + str(row + 1)
+                for row in range(BOARD_SIZE) for column in range(BOARD_SIZE)]
+SQUARE_NUMBERS = {name: square for square, name in enumerate(SQUARE_NAMES)}
+
+# row and column index of every square
+SQUARE_ROWS = [square // BOARD_SIZE for square in range(BOARD_SIZE * BOARD_SIZE)]
+SQUARE_COLUMNS = [square % BOARD_SIZE for square in range(BOARD_SIZE * BOARD_SIZE)]
+
+# perimeter of the board (columns A & T, rows 1 & 20) - stones never stay there
+EDGE_MASK = 0
+
+# squares that can be a Piece's center (columns B-S, rows 2-19)
+INTERIOR_MASK = 0
+
+# 3x3 footprint around every square, clipped at the board's edges
+FOOTPRINT_MASKS = []
+
+for _row in range(BOARD_SIZE):
+    for _column in range(BOARD_SIZE):
+        _footprint = 0
+        for _y in range(_row - 1, _row + 2):
+            for _x in range(_column - 1, _column + 2):
+                if 0 <= _y < BOARD_SIZE and 0 <= _x < BOARD_SIZE:
+                    _footprint |= 1 << (_y * BOARD_SIZE + _x)
+        FOOTPRINT_MASKS.append(_footprint)
+
+        if _row in (0, BOARD_SIZE - 1) or _column in (0, BOARD_SIZE - 1):
+            EDGE_MASK |= 1 << (_row * BOARD_SIZE + _column)
+        else:
+            INTERIOR_MASK |= 1 << (_row * BOARD_SIZE + _column)
+
+# Zobrist keys: a random 64-bit number for every (color, square) pair and
+# one for white's turn. A position's hash is the XOR of the keys of its
+# stones (plus the turn key), so moving or removing a stone only takes
+# an XOR of the squares that changed. The seed is fixed so hashes are the
+# same from one run to the next (e.g. for opening books on disk).
+_zobrist_random = random.Random(20200603)
+ZOBRIST_BLACK_KEYS = [_zobrist_random.getrandbits(64) for _square in range(BOARD_SIZE * BOARD_SIZE)]
+ZOBRIST_WHITE_KEYS = [_zobrist_random.getrandbits(64) for _square in range(BOARD_SIZE * BOARD_SIZE)]
+ZOBRIST_WHITE_TURN = _zobrist_random.getrandbits(64)
+
+# offsets of a footprint's squares from its center,
+# in the order used by list_center_stones: [NW, N, NE, E, SE, S, SW, W, centerx]
+SURROUNDING_OFFSETS = (-21, -20, -19, 1, 21, 20, 19, -1, 0)
+
+# the 8 directions a Piece can move in as (row step, column step),
+# in the same order as above: NW, N, NE, E, SE, S, SW, W
+DIRECTIONS = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+
+# for every center and direction, the centers a Piece passes through
+# (nearest first) until its center would leave columns B-S / rows 2-19
+CENTER_RAYS = []
+
+# for every center and direction, and every distance along the ray, the tiles
+# the footprint sweeps over before reaching that distance (leaving out the
+# footprint's own tiles) - they all have to be empty for the move to be legal
+PATH_MASKS = []
+
+for _row in range(BOARD_SIZE):
+    for _column in range(BOARD_SIZE):
+        _rays = []
+        _paths = []
+        for _row_step, _column_step in DIRECTIONS:
+            _ray = []
+            _path = []
+            _swept = 0
+            _y, _x = _row + _row_step, _column + _column_step
+            while 0 < _y < BOARD_SIZE - 1 and 0 < _x < BOARD_SIZE - 1:
+                _ray.append(_y * BOARD_SIZE + _x)
+                _path.append(_swept & ~FOOTPRINT_MASKS[_row * BOARD_SIZE + _column])
+                _swept |= FOOTPRINT_MASKS[_y * BOARD_SIZE + _x]
+                _y, _x = _y + _row_step, _x + _column_step
+            _rays.append(tuple(_ray))
+            _paths.append(tuple(_path))
+        CENTER_RAYS.append(tuple(_rays))
+        PATH_MASKS.append(tuple(_paths))
+
+# direction index (see DIRECTIONS) of every (row step, column step)
+DIRECTION_INDEXES = {step: index for index, step in enumerate(DIRECTIONS)}
+
+# ring index: for every square, the ring centers whose ring covers it
+# (a ring is the 3x3 footprint of its center, so these are the interior
+# squares of the square's own footprint)
+RING_DEPENDENTS = [_footprint & INTERIOR_MASK for _footprint in FOOTPRINT_MASKS]
+
+# centers a ring can't be moved to (columns B and S, rows 2 and 19)
+RING_BORDER_MASK = 0
+
+for _square in range(BOARD_SIZE * BOARD_SIZE):
+    if INTERIOR_MASK >> _square & 1 and (_square // BOARD_SIZE in (1, BOARD_SIZE - 2)
+                                         or _square % BOARD_SIZE in (1, BOARD_SIZE - 2)):
+        RING_BORDER_MASK |= 1 << _square
+
+
+def iterate_squares(mask):
+    """
+    Goes through the squares that are set in a bitboard mask,
+    from the lowest square number to the highest.
+    Parameters:
+        mask = the bitboard to go through
+    Returns:
+        a generator of square numbers
+    """
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def shift_mask(mask, offset):
+    """
+    Moves every square of a bitboard mask by the same offset
+    (e.g. +20 moves one row down, -1 moves one column left).
+    Squares moved past either end of the board are dropped.
+    Parameters:
+        mask = the bitboard to shift
+        offset = number of squares to move by
+    Returns:
+        the shifted bitboard
+    """
+    if offset >= 0:
+        return (mask << offset) & FULL_BOARD_MASK
+    return mask >> -offset
+
+
+def get_zobrist_changes(black_changes, white_changes):
+    """
+    XORs together the Zobrist keys of the squares that changed.
+    Parameters:
+        black_changes = bitboard of squares that gained or lost a black stone
+        white_changes = bitboard of squares that gained or lost a white stone
+    Returns:
+        the 64-bit value to XOR into a position's hash
+    """
+    changes = 0
+    for square in iterate_squares(black_changes):
+        changes ^= ZOBRIST_BLACK_KEYS[square]
+    for square in iterate_squares(white_changes):
+        changes ^= ZOBRIST_WHITE_KEYS[square]
+    return changes
+
+
+def dilate_mask(mask):
+    """
+    Grows a mask by one tile in every direction, giving every square
+    whose 3x3 footprint overlaps the mask. Squares next to the left
+    or right edge may pull in a few extra squares from the neighbouring
+    row, which is harmless wherever the result is only used as a region
+    to re-check.
+    Parameter:
+        mask = the bitboard to grow
+    Returns:
+        the grown bitboard
+    """
+    grown = mask
+    for offset in SURROUNDING_OFFSETS[:8]:
+        grown |= shift_mask(mask, offset)
+    return grown
+
+
+# turns the '0' and '1' characters of a bitboard's binary form into 0 and 1 bytes
+BIT_TABLE = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def gather_bits(mask, selector):
+    """
+    Packs the bits of a mask found at the squares of a selector into
+    a smaller number: bit n of the result is the mask's bit at the
+    selector's n-th square (from the lowest square number).
+    Parameters:
+        mask = the bitboard to take the bits from
+        selector = bitboard of the squares to take
+    Returns:
+        the packed bits
+    """
+    width = "0%db" % (BOARD_SIZE * BOARD_SIZE)
+    picked = bytes(itertools.compress(format(mask, width).encode(),
+                                      format(selector, width).encode().translate(BIT_TABLE)))
+    return int(picked, 2) if picked else 0
+
+
+def scatter_bits(bits, selector):
+    """
+    The opposite of gather_bits: spreads packed bits over the squares
+    of a selector.
+    Parameters:
+        bits = the packed bits
+        selector = bitboard of the squares to spread them over
+    Returns:
+        the bitboard
+    """
+    gaps = format(selector, "0%db" % (BOARD_SIZE * BOARD_SIZE)).split("1")
+    if len(gaps) == 1:
+        return 0
+    placed = zip(gaps, format(bits, "0%db" % (len(gaps) - 1)))
+    return int("".join(itertools.chain.from_iterable(placed)) + gaps[-1], 2)
+
+
+def get_center_names(mask):
+    """
+    Lists the squares of a mask as center names (e.g. 'L3'),
+    ordered column by column and then by row.
+    Parameter:
+        mask = bitboard of centers
+    Returns:
+        list of center names
+    """
+    squares = sorted(iterate_squares(mask), key=lambda square: (square % BOARD_SIZE, square // BOARD_SIZE))
+    return [SQUARE_NAMES[square] for square in squares]
+
+
+def parse_square(name):
+    """
+    Converts a square's name (e.g. 'L3' or 'l3') to its square number.
+    This is the only place names are parsed; everything past make_move
+    and the other public methods works with square numbers.
+    Parameter:
+        name = the square's column letter and row number
+    Returns:
+        the square number (row * 20 + column), or None if there's no such square
+    """
+    return SQUARE_NUMBERS.get(name.upper())
+
+
+def get_direction(square, new_square):
+    """
+    Finds the direction and distance from one center to another.
+    Parameters:
+        square = square number of the current center
+        new_square = square number of the new center
+    Returns:
+        (direction index, distance) if the centers are on the same row,
+        column or diagonal, otherwise None
+    """
+    row_distance = SQUARE_ROWS[new_square] - SQUARE_ROWS[square]
+    column_distance = SQUARE_COLUMNS[new_square] - SQUARE_COLUMNS[square]
+
+    if row_distance and column_distance and abs(row_distance) != abs(column_distance):
+        return None
+    if not row_distance and not column_distance:
+        return None
+    step = ((row_distance > 0) - (row_distance < 0), (column_distance > 0) - (column_distance < 0))
+    return DIRECTION_INDEXES[step], max(abs(row_distance), abs(column_distance))
+
+
+def get_destinations(square, own, occupied):
+    """
+    Walks the 8 directions from a Piece's center (only those with one of
+    the player's stones) and lists the centers it can reach, up to 3 tiles
+    without a center stone, stopping at the first obstruction. The Piece
+    is assumed to hold none of the opponent's stones, and the last ring
+    isn't checked.
+    Parameters:
+        square = square number of the Piece's center
+        own = bitboard of the player's stones
+        occupied = bitboard of all stones
+    Returns:
+        list of new square numbers
+    """
+    destinations = []
+    others = occupied & ~FOOTPRINT_MASKS[square]
+    max_distance = BOARD_SIZE if own >> square & 1 else 3
+
+    for direction, ray in enumerate(CENTER_RAYS[square]):
+        # no stone for the particular direction
+        if not own >> (square + SURROUNDING_OFFSETS[direction]) & 1:
+            continue
+
+        for new_square in ray[:max_distance]:
+            destinations.append(new_square)
+
+            # the Piece can land on stones, but can't move past them
+            if FOOTPRINT_MASKS[new_square] & others:
+                break
+    return destinations
+
+
+def get_move_vector(current_row, current_column, new_row, new_column):
+    """
+    Finds the direction and the number of tiles a Piece travels.
+    Like the Piece move methods, a diagonal move travels as many
+    rows as it travels columns.
+    Parameters:
+        current_row, current_column = index pair of the current center
+        new_row, new_column = index pair of the new center
+    Returns:
+        (row step, column step, distance), where each step is -1, 0 or 1
+    """
+    row_step = (new_row > current_row) - (new_row < current_row)
+    column_step = (new_column > current_column) - (new_column < current_column)
+
+    if column_step == 0:
+        distance = abs(new_row - current_row)
+    else:
+        distance = abs(new_column - current_column)
+    return row_step, column_step, distance
+
+
+class Bitboard:
+    """
+    The Bitboard class stores the stones on the game board.
+
+    Instead of a 20x20 list of lists, the stones of each color are
+    kept in a single integer where bit n is set if square n holds
+    a stone. Checking a Piece's footprint, clearing the edges, or
+    testing a move path for obstructions then only takes a few
+    shifts and ANDs against the precomputed masks above.
+
+    The familiar 20x20 grid of 'B', 'W' and '.' can still be built
+    with get_grid (used by GessGame.get_game_board for printing).
+    """
+
+    def __init__(self, black=0, white=0):
+        """
+        Initializes the board from the two color bitboards.
+        Parameters:
+            black = bitboard of the black stones
+            white = bitboard of the white stones
+        """
+        self._black = black
+        self._white = white
+
+    @classmethod
+    def from_grid(cls, grid):
+        """
+        Builds a Bitboard from a 20x20 grid of 'B', 'W' and '.'.
+        Parameters:
+            grid = list of rows, each row a list of one character strings
+        Returns:
+            a new Bitboard
+        """
+        black = 0
+        white = 0
+        for row_index, row in enumerate(grid):
+            for column_index, content in enumerate(row):
+                if content == 'B':
+                    black |= 1 << (row_index * BOARD_SIZE + column_index)
+                elif content == 'W':
+                    white |= 1 << (row_index * BOARD_SIZE + column_index)
+        return cls(black, white)
+
+    def get_grid(self):
+        """
+        Builds the 20x20 grid of 'B', 'W' and '.' from the bitboards.
+        The grid is a fresh copy, so changing it doesn't change the board.
+        No parameters.
+        Returns:
+            list of rows, each row a list of one character strings
+        """
+        grid = []
+        for row in range(BOARD_SIZE):
+            grid.append([self.get_square(row * BOARD_SIZE + column) for column in range(BOARD_SIZE)])
+        return grid
+
+    def get_black(self):
+        """
+        Returns the bitboard of the black stones.
+        """
+        return self._black
+
+    def get_white(self):
+        """
+        Returns the bitboard of the white stones.
+        """
+        return self._white
+
+    def get_occupied(self):
+        """
+        Returns the bitboard of all stones (both colors).
+        """
+        return self._black | self._white
+
+    def get_square(self, square):
+        """
+        Check the content of a square number.
+        Parameter:
+            square = square number (row * 20 + column)
+        Returns:
+            'B', 'W', or '.' of a tile
+        """
+        bit = 1 << square
+        if self._black & bit:
+            return 'B'
+        if self._white & bit:
+            return 'W'
+        return '.'
+
+    def get_stone(self, row, column):
+        """
+        Check the content of a (row, column) index pair.
+        Like the old list of lists, negative indexes count from the
+        far side of the board, and indexes past the board raise IndexError.
+        Parameters:
+            row = row index (0 - 19)
+            column = column index (0 - 19)
+        Returns:
+            'B', 'W', or '.' of a tile
+        """
+        if row < 0:
+            row += BOARD_SIZE
+        if column < 0:
+            column += BOARD_SIZE
+        if not 0 <= row < BOARD_SIZE or not 0 <= column < BOARD_SIZE:
+            raise IndexError("board index out of range")
+        return self.get_square(row * BOARD_SIZE + column)
+
+    def move_stone(self, current_row, current_column, new_row, new_column):
+        """
+        Replaces the new position's content with the current position's
+        content, and empties the current position.
+        Parameters:
+            current_row, current_column = index pair of the current position
+            new_row, new_column = index pair of the new position
+        Returns:
+            none
+        """
+        content = self.get_stone(current_row, current_column)
+        current_bit = 1 << ((current_row % BOARD_SIZE) * BOARD_SIZE + current_column % BOARD_SIZE)
+        new_bit = 1 << ((new_row % BOARD_SIZE) * BOARD_SIZE + new_column % BOARD_SIZE)
+        self.get_stone(new_row, new_column)  # same bounds check as the grid
+
+        self._black &= ~current_bit
+        self._white &= ~current_bit
+        self._black &= ~new_bit
+        self._white &= ~new_bit
+        if content == 'B':
+            self._black |= new_bit
+        elif content == 'W':
+            self._white |= new_bit
+
+    def move_footprint(self, square, new_square):
+        """
+        Replaces the new center's footprint with the current center's
+        footprint (stones and empty tiles alike), and empties the tiles of
+        the current footprint that the new footprint doesn't cover.
+        Every move direction and distance goes through this one kernel:
+        the footprint's stones are cut out and shifted by the difference
+        between the two centers.
+        Parameters:
+            square = square number of the current center
+            new_square = square number of the new center
+        Returns:
+            none
+        """
+        footprint = FOOTPRINT_MASKS[square]
+        cleared = footprint | FOOTPRINT_MASKS[new_square]
+        offset = new_square - square
+
+        self._black = (self._black & ~cleared) | shift_mask(self._black & footprint, offset)
+        self._white = (self._white & ~cleared) | shift_mask(self._white & footprint, offset)
+
+    def toggle_masks(self, black_mask, white_mask):
+        """
+        Flips the squares of each mask - empty squares get a stone and
+        stones are removed. Applying the same masks twice changes nothing,
+        which is what makes an undo from the changed squares exact.
+        Parameters:
+            black_mask = black squares to flip
+            white_mask = white squares to flip
+        Returns:
+            none
+        """
+        self._black ^= black_mask
+        self._white ^= white_mask
+
+    def clear_mask(self, mask):
+        """
+        Removes every stone inside the mask.
+        Parameter:
+            mask = bitboard of the squares to empty
+        Returns:
+            none
+        """
+        self._black &= ~mask
+        self._white &= ~mask
+
+    def get_ring_centers(self, region=INTERIOR_MASK):
+        """
+        Finds every ring on the board - a center square that is empty
+        and surrounded by 8 stones of the same color.
+        Each neighbour is lined up with its center by shifting the
+        color's bitboard, so all the centers are checked at once.
+        Parameter:
+            region = bitboard of the centers to check (all of them by default)
+        Returns:
+            (black ring centers, white ring centers) as bitboards
+        """
+        empty_centers = region & INTERIOR_MASK & ~(self._black | self._white)
+        rings = []
+        for stones in (self._black, self._white):
+            centers = empty_centers
+            for offset in SURROUNDING_OFFSETS[:8]:
+                centers &= shift_mask(stones, -offset)
+            rings.append(centers)
+        return rings[0], rings[1]
+
+    def copy(self):
+        """
+        Returns an independent copy of the board.
+        """
+        return Bitboard(self._black, self._white)
+
+
+# game states, in the order Position stores them
+GAME_STATES = ("UNFINISHED", "BLACK_WON", "WHITE_WON")
+
+# Position packs the stones of the inside of the board (columns B-S, rows 2-19)
+INTERIOR_SIZE = BOARD_SIZE - 2
+INTERIOR_ROW_MASK = (1 << INTERIOR_SIZE) - 1
+INTERIOR_SQUARES = INTERIOR_SIZE * INTERIOR_SIZE
+
+
+class Position(bytes):
+    """
+    The Position class is a compact, immutable snapshot of a game: the
+    stones, the player turn and the game state, in about 100 bytes, for
+    keeping millions of positions in memory (analysis caches, search
+    trees). Positions are bytes, so they are hashable and compare equal
+    when the stones, turn and state are the same.
+
+    The first byte holds the turn (bit 0, set for white) and the game
+    state (bits 1-2, see GAME_STATES). The rest is a little-endian
+    number: one bit per inside square, row by row, set if it holds a
+    stone, then one bit per stone, in the same order, set if the stone
+    is white. The edges are left out, as the game clears them after
+    every move. The starting position (86 stones) takes 53 bytes.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_board(cls, board, game_turn="BLACK", game_state="UNFINISHED"):
+        """
+        Packs a position.
+        Parameters:
+            board = the Bitboard of the stones (stones on the edges are left out)
+            game_turn = "BLACK" or "WHITE"
+            game_state = one of GAME_STATES
+        Returns:
+            the new Position
+        """
+        black = board.get_black()
+        white = board.get_white()
+        stones = (black | white) & INTERIOR_MASK
+
+        occupied = 0
+        for row in range(INTERIOR_SIZE):
+            occupied |= (stones >> ((row + 1) * BOARD_SIZE + 1) & INTERIOR_ROW_MASK) << (row * INTERIOR_SIZE)
+        packed = occupied | gather_bits(white, stones) << INTERIOR_SQUARES
+        flags = (game_turn == "WHITE") | GAME_STATES.index(game_state) << 1
+        return cls(bytes((flags,)) + packed.to_bytes((packed.bit_length() + 7) // 8, "little"))
+
+    @classmethod
+    def from_game(cls, game):
+        """
+        Packs a game's position.
+        Parameter:
+            game = the GessGame
+        Returns:
+            the new Position
+        """
+        return cls.from_board(game.get_bitboard(), game.get_game_turn(), game.get_game_state())
+
+    def get_game_turn(self):
+        """
+        Returns the player color to move, "BLACK" or "WHITE".
+        """
+        return "WHITE" if self[0] & 1 else "BLACK"
+
+    def get_game_state(self):
+        """
+        Returns the game state, one of GAME_STATES.
+        """
+        return GAME_STATES[self[0] >> 1]
+
+    def get_bitboard(self):
+        """
+        Unpacks the stones.
+        Returns:
+            a new Bitboard
+        """
+        packed = int.from_bytes(self[1:], "little")
+        occupied = packed & ((1 << INTERIOR_SQUARES) - 1)
+        colors = packed >> INTERIOR_SQUARES
+
+        stones = 0
+        for row in range(INTERIOR_SIZE):
+            stones |= (occupied >> (row * INTERIOR_SIZE) & INTERIOR_ROW_MASK) << ((row + 1) * BOARD_SIZE + 1)
+        white = scatter_bits(colors, stones)
+        return Bitboard(stones & ~white, white)
+
+    def to_game(self, debug=False):
+        """
+        Sets up a game in this position (see GessGame.set_position).
+        Parameter:
+            debug = debug mode of the game (see GessGame)
+        Returns:
+            the new GessGame
+        """
+        game = GessGame(debug)
+        game.set_position(self.get_bitboard(), self.get_game_turn(), self.get_game_state())
+        return game
+
+    def __repr__(self):
+        return "Position(%s to move, %s, %d bytes)" % (self.get_game_turn(), self.get_game_state(), len(self))
+
+
+def _build_starting_board():
+    """
+    Places the black and white starting stones on an empty
+    20x20 grid and converts it to a Bitboard. Only run once,
+    when the module is loaded (see STARTING_BOARD below).
+    No parameters.
+    Returns:
+        a Bitboard of the starting position
+    """
+    game_board = []
+
+    # initialize empty game board
+    for rows in range(20):
+        game_board.append([])
+        for columns in range(20):
+            game_board[rows].append(".")
+
+    # initialize black and white stones to the empty game board
+    num = 2
+    for x in range(3):
+        game_board[6][num] = 'B'
+        game_board[6][-num - 1] = 'B'
+        game_board[13][num] = 'W'
+        game_board[13][-num - 1] = 'W'
+        num += 3
+
+    num = 2
+    for x in range(3):
+        game_board[1][num] = 'B'
+        game_board[3][num] = 'B'
+        game_board[1][-num - 1] = 'B'
+        game_board[3][-num - 1] = 'B'
+        game_board[16][num] = 'W'
+        game_board[18][num] = 'W'
+        game_board[16][-num - 1] = 'W'
+        game_board[18][-num - 1] = 'W'
+        num += 2
+
+        if num == 6:
+            for y in range(3):
+                game_board[1][num] = 'B'
+                game_board[3][num] = 'B'
+                game_board[1][-num - 1] = 'B'
+                game_board[3][-num - 1] = 'B'
+                game_board[16][num] = 'W'
+                game_board[18][num] = 'W'
+                game_board[16][-num - 1] = 'W'
+                game_board[18][-num - 1] = 'W'
+                num += 1
+
+    num = 1
+    for x in range(4):
+        game_board[2][num] = 'B'
+        game_board[2][-num - 1] = 'B'
+        game_board[17][num] = 'W'
+        game_board[17][-num - 1] = 'W'
+        num += 1
+        if x == 2:
+            num += 1
+        elif x == 3:
+            num += 1
+            for y in range(4):
+                game_board[2][num] = 'B'
+                game_board[17][num] = 'W'
+                if y == 3:
+                    game_board[2][num + 2] = 'B'
+                    game_board[17][num + 2] = 'W'
+                num += 1
+
+    return Bitboard.from_grid(game_board)
+
+
+STARTING_BOARD = _build_starting_board()
+STARTING_RINGS = STARTING_BOARD.get_ring_centers()  # L3 (black) & L18 (white)
+
+# weights of GessGame.evaluate's features (see FeatureAccumulator)
+DEFAULT_WEIGHTS = {
+    "stones": 10,
+    "rings": 500,
+    "pieces": 0,
+    "free_pieces": 2,
+    "mobility": 1,
+}
+
+
+class FeatureAccumulator:
+    """
+    The FeatureAccumulator class keeps the position features an engine
+    needs after every move, for both colors:
+    - stones: number of stones
+    - pieces: centers whose footprint only holds the color's stones
+    - free_pieces: pieces with a center stone (they can move any distance)
+    - mobility: directions the pieces can move in (their outer stones)
+
+    Like ring_check, it remembers the stones it last saw and works from
+    the tiles that changed since (the footprints of the moves and any
+    stones cleared from the edges; taking a move back is just another
+    change). Nothing is done if no tile changed, and the stone counts
+    only look at the changed tiles. The piece features only change at
+    centers within one row of a changed tile, so they're taken off for
+    those rows as they were and added back as they are now. The rows
+    are cut out of the bitboards as a narrow band (a move changes two
+    bands of 3 to 5 rows), so the shifts that count them work on much
+    smaller integers than the whole board.
+    """
+
+    def __init__(self, board):
+        """
+        Computes the features of a whole board.
+        Parameter:
+            board = the Bitboard to start from
+        """
+        self._black = board.get_black()
+        self._white = board.get_white()
+        self._stones = [self._black.bit_count(), self._white.bit_count()]
+        self._pieces = [0, 0]
+        self._free_pieces = [0, 0]
+        self._mobility = [0, 0]
+        self._count_pieces(self._black, self._white, 1, BOARD_SIZE - 2, 1)
+
+    def update(self, board):
+        """
+        Brings the features up to date with the board.
+        Parameter:
+            board = the Bitboard the features belong to
+        Returns:
+            none
+        """
+        black = board.get_black()
+        white = board.get_white()
+        black_changes = black ^ self._black
+        white_changes = white ^ self._white
+        if not black_changes and not white_changes:
+            return
+
+        self._stones[0] += (black & black_changes).bit_count() - (self._black & black_changes).bit_count()
+        self._stones[1] += (white & white_changes).bit_count() - (self._white & white_changes).bit_count()
+
+        # the centers within one row of the changed tiles, as runs of rows that don't touch
+        changed_rows = sorted(set(SQUARE_ROWS[square] for square in iterate_squares(black_changes | white_changes)))
+        runs = []
+        for row in changed_rows:
+            first = max(row - 1, 1)
+            last = min(row + 1, BOARD_SIZE - 2)
+            if runs and first <= runs[-1][1] + 1:
+                runs[-1][1] = last
+            else:
+                runs.append([first, last])
+
+        for first, last in runs:
+            self._count_pieces(self._black, self._white, first, last, -1)
+            self._count_pieces(black, white, first, last, 1)
+        self._black = black
+        self._white = white
+
+    def _count_pieces(self, black, white, first, last, sign):
+        """
+        Adds (sign 1) or takes off (sign -1) the pieces, free pieces and
+        mobility of both colors, for the centers in a run of rows.
+        Parameters:
+            black, white = the stones to count from
+            first, last = the first and last row of centers to count
+            sign = 1 or -1
+        """
+        # the rows of the centers and one more on each side, moved down to square 0
+        low = (first - 1) * BOARD_SIZE
+        band = (1 << ((last - first + 3) * BOARD_SIZE)) - 1
+        black = black >> low & band
+        white = white >> low & band
+        centers = INTERIOR_MASK >> low & band & ~((1 << BOARD_SIZE) - 1) & (band >> BOARD_SIZE)
+
+        # the stones next to every center, one direction at a time (NW, N,
+        # NE, E, SE, S, SW, W, see SURROUNDING_OFFSETS); they give both the
+        # footprints' contents and the mobility. Bits shifted past the band
+        # never land on one of its centers, so they don't need clearing.
+        black_neighbours = (black << 21, black << 20, black << 19, black >> 1,
+                            black >> 21, black >> 20, black >> 19, black << 1)
+        white_neighbours = (white << 21, white << 20, white << 19, white >> 1,
+                            white >> 21, white >> 20, white >> 19, white << 1)
+        near_black = black | black_neighbours[0] | black_neighbours[1] | black_neighbours[2] | black_neighbours[3] \
+            | black_neighbours[4] | black_neighbours[5] | black_neighbours[6] | black_neighbours[7]
+        near_white = white | white_neighbours[0] | white_neighbours[1] | white_neighbours[2] | white_neighbours[3] \
+            | white_neighbours[4] | white_neighbours[5] | white_neighbours[6] | white_neighbours[7]
+
+        for index, own, pure, own_neighbours in (
+                (0, black, near_black & ~near_white & centers, black_neighbours),
+                (1, white, near_white & ~near_black & centers, white_neighbours)):
+            if not pure:
+                continue
+            mobility = 0
+            for neighbours in own_neighbours:
+                mobility += (neighbours & pure).bit_count()
+            self._pieces[index] += sign * pure.bit_count()
+            self._free_pieces[index] += sign * (pure & own).bit_count()
+            self._mobility[index] += sign * mobility
+
+    def get_features(self):
+        """
+        Returns the features as a dict, e.g. {"black_stones": 43, ...}.
+        """
+        features = {}
+        for index, color in enumerate(("black", "white")):
+            features[color + "_stones"] = self._stones[index]
+            features[color + "_pieces"] = self._pieces[index]
+            features[color + "_free_pieces"] = self._free_pieces[index]
+            features[color + "_mobility"] = self._mobility[index]
+        return features
+
+    def copy(self):
+        """
+        Returns an independent copy of the accumulator.
+        """
+        accumulator = FeatureAccumulator.__new__(FeatureAccumulator)
+        accumulator._black = self._black
+        accumulator._white = self._white
+        accumulator._stones = list(self._stones)
+        accumulator._pieces = list(self._pieces)
+        accumulator._free_pieces = list(self._free_pieces)
+        accumulator._mobility = list(self._mobility)
+        return accumulator
+
+    def get_differences(self):
+        """
+        Returns black's features minus white's, as a tuple of
+        (stones, pieces, free_pieces, mobility).
+        """
+        return (self._stones[0] - self._stones[1], self._pieces[0] - self._pieces[1],
+                self._free_pieces[0] - self._free_pieces[1], self._mobility[0] - self._mobility[1])
+
+
+STARTING_FEATURES = FeatureAccumulator(STARTING_BOARD)
+
 
 class GessGame:
     """
@@ -13,88 +869,64 @@ class GessGame:
     3. keeps track of player turns (i.e. whose turn it is..)
     4. keeps track of the game state (i.e. on-going, black wins, white wins, etc.)
     5. this class also has a method (make-move) that acts like a console 'controller'.
-       it takes in move requests from the player and communicates with the
-       Piece class to make a move on the board.
+       it takes in move requests from the player and moves the Piece's
+       footprint on the board.
     6. keeps track of player lives (i.e. rings)
 
-    The GessGame interacts with the Piece class. The GessGame checks the
-    player's move inputs and if there are valid moves, then the Piece
-    class will return the new coordinates for the board to be updated.
+    The GessGame checks the player's move inputs and if there are valid
+    moves, the Bitboard's move_footprint updates the board. The Piece
+    class wraps the same kernel for callers that use its move methods.
     """
 
-    def __init__(self):
+    def __new__(cls, debug=False, profiler=None, board_size=BOARD_SIZE):
+        """
+        Makes a GessSparse.SparseGessGame instead for any board size
+        but the standard 20x20 (the bitboard tables only fit 20x20).
+        """
+        if cls is GessGame and board_size != BOARD_SIZE:
+            from GessSparse import SparseGessGame
+            cls = SparseGessGame
+        return super().__new__(cls)
+
+    def __init__(self, debug=False, profiler=None, board_size=BOARD_SIZE):
         """
         The init method initializes some of the basic components
         of the game, such as the game board itself, starting stones,
         setting initial game state (unfinished), and player starting
         color.
+        Parameters:
+            debug = if True, ring_check compares its incremental result
+            with a full rescan of the board after every move
+            profiler = optional MoveProfiler (see GessProfile) that times
+            the phases of every make_move and push_move
+            board_size = number of rows (and columns) of the board; any
+            size but 20 makes a GessSparse.SparseGessGame (see __new__)
         """
-        game_board = []
-
         self._game_state = "UNFINISHED"  # other options: "BLACK", "WHITE"
-        self._game_board = game_board
+        self._game_board = STARTING_BOARD.copy()  # black & white starting stones
         self._game_turn = "BLACK"  # new game's default always "BLACK"
         self._char_set = "ABCDEFGHIJKLMNOPQRST"  # possible columns (A-T)
         self._black_rings = ['L3']
         self._white_rings = ['L18']
+        self._debug = debug
+        self._profiler = profiler
 
-        # initialize empty game board
-        for rows in range(20):
-            game_board.append([])
-            for columns in range(20):
-                game_board[rows].append(".")
-
-        # initialize black and white stones to the empty game board
-        num = 2
-        for x in range(3):
-            game_board[6][num] = 'B'
-            game_board[6][-num - 1] = 'B'
-            game_board[13][num] = 'W'
-            game_board[13][-num - 1] = 'W'
-            num += 3
-
-        num = 2
-        for x in range(3):
-            game_board[1][num] = 'B'
-            game_board[3][num] = 'B'
-            game_board[1][-num - 1] = 'B'
-            game_board[3][-num - 1] = 'B'
-            game_board[16][num] = 'W'
-            game_board[18][num] = 'W'
-            game_board[16][-num - 1] = 'W'
-            game_board[18][-num - 1] = 'W'
-            num += 2
-
-            if num == 6:
-                for y in range(3):
-                    game_board[1][num] = 'B'
-                    game_board[3][num] = 'B'
-                    game_board[1][-num - 1] = 'B'
-                    game_board[3][-num - 1] = 'B'
-                    game_board[16][num] = 'W'
-                    game_board[18][num] = 'W'
-                    game_board[16][-num - 1] = 'W'
-                    game_board[18][-num - 1] = 'W'
-                    num += 1
-
-        num = 1
-        for x in range(4):
-            game_board[2][num] = 'B'
-            game_board[2][-num - 1] = 'B'
-            game_board[17][num] = 'W'
-            game_board[17][-num - 1] = 'W'
-            num += 1
-            if x == 2:
-                num += 1
-            elif x == 3:
-                num += 1
-                for y in range(4):
-                    game_board[2][num] = 'B'
-                    game_board[17][num] = 'W'
-                    if y == 3:
-                        game_board[2][num + 2] = 'B'
-                        game_board[17][num + 2] = 'W'
-                    num += 1
+        # ring centers (as bitboards) and the stones they were found on,
+        # so ring_check only needs to look at the tiles that changed since
+        self._ring_centers = STARTING_RINGS
+        self._ring_stones = (STARTING_BOARD.get_black(), STARTING_BOARD.get_white())
+
+        self._undo_stack = []  # moves made with push_move, latest last
+
+        # legal_destinations results, for the position they were found in
+        self._destinations = {}
+        self._destinations_position = None
+
+        # Zobrist hash of the stones and the player turn
+        self._hash = get_zobrist_changes(STARTING_BOARD.get_black(), STARTING_BOARD.get_white())
+
+        # evaluation features, brought up to date when they're asked for
+        self._features = STARTING_FEATURES.copy()
 
     def get_game_state(self):
         """
@@ -107,17 +939,136 @@ class GessGame:
         """
         return self._game_state
 
+    def get_board_size(self):
+        """
+        Returns the number of rows (and columns) of the board.
+        """
+        return BOARD_SIZE
+
+    def get_profiler(self):
+        """
+        Returns the game's MoveProfiler, or None if it isn't profiled.
+        """
+        return self._profiler
+
+    def set_profiler(self, profiler):
+        """
+        Starts (or, with None, stops) timing the phases of every move.
+        Parameter:
+            profiler = a MoveProfiler (see GessProfile), or None
+        Returns:
+            none
+        """
+        self._profiler = profiler
+
     def get_game_board(self):
         """
         Returns the current game board.
         Used for printing the game board and seeing
         the movement of each stone.
+        The board itself is stored as a Bitboard, so this builds
+        a fresh 20x20 grid of 'B', 'W' and '.' for display.
+        No parameters.
+        Returns:
+            the current game board (list of rows)
+        """
+        return self._game_board.get_grid()
+
+    def get_bitboard(self):
+        """
+        Returns the Bitboard the stones are stored on (the live board,
+        not a copy), for code that works with the bitboards directly.
         No parameters.
         Returns:
-            the current game board
+            the current Bitboard
         """
         return self._game_board
 
+    def get_rings(self, color):
+        """
+        Returns the ring centers of a player color.
+        Parameter:
+            color = "BLACK" or "WHITE"
+        Returns:
+            list of ring centers (e.g. ['L3']), a copy (the game's own
+            list can be shared with its forks, see fork)
+        """
+        if color == "BLACK":
+            return list(self._black_rings)
+        return list(self._white_rings)
+
+    def get_hash(self):
+        """
+        Returns the 64-bit Zobrist hash of the current position
+        (stone placement and the player turn). It's kept up to date
+        as stones move, so reading it costs nothing.
+        No parameters.
+        Returns:
+            the position's hash
+        """
+        return self._hash
+
+    def get_features(self):
+        """
+        Returns the position's evaluation features for both colors
+        (see FeatureAccumulator), plus the number of rings.
+        No parameters.
+        Returns:
+            dict of features, e.g. {"black_stones": 43, "black_rings": 1, ...}
+        """
+        features = self._update_features().get_features()
+        features["black_rings"] = len(self._black_rings)
+        features["white_rings"] = len(self._white_rings)
+        return features
+
+    def evaluate(self, weights=None):
+        """
+        Scores the position from the point of view of the player to move:
+        the weighted sum of the player's features minus the opponent's.
+        Parameter:
+            weights = dict of feature weights (see DEFAULT_WEIGHTS);
+            missing features count 0
+        Returns:
+            the score (higher is better for the player to move)
+        """
+        if weights is None:
+            weights = DEFAULT_WEIGHTS
+        stones, pieces, free_pieces, mobility = self._update_features().get_differences()
+        rings = len(self._black_rings) - len(self._white_rings)
+
+        score = (stones * weights.get("stones", 0) + rings * weights.get("rings", 0)
+                 + pieces * weights.get("pieces", 0) + free_pieces * weights.get("free_pieces", 0)
+                 + mobility * weights.get("mobility", 0))
+        if self._game_turn == "BLACK":
+            return score
+        return -score
+
+    def _update_features(self):
+        """
+        Brings the feature accumulator up to date with the board (in debug
+        mode, checking it against a fresh accumulator).
+        Returns:
+            the FeatureAccumulator
+        """
+        self._features.update(self._game_board)
+        if self._debug:
+            if self._features.get_features() != FeatureAccumulator(self._game_board).get_features():
+                raise AssertionError("incremental features don't match a fresh count")
+        return self._features
+
+    def update_hash(self, black, white):
+        """
+        Brings the hash up to date after stones changed, by XORing in
+        the keys of the squares that differ from the old stones.
+        Parameters:
+            black = black bitboard before the change
+            white = white bitboard before the change
+        Returns:
+            none
+        """
+        board = self._game_board
+        self._hash ^= get_zobrist_changes(black ^ board.get_black(), white ^ board.get_white())
+
     def get_game_turn(self):
         """
         Returns the current turn's player color.
@@ -139,20 +1090,122 @@ class GessGame:
         Returns:
             none
         """
-        self._game_board[new_row][new_column] = self._game_board[current_row][current_column]
-        self._game_board[current_row][current_column] = "."
+        board = self._game_board
+        black, white = board.get_black(), board.get_white()
+        board.move_stone(current_row, current_column, new_row, new_column)
+        self.update_hash(black, white)
 
     def update_game_board(self, new_board):
         """
         Receives the updated coordinates from the Piece class and set
         current game_board to new_board.
         Parameters:
-            new_board = new game board with updated coordinates
+            new_board = new game board with updated coordinates,
+            either a Bitboard or a 20x20 grid (e.g. from get_game_board)
         Returns:
             none
         """
+        if not isinstance(new_board, Bitboard):
+            new_board = Bitboard.from_grid(new_board)
         self._game_board = new_board
 
+        self._hash = get_zobrist_changes(new_board.get_black(), new_board.get_white())
+        if self._game_turn == "WHITE":
+            self._hash ^= ZOBRIST_WHITE_TURN
+
+    def set_position(self, new_board, game_turn, game_state="UNFINISHED"):
+        """
+        Sets up a whole position (e.g. one read back from a game record):
+        the stones, the player turn and the game state. The rings are
+        found with a full scan of the new board, and the moves remembered
+        by push_move are forgotten.
+        Parameters:
+            new_board = the Bitboard of the position (it is used, not copied)
+            game_turn = "BLACK" or "WHITE"
+            game_state = "UNFINISHED", "BLACK_WON" or "WHITE_WON"
+        Returns:
+            none
+        """
+        self._game_turn = game_turn
+        self._game_state = game_state
+        self.update_game_board(new_board)
+
+        self._ring_centers = new_board.get_ring_centers()
+        self._ring_stones = (new_board.get_black(), new_board.get_white())
+        self._black_rings = get_center_names(self._ring_centers[0])
+        self._white_rings = get_center_names(self._ring_centers[1])
+        self._undo_stack = []
+
+    def get_position(self):
+        """
+        Returns a compact snapshot of the game's position (see Position).
+        """
+        return Position.from_game(self)
+
+    def fork(self):
+        """
+        Makes an independent copy of the game for exploring a variation,
+        without copying the board. The stones are stored in Python
+        integers, which are never changed in place: a move builds new
+        integers for the tiles it changes, so the fork and its parent
+        keep sharing the stones, rings and ring tracking snapshot until
+        one of them moves (and only the one that moves gets new ones).
+        The fork starts with no moves to take back with pop_move.
+        No parameters.
+        Returns:
+            the new GessGame
+        """
+        game = GessGame.__new__(GessGame)
+        game.__dict__.update(self.__dict__)
+        game._game_board = self._game_board.copy()
+        game._features = self._features.copy()
+        game._undo_stack = []
+        game._destinations = {}
+        return game
+
+    def get_memory_usage(self, seen=None):
+        """
+        Adds up the bytes of everything the game holds (the board, rings,
+        ring tracking, features, the legal destinations cache and moves
+        remembered by push_move), including the contents of its lists,
+        tuples, dicts and sets. Objects shared between games are counted
+        once per 'seen' set, so the memory of many forks can be added up
+        by passing the same set to all of them. The profiler and the
+        module's shared tables (see _get_shared_objects) aren't counted.
+        Parameter:
+            seen = optional set of ids of the objects already counted
+        Returns:
+            number of bytes
+        """
+        if seen is None:
+            seen = set()
+        shared = set(id(item) for item in self._get_shared_objects())
+        total = 0
+        pending = [self]
+        while pending:
+            item = pending.pop()
+            if id(item) in seen or id(item) in shared:
+                continue
+            seen.add(id(item))
+            total += sys.getsizeof(item)
+
+            if isinstance(item, (list, tuple, set, frozenset)):
+                pending.extend(item)
+            elif isinstance(item, dict):
+                pending.extend(item.keys())
+                pending.extend(item.values())
+            elif hasattr(item, "__dict__"):
+                total += sys.getsizeof(item.__dict__)
+                pending.extend(item.__dict__.values())
+        return total
+
+    def _get_shared_objects(self):
+        """
+        Returns the objects a game refers to but doesn't own (they're
+        shared by every game in the process), for get_memory_usage.
+        """
+        return (self._profiler,)
+
     def toggle_game_turn(self):
         """
         Manually switches the game's player turn to the opposite color.
@@ -164,9 +1217,11 @@ class GessGame:
         """
         if self._game_turn == 'BLACK':
             self._game_turn = "WHITE"
+            self._hash ^= ZOBRIST_WHITE_TURN
 
         elif self._game_turn == "WHITE":
             self._game_turn = "BLACK"
+            self._hash ^= ZOBRIST_WHITE_TURN
 
     def resign_game(self):
         """
@@ -180,7 +1235,8 @@ class GessGame:
         if self._game_state == 'UNFINISHED':
             if self._game_turn == 'WHITE':
                 self._game_state = 'BLACK_WON'
-            self._game_state = 'WHITE_WON'
+            else:
+                self._game_state = 'WHITE_WON'
 
     def clear_edges(self):
         """
@@ -192,22 +1248,21 @@ class GessGame:
         Returns:
             none
         """
-        num = 0
-
-        for x in range(2):
-            for y in range(20):
-                row, num = y, num
-                self.set_game_board(row, num, 0, 0)
-                self.set_game_board(num, y, 0, 0)
-            num += 19
+        board = self._game_board
+        black, white = board.get_black(), board.get_white()
+        board.clear_mask(EDGE_MASK)
+        if (black | white) & EDGE_MASK:
+            self.update_hash(black, white)
 
     def make_move(self, current, new):
         """
         This method accepts the move inputs from each player color.
         The inputs are validated to be sure it is a legal move.
-        If the move is legal, the moves' coordinates are passed to
-        the Piece class' corresponding move methods to update
-        the new center's footprint with the current center's footprint.
+        If the move is legal, the new center's footprint is replaced
+        with the current center's footprint directly on the Bitboard
+        (nothing is allocated for the move itself).
+        The center names are only parsed here; the validation and the
+        move itself work with square numbers.
         Parameters:
             current = player's Piece's location that he/she wants to move
             new = the new location that player wants the Piece to relocate
@@ -215,108 +1270,342 @@ class GessGame:
             False if the player's inputs are not valid. Otherwise
             the board will update the requested stone relocation.
         """
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.start()
+
+        current_square = parse_square(current)
+        new_square = parse_square(new)
+        if current_square is None or new_square is None:
+            if profiler is not None:
+                profiler.lap("validation")
+                profiler.reject("not a square")
+            return False
 
-        one = Piece(self._game_board)  # initializes the Piece class to access its set of move methods
-
-        new_column = ord(new[0].upper()) - 64
-        current_column = ord(current[0].upper()) - 64
-
-        new_row = int(new[1:])
-        current_row = int(current[1:])
-
-        vertical_distance = int(new[1:]) - int(current[1:])  # number of tiles between the closest edge of the
-        horizontal_distance = abs(new_column) - current_column
+        reason = self.get_move_error(current_square, new_square, None, profiler)
+        if reason is not None:
+            if profiler is not None:
+                profiler.reject(reason)
+            return False
+        return self.move_piece(current_square, new_square, profiler)
 
-        player_turn = self._game_turn
-        current_surrounding = self.list_center_stones(current)
-        current_center = self._game_board[current_row - 1][current_column - 1]
+    def get_move_error(self, current_square, new_square, color=None, profiler=None):
+        """
+        Validates a move given as square numbers. The cheap checks of
+        the inputs and the Piece come first, then the direction stone,
+        the last ring and the path.
+        Parameters:
+            current_square = square number of the Piece's center
+            new_square = square number of the new center
+            color = the player color making the move (defaults to current turn)
+            profiler = optional MoveProfiler (see GessProfile) timing each phase
+        Returns:
+            None if the move is legal, otherwise the reason it isn't:
+            "off the board", "not a line", "game over", "opponent stones",
+            "too far", "no stone in direction", "last ring" or "path blocked"
+        """
+        if color is None:
+            color = self._game_turn
+        board = self._game_board
+        occupied = board.get_occupied()
+        if color == 'BLACK':
+            opponent = board.get_white()
+        else:
+            opponent = board.get_black()
 
         # ****************
         # Move Validations
         # ****************
 
-        # invalid columns
-        if current[0].upper() not in self._char_set or new[0].upper() not in self._char_set:
-            return False
+        reason = None
+        vector = None
 
-        # invalid columns
-        elif current[0].upper() == 'A' or new[0].upper() == 'A':
-            return False
+        # invalid columns (A, T) or rows (1, 20)
+        if not INTERIOR_MASK >> current_square & 1 or not INTERIOR_MASK >> new_square & 1:
+            reason = "off the board"
+        else:
+            # moves have to follow a row, a column, or a diagonal
+            vector = get_direction(current_square, new_square)
+            if vector is None:
+                reason = "not a line"
+            elif self._game_state != "UNFINISHED":
+                reason = "game over"
+
+            # prevent player from using opponent's stones
+            elif FOOTPRINT_MASKS[current_square] & opponent:
+                reason = "opponent stones"
+
+            # selected Piece has no center stone & move is > 3 tiles
+            elif vector[1] > 3 and not occupied >> current_square & 1:
+                reason = "too far"
+
+        if profiler is not None:
+            profiler.lap("validation")
+        if reason is not None:
+            return reason
+        direction, distance = vector
 
-        # invalid columns
-        elif current[0].upper() == 'T' or new[0].upper() == 'T':
-            return False
+        # no stone for the particular direction
+        if not occupied >> (current_square + SURROUNDING_OFFSETS[direction]) & 1:
+            reason = "no stone in direction"
+        if profiler is not None:
+            profiler.lap("direction_check")
+        if reason is not None:
+            return reason
 
-        # invalid rows
-        elif current_row >= 20 or new_row >= 20:
-            return False
+        # check if player's last ring will be broken by the move
+        if len(self._black_rings) == 1 or len(self._white_rings) == 1:
+            if not self.last_ring_squares(current_square, new_square, color):
+                reason = "last ring"
+            if profiler is not None:
+                profiler.lap("last_ring")
+            if reason is not None:
+                return reason
 
-        # invalid rows
-        elif current_row < 2 or new_row < 2:
-            return False
+        # move to new center has stones preventing the path
+        if PATH_MASKS[current_square][direction][distance - 1] & occupied:
+            reason = "path blocked"
+        if profiler is not None:
+            profiler.lap("path_clear")
+        return reason
 
-        # no stone for the particular direction
-        elif self.direction_check(current, new) == '.':
-            return False
+    def move_piece(self, current_square, new_square, profiler=None):
+        """
+        Moves a Piece that has already been validated (see get_move_error),
+        then switches turns, clears the edges and updates the rings.
+        Parameters:
+            current_square = square number of the Piece's center
+            new_square = square number of the new center
+            profiler = optional MoveProfiler (see GessProfile) timing each phase
+        Returns:
+            True
+        """
 
-        elif self._game_state != "UNFINISHED":
-            return False
+        # ****************
+        # Piece Movements
+        # ****************
 
-        # check if player's last ring will be broken by the move
-        elif len(self._black_rings) == 1 or len(self._white_rings) == 1:
-            if not self.last_ring(current, new):
-                return False
+        board = self._game_board
+        black, white = board.get_black(), board.get_white()
+        board.move_footprint(current_square, new_square)
+        self.update_hash(black, white)
+        self.toggle_game_turn()  # switch to next player color's turn
 
-        if current.upper() == new.upper():
-            return False
+        if profiler is None:
+            self.clear_edges()  # clear edges around screen
+            return self.ring_check()
 
-        # prevent player from using opponent's stones
-        if player_turn == 'BLACK':
-            if 'W' in current_surrounding:
-                return False
+        profiler.lap("footprint")
+        self.clear_edges()
+        profiler.lap("clear_edges")
+        self.ring_check()
+        profiler.lap("ring_check")
+        profiler.accept()
+        return True
 
-        elif player_turn == 'WHITE':
-            if 'B' in current_surrounding:
-                return False
+    def push_move(self, current, new):
+        """
+        Makes a move like make_move, but remembers what it changed so
+        pop_move can take it back exactly. Only the changed squares are
+        kept (the two footprints and any stones cleared from the edges,
+        as XOR masks), together with the turn, game state, rings and
+        hash from before the move.
+        Parameters:
+            current = player's Piece's location
+            new = the new location for the Piece
+        Returns:
+            False if the move is not valid (nothing is remembered),
+            otherwise True.
+        """
+        current_square = parse_square(current)
+        new_square = parse_square(new)
+        if current_square is None or new_square is None:
+            profiler = self._profiler
+            if profiler is not None:
+                profiler.start()
+                profiler.lap("validation")
+                profiler.reject("not a square")
+            return False
+        return self.push_move_squares(current_square, new_square)
 
-        # disables 3x3 area if both stone colors in the area
-        elif 'B' in current_surrounding and 'W' in current_surrounding:
+    def push_move_squares(self, current_square, new_square):
+        """
+        push_move for a move given as square numbers.
+        Parameters:
+            current_square = square number of the Piece's center
+            new_square = square number of the new center
+        Returns:
+            False if the move is not valid (nothing is remembered),
+            otherwise True.
+        """
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.start()
+        reason = self.get_move_error(current_square, new_square, None, profiler)
+        if reason is not None:
+            if profiler is not None:
+                profiler.reject(reason)
             return False
 
-        # selected Piece has no center stone & move is > 3 tiles
-        if current_center == ".":
-            if abs(vertical_distance) > 3:
-                return False
+        board = self._game_board
+        black = board.get_black()
+        white = board.get_white()
 
-            elif abs(horizontal_distance) > 3:
-                return False
+        # the ring tracking snapshot is only kept if it's behind the board
+        ring_stones = self._ring_stones
+        if ring_stones == (black, white):
+            ring_stones = None
 
-        # move to new center has stones preventing the path
-        if not self.path_clear(current, new):
+        undo = [0, 0, self._game_turn, self._game_state, self._black_rings, self._white_rings,
+                self._ring_centers, ring_stones, self._hash]
+
+        self.move_piece(current_square, new_square, profiler)
+
+        undo[0] = black ^ board.get_black()
+        undo[1] = white ^ board.get_white()
+        self._undo_stack.append(undo)
+        return True
+
+    def pop_move(self):
+        """
+        Takes back the latest move made with push_move.
+        No parameters.
+        Returns:
+            False if there is no move to take back, otherwise True.
+        """
+        if not self._undo_stack:
             return False
 
-        # ****************
-        # Piece Movements
-        # ****************
+        black_changes, white_changes, game_turn, game_state, black_rings, white_rings, \
+            ring_centers, ring_stones, position_hash = self._undo_stack.pop()
 
-        if current[0] == new[0]:  # vertical movement if columns are same
-            if current_row < new_row:
-                self.update_game_board(one.move_vertical_1(current, vertical_distance))
-            elif current_row > new_row:
-                self.update_game_board(one.move_vertical_2(current, vertical_distance))
+        board = self._game_board
+        board.toggle_masks(black_changes, white_changes)
+        self._game_turn = game_turn
+        self._game_state = game_state
+        self._black_rings = black_rings
+        self._white_rings = white_rings
+        self._ring_centers = ring_centers
+        if ring_stones is None:
+            ring_stones = (board.get_black(), board.get_white())
+        self._ring_stones = ring_stones
+        self._hash = position_hash
+        return True
 
-        elif current[1:] == new[1:]:  # horizontal movement if rows are same
-            if current_column < new_column:
-                self.update_game_board(one.move_right(current, horizontal_distance))
-            elif current_column > new_column:
-                self.update_game_board(one.move_left(current, horizontal_distance))
+    def generate_legal_moves(self, color=None):
+        """
+        Lists every legal move for a player color without changing the game.
+        Uses the same rules as make_move: the Piece can't hold opponent
+        stones, needs a stone in the direction it moves, can only move up
+        to 3 tiles without a center stone, stops at the first stone in its
+        path (moving onto it is still legal), and can't break the player's
+        last ring.
+        Parameter:
+            color - "BLACK" or "WHITE" (defaults to the current turn's color)
+        Returns:
+            a list of (current, new) center pairs, e.g. ('L3', 'L6')
+        """
+        return [(SQUARE_NAMES[current_square], SQUARE_NAMES[new_square])
+                for current_square, new_square in self.generate_legal_squares(color)]
 
-        else:  # diagonal movement otherwise
-            self.update_game_board(one.move_diagonal_up(current, new, horizontal_distance))
+    def generate_legal_squares(self, color=None):
+        """
+        generate_legal_moves with square numbers instead of names.
+        Each Piece walks the precomputed CENTER_RAYS and stops at the first
+        obstruction, instead of trying every pair of centers.
+        Parameter:
+            color - "BLACK" or "WHITE" (defaults to the current turn's color)
+        Returns:
+            a list of (current square, new square) pairs
+        """
+        if color is None:
+            color = self._game_turn
+        if self._game_state != "UNFINISHED":
+            return []
+
+        board = self._game_board
+        if color == 'BLACK':
+            own, opponent = board.get_black(), board.get_white()
+        else:
+            own, opponent = board.get_white(), board.get_black()
+        occupied = own | opponent
+        check_last_ring = len(self._black_rings) == 1 or len(self._white_rings) == 1
+        if check_last_ring:
+            rings = self._white_rings if color == 'WHITE' else self._black_rings
+            last_ring = SQUARE_NUMBERS[rings[0]] if rings else None
+            ring_centers = self._ring_centers[0] | self._ring_centers[1]
+
+        moves = []
+
+        # only centers next to at least one of the player's stones can move
+        for square in iterate_squares(dilate_mask(own) & INTERIOR_MASK):
+            if FOOTPRINT_MASKS[square] & opponent:
+                continue
+            moving_ring = check_last_ring and ring_centers >> square & 1
+            for new_square in get_destinations(square, own, occupied):
+                # the ring index settles most moves without calling last_ring_squares: only
+                # moving a ring, or a new footprint reaching into the last ring, can break it
+                if moving_ring or check_last_ring and last_ring is not None \
+                        and RING_DEPENDENTS[new_square + SURROUNDING_OFFSETS[2]] >> last_ring & 1:
+                    if not self.last_ring_squares(square, new_square, color):
+                        continue
+                moves.append((square, new_square))
+        return moves
+
+    def legal_destinations(self, center, color=None):
+        """
+        Lists every center a Piece can legally move to, e.g. to highlight
+        them when the Piece is selected. The result is kept until the
+        position changes, so asking again (e.g. on every mouse hover)
+        costs a dict lookup.
+        Parameters:
+            center = the Piece's center (e.g. 'L3')
+            color = "BLACK" or "WHITE" (defaults to the current turn's color)
+        Returns:
+            list of new centers (empty if the Piece can't move)
+        """
+        square = parse_square(center)
+        if square is None:
+            return []
+        return [SQUARE_NAMES[new_square] for new_square in self.legal_destination_squares(square, color)]
 
-        self.toggle_game_turn()  # switch to next player color's turn
-        self.clear_edges()  # clear edges around screen
-        return self.ring_check()
+    def legal_destination_squares(self, square, color=None):
+        """
+        legal_destinations with square numbers instead of names.
+        Parameters:
+            square = square number of the Piece's center
+            color = "BLACK" or "WHITE" (defaults to the current turn's color)
+        Returns:
+            tuple of new square numbers
+        """
+        if color is None:
+            color = self._game_turn
+
+        # the cache belongs to one position (and game state, which resign_game changes)
+        position = (self._hash, self._game_state)
+        if self._destinations_position != position:
+            self._destinations = {}
+            self._destinations_position = position
+        destinations = self._destinations.get((square, color))
+        if destinations is not None:
+            return destinations
+
+        destinations = ()
+        board = self._game_board
+        if color == 'BLACK':
+            own, opponent = board.get_black(), board.get_white()
+        else:
+            own, opponent = board.get_white(), board.get_black()
+        if self._game_state == "UNFINISHED" and INTERIOR_MASK >> square & 1 \
+                and not FOOTPRINT_MASKS[square] & opponent:
+            destinations = get_destinations(square, own, own | opponent)
+            if len(self._black_rings) == 1 or len(self._white_rings) == 1:
+                destinations = [new_square for new_square in destinations
+                                if self.last_ring_squares(square, new_square, color)]
+            destinations = tuple(destinations)
+
+        self._destinations[(square, color)] = destinations
+        return destinations
 
     def direction_check(self, current, new):
         """
@@ -330,11 +1619,10 @@ class GessGame:
         'B', 'W', or '.' of a tile
         """
         directions = self.list_center_stones(current)
-        current_column = (ord(current[0].upper()) - 64) - 1
-        current_row = int(current[1:].upper()) - 1
-
-        new_column = (ord(new[0].upper()) - 64) - 1
-        new_row = int(new[1:].upper()) - 1
+        current_square = parse_square(current)
+        new_square = parse_square(new)
+        current_row, current_column = SQUARE_ROWS[current_square], SQUARE_COLUMNS[current_square]
+        new_row, new_column = SQUARE_ROWS[new_square], SQUARE_COLUMNS[new_square]
 
         # directions = [NW, N, NE, E, SE, S, SW, W, centerx]
 
@@ -368,46 +1656,42 @@ class GessGame:
         Scans the board to check for player rings.
         Add newly generated ring(s) to player(s) ring total.
         Updates the game state if one player has 0 rings.
+
+        Only the rings that could have changed are re-checked: the tiles
+        that differ from the last scan (the two footprints of a move and
+        any stones cleared from the edges) are grown by one tile, and only
+        the centers inside that region are scanned again. In debug mode,
+        the result is compared with a full rescan of the board.
         No parameters.
         Returns:
             True
         """
-        new_black_rings = self._black_rings
-        new_white_rings = self._white_rings
-        black_rings = []
-        white_rings = []
-
-        total_black = 0  # keep track of total rings each round
-        total_white = 0
-        for x in range(19):
-            for y in range(20):
-                surroundings = self.list_center_stones(chr(x + 65) + str(y))
-
-                black_stones = surroundings.count('B')
-                white_stones = surroundings.count('W')
-                center = chr(x + 65) + str(y)
-                if black_stones == 8 and surroundings[8] == '.':
-                    total_black += 1
-                    black_rings.append(center)
-                    if center not in self._black_rings:
-                        new_black_rings.append(center)
-                if white_stones == 8 and surroundings[8] == '.':
-                    total_white += 1
-                    white_rings.append(center)
-                    if center not in self._white_rings:
-                        new_white_rings.append(center)
-
-        self._black_rings = black_rings
-        self._white_rings = white_rings
+        board = self._game_board
+        black = board.get_black()
+        white = board.get_white()
+        black_centers, white_centers = self._ring_centers
+
+        changed = (black ^ self._ring_stones[0]) | (white ^ self._ring_stones[1])
+        if changed:
+            region = dilate_mask(changed) & INTERIOR_MASK
+            black_found, white_found = board.get_ring_centers(region)
+            new_black_centers = (black_centers & ~region) | black_found
+            new_white_centers = (white_centers & ~region) | white_found
+
+            # rings are listed column by column (A to S), top to bottom
+            if new_black_centers != black_centers:
+                self._black_rings = get_center_names(new_black_centers)
+            if new_white_centers != white_centers:
+                self._white_rings = get_center_names(new_white_centers)
+
+            self._ring_centers = (new_black_centers, new_white_centers)
+            self._ring_stones = (black, white)
+
+        if self._debug and self._ring_centers != board.get_ring_centers():
+            raise AssertionError("incremental ring tracking doesn't match a full rescan")
 
         # if no rings detected at end of each round, a player loses the game
-        if total_black == 0:
-            self._game_state = 'WHITE_WON'
-
-        elif total_white == 0:
-            self._game_state = 'BLACK_WON'
-
-        elif not self._black_rings:
+        if not self._black_rings:
             self._game_state = 'WHITE_WON'
 
         elif not self._white_rings:
@@ -415,7 +1699,7 @@ class GessGame:
 
         return True
 
-    def last_ring(self, current, new):
+    def last_ring(self, current, new, color=None):
         """
         While the player has only one life remaining,
         this method prevent moves that break ones' own
@@ -423,56 +1707,44 @@ class GessGame:
         Parameters:
             current - center to be relocated.
             new - the new center to move to.
+            color - the player color making the move (defaults to current turn).
+        Returns:
+            False if the move would break the player's last ring, else True
         """
-        new_column = new[0].upper()
-        new_row = int(new[1:])
-
-        last_black_ring = self._black_rings[0]
-        last_white_ring = self._white_rings[0]
+        return self.last_ring_squares(parse_square(current), parse_square(new), color)
 
-        new_surrounding = self.search_surrounding2(new)
-        current_surrounding = self.search_surrounding2(current)
-        black_surrounding = self.search_surrounding2(last_black_ring)
-        white_surrounding = self.search_surrounding2(last_white_ring)
-        overlaps = set()
+    def last_ring_squares(self, current_square, new_square, color=None):
+        """
+        last_ring for a move given as square numbers. The ring index
+        (RING_DEPENDENTS) tells at once whether the new footprint reaches
+        into the ring; only then are the tiles the move leaves empty
+        (the current footprint's empty tiles, moved to the new center)
+        intersected with the ring's tiles.
+        Parameters:
+            current_square = square number of the center to be relocated
+            new_square = square number of the new center
+            color = the player color making the move (defaults to current turn)
+        Returns:
+            False if the move would break the player's last ring, else True
+        """
+        if color is None:
+            color = self._game_turn
+        rings = self._white_rings if color == 'WHITE' else self._black_rings
+        last_ring = SQUARE_NUMBERS[rings[0]] if rings else None
 
         # checks if the new center's footprint overlaps with the last ring
-        # prevent moves where the overlapped tiles become empty (i.e. breaks the ring)
+        # (when its top right tile does) and prevent moves where the
+        # overlapped tiles become empty (i.e. breaks the ring)
+        if last_ring is not None and current_square != last_ring \
+                and RING_DEPENDENTS[new_square + SURROUNDING_OFFSETS[2]] >> last_ring & 1:
+            empty = FOOTPRINT_MASKS[current_square] & ~self._game_board.get_occupied()
+            if shift_mask(empty, new_square - current_square) & FOOTPRINT_MASKS[last_ring]:
+                return False
 
-        area = None
-        last_ring = None
-        for x in new_surrounding:
-            if self._game_turn == 'WHITE':
-                area = white_surrounding
-                last_ring = last_white_ring
-            elif self._game_turn == 'BLACK':
-                area = black_surrounding
-                last_ring = last_black_ring
-
-        if current.upper() != last_ring:
-            if x in area:
-                for index, x in enumerate(new_surrounding):
-                    if x in area:
-                        overlaps.add(index)
-                        for y in overlaps:
-                            row = current_surrounding[y][0] + 1
-                            column = chr(current_surrounding[y][1] + 65)
-                            content = self.scan(column + str(row))
-                            if content == '.':
-                                return False
         # prevents last ring from moving outside of the game board
-        if current.upper() in self._black_rings:
-            if new_column == 'B' or new_column == 'S':
-                return False
-        if current.upper() in self._black_rings:
-            if new_row == 2 or new_row == 19:
-                return False
-        if current.upper() in self._white_rings:
-            if new_column == 'B' or new_column == 'S':
-                return False
-        if current.upper() in self._white_rings:
-            if new_row == 2 or new_row == 19:
-                return False
+        black_centers, white_centers = self._ring_centers
+        if (black_centers | white_centers) >> current_square & 1 and RING_BORDER_MASK >> new_square & 1:
+            return False
 
         return True
 
@@ -487,20 +1759,28 @@ class GessGame:
             surrounding = a list of the footprint's content
         """
 
+        board = self._game_board
+
+        # inside the board, the footprint is read straight from the bitboards
+        square = parse_square(center)
+        if square is not None and INTERIOR_MASK >> square & 1:
+            return [board.get_square(square + offset) for offset in SURROUNDING_OFFSETS]
+
         current_column = (ord(center[0].upper()) - 64) - 1
         current_row = int(center[1:].upper()) - 1
 
         # calculations to get coordinates of other tiles in the
         # footprint revolves around center's (row, column)
-        centerx = self._game_board[current_row][current_column]
-        NW = self._game_board[current_row - 1][current_column - 1]
-        N = self._game_board[current_row - 1][current_column]
-        NE = self._game_board[current_row - 1][current_column + 1]
-        E = self._game_board[current_row][current_column + 1]
-        SE = self._game_board[current_row + 1][current_column + 1]
-        S = self._game_board[current_row + 1][current_column]
-        SW = self._game_board[current_row + 1][current_column - 1]
-        W = self._game_board[current_row][current_column - 1]
+        # (negative indexes wrap around, like they did on the old grid)
+        centerx = board.get_stone(current_row, current_column)
+        NW = board.get_stone(current_row - 1, current_column - 1)
+        N = board.get_stone(current_row - 1, current_column)
+        NE = board.get_stone(current_row - 1, current_column + 1)
+        E = board.get_stone(current_row, current_column + 1)
+        SE = board.get_stone(current_row + 1, current_column + 1)
+        S = board.get_stone(current_row + 1, current_column)
+        SW = board.get_stone(current_row + 1, current_column - 1)
+        W = board.get_stone(current_row, current_column - 1)
 
         surrounding = [NW, N, NE, E, SE, S, SW, W, centerx]
 
@@ -536,106 +1816,45 @@ class GessGame:
     def path_clear(self, current, new):
         """
         Check for stones in the movement path from 'current center' to 'new center'.
-        Uses the search_surroundings2 method to find the current center's footprint
-        and finds the path based on the 'difference' between current center and the
-        new center.
+        The tiles the footprint sweeps over towards the new center (in any
+        of the 8 directions) are checked against the stones on the board.
         Parameters:
             current = current center's location
             new = new center's location
         Returns:
              True if no stones in the way, else returns False.
         """
-        container = []
-
-        new_row = int(new[1:])
-        current_row = int(current[1:])
-
-        new_column = ord(new[0].upper()) - 64
-        current_column = ord(current[0].upper()) - 64
-
-        distance = new_row - current_row
-        horizontal_distance = abs(new_column) - int(current_column)
-        current_surrounding = self.search_surrounding2(current)
-
-        # vertical movements
-        if current_column == new_column:
-
-            if self._game_turn == "BLACK":
-                for x in range(3):
-                    num = 0
-                    for y in range(1, distance):
-                        row = current_surrounding[x][0] + num + 1
-                        column = current_surrounding[x][1]
-                        num += 1
-                        if not self._game_board[row][column] == ".":
-                            container.append(self._game_board[row][column])
-
-            elif self._game_turn == "WHITE":
-                for x in range(6, 9):
-                    num = 1
-                    for y in range(abs(distance), 1, -1):
-                        row = current_surrounding[x][0] + num - 2
-                        column = current_surrounding[x][1]
-                        num -= 1
-                        if not self._game_board[row][column] == ".":
-                            container.append(self._game_board[row][column])
-
-        # for horizontal movement
-        elif current_row == new_row:
-            num = -1
-            for x in range(abs(horizontal_distance) - 1):
-
-                for y in range(3):
-                    row = current_surrounding[4][0] + num
-                    if current_column > new_column:
-                        column = current_surrounding[4][1] - horizontal_distance
-                    else:
-                        column = current_surrounding[4][1] + horizontal_distance
-                    container.append(self._game_board[row][column])
-                    num += 1
-                num = -1
-                horizontal_distance -= 1
-
-        # diagonal movements
-        elif current_column != new_column and current_row != new_row:
-            # tiles of the footprint in the direction facing the new center
-            up_right = [6, 7, 8, 5, 2]
-            up_left = [8, 7, 6, 3, 0]
-            down_right = [8, 5, 2, 1, 0]
-            down_left = [6, 3, 0, 1, 2]
-            num = 1
-
-            # checks if the involved tiles above are obstructed by other
-            # stones in the move path
-            for x in range(5):
-                for y in range(horizontal_distance - 1):
-                    # diagonal, moving top right
-                    if current_column < new_column and new_row < current_row:
-                        row = current_surrounding[up_right[x]][0] - num
-                        column = current_surrounding[up_right[x]][1] + num
-                        container.append(self._game_board[row][column])
-
-                    # diagonal, moving top left
-                    elif current_column > new_column and new_row < current_row:
-                        row = current_surrounding[up_left[x]][0] - num
-                        column = current_surrounding[up_left[x]][1] - num
-                        container.append(self._game_board[row][column])
-
-                    # diagonal, moving bottom right
-                    elif current_column < new_column and new_row > current_row:
-                        row = current_surrounding[down_right[x]][0] + num
-                        column = current_surrounding[down_right[x]][1] + num
-                        container.append(self._game_board[row][column])
-
-                    # diagonal, moving bottom left
-                    elif current_column > new_column and new_row > current_row:
-                        row = current_surrounding[down_left[x]][0] + num
-                        column = current_surrounding[down_left[x]][1] - num
-                        container.append(self._game_board[row][column])
-                    num += 1
-                num = 1
-
-        if "B" in container or "W" in container:
+        new_row = int(new[1:]) - 1
+        current_row = int(current[1:]) - 1
+
+        new_column = ord(new[0].upper()) - 65
+        current_column = ord(current[0].upper()) - 65
+
+        row_step, column_step, distance = get_move_vector(current_row, current_column, new_row, new_column)
+
+        # the Piece can't end up with its center outside columns B-S / rows 2-19
+        if not 0 < current_row + row_step * distance < BOARD_SIZE - 1:
+            return False
+        if not 0 < current_column + column_step * distance < BOARD_SIZE - 1:
+            return False
+
+        square = current_row * BOARD_SIZE + current_column
+        return self.path_clear_squares(square, square + distance * (row_step * BOARD_SIZE + column_step))
+
+    def path_clear_squares(self, current_square, new_square):
+        """
+        path_clear for a straight move given as square numbers: every tile
+        the footprint sweeps over before reaching the new center, except for
+        the tiles of the footprint itself, has to be empty. The swept tiles
+        come from the precomputed PATH_MASKS.
+        Parameters:
+            current_square = square number of the current center
+            new_square = square number of the new center
+        Returns:
+             True if no stones in the way, else returns False.
+        """
+        direction, distance = get_direction(current_square, new_square)
+        if PATH_MASKS[current_square][direction][distance - 1] & self._game_board.get_occupied():
             return False
         return True
 
@@ -649,10 +1868,13 @@ class GessGame:
         Returns:
              the content of the location/position
         """
-        row = self._game_board[int(location[1:]) - 1]
-        column = (ord(location[0].upper()) - 64) - 1
+        square = parse_square(location)
+        if square is not None:
+            return self._game_board.get_square(square)
 
-        return row[column]
+        row = int(location[1:]) - 1
+        column = (ord(location[0].upper()) - 64) - 1
+        return self._game_board.get_stone(row, column)
 
     def is_empty(self, location):
         """
@@ -676,18 +1898,43 @@ class Piece(GessGame):
     class executes the valid inputs.
 
     The Piece class has a variety of move methods, where the specialty
-    depends on the direction of stone movement/relocation.
+    depends on the direction of stone movement/relocation. They are kept
+    for older callers; all of them share the Bitboard's move_footprint
+    kernel, which is also what make_move uses directly.
     """
 
     def __init__(self, old_board):
-        super().__init__()
+        """
+        Wraps an existing board. Unlike GessGame, no new board
+        or starting stones are set up.
+        Parameter:
+            old_board = the Bitboard to move stones on
+        """
         self._game_board = old_board
 
+    def move_footprint(self, current, row_distance, column_distance):
+        """
+        Shared by all of the move methods: moves the current center's
+        footprint by a number of rows and columns.
+        Parameters:
+            current = current center's location/coordinate
+            row_distance = rows to move (negative is up)
+            column_distance = columns to move (negative is left)
+        Returns:
+            an updated game board back to the GessGame class.
+        """
+        row = int(current[1:]) - 1
+        column = ord(current[0].upper()) - 65
+        square = row * BOARD_SIZE + column
+        new_square = square + row_distance * BOARD_SIZE + column_distance
+
+        self._game_board.move_footprint(square, new_square)
+        return self._game_board
+
     def move_vertical_1(self, current, vertical_distance):
         """
         Replaces the new center's footprint with the current center's
-        footprint. In the 3x3 footprint, the bottom row is added first,
-        followed by middle, and top.
+        footprint, moving down.
         Parameters:
             current = current center's location/coordinate
             vertical_distance = difference (tiles away) between
@@ -696,22 +1943,12 @@ class Piece(GessGame):
             an updated game board back to the GessGame class.
             If nothing is returned, then the updates won't take effect.
         """
-        surrounding = self.search_surrounding2(current)
-
-        for x in range(9):
-            # the variable names' are kind of vague, but I'll update at the end
-            num1 = surrounding[x][0]
-            num2 = surrounding[x][1]
-            num3 = surrounding[x][0] + vertical_distance
-            num4 = surrounding[x][1]
-            self.set_game_board(num1, num2, num3, num4)
-        return self.get_game_board()
+        return self.move_footprint(current, vertical_distance, 0)
 
     def move_vertical_2(self, current, vertical_distance):
         """
         Replaces the new center's footprint with the current center's
-        footprint. In the 3x3 footprint, the top row is added first,
-        followed by middle, and lastly bottom.
+        footprint, moving up.
         Parameters:
             current = current center's location/coordinate
             vertical_distance = difference (tiles away) between
@@ -719,119 +1956,76 @@ class Piece(GessGame):
         Returns:
             an updated game board back to the GessGame class.
         """
-        surrounding = self.search_surrounding2(current)
-
-        for x in range(8, -1, -1):
-            num1 = surrounding[x][0]
-            num2 = surrounding[x][1]
-            num3 = surrounding[x][0] + vertical_distance
-            num4 = surrounding[x][1]
-            self.set_game_board(num1, num2, num3, num4)
-        return self.get_game_board()
+        return self.move_footprint(current, vertical_distance, 0)
 
     def move_right(self, current, horizontal_distance):
         """
         Replaces the new center's footprint with the current center's
-        footprint. In the 3x3 footprint, the top row is added first,
-        followed by middle, and lastly bottom.
+        footprint, moving right.
         Parameters:
             current = current center's location/coordinate
-            vertical_distance = difference (tiles away) between current center's column
+            horizontal_distance = difference (tiles away) between current center's column
              and new center's column
         Returns:
             an updated game board back to the GessGame class.
         """
-        surrounding = self.search_surrounding2(current)
-
-        for x in range(8, -1, -1):
-            num1 = surrounding[x][0]
-            num2 = surrounding[x][1]
-            num3 = surrounding[x][0]
-            num4 = surrounding[x][1] + horizontal_distance
-            self.set_game_board(num1, num2, num3, num4)
-        return self.get_game_board()
+        return self.move_footprint(current, 0, horizontal_distance)
 
     def move_left(self, current, horizontal_distance):
         """
         Replaces the new center's footprint with the current center's
-        footprint. In the 3x3 footprint, the left column is added first,
-        followed by middle, and lastly right column.
+        footprint, moving left.
         Parameters:
             current = current center's location/coordinate
-            vertical_distance = difference (tiles away) between current center's column
+            horizontal_distance = difference (tiles away) between current center's column
              and new center's column
         Returns:
             an updated game board back to the GessGame class.
         """
-        surrounding = self.search_surrounding2(current)
-
-        for x in range(3):
-            for y in range(6 + x, -3 + x, -3):
-                num1 = surrounding[y][0]
-                num2 = surrounding[y][1]
-                num3 = surrounding[y][0]
-                num4 = surrounding[y][1] + horizontal_distance
-                self.set_game_board(num1, num2, num3, num4)
-        return self.get_game_board()
+        return self.move_footprint(current, 0, horizontal_distance)
 
     def move_diagonal_up(self, current, new, horizontal_distance):
         """
         Replaces the new center's footprint with the current center's footprint
-        for a Piece that aims to relocate top right or top left of the game board.
-        Like the other move methods, this one would also use the search_surroundings2
-        method to search for the center's footprint and add each of it's component
-        to the new location.
+        for a Piece that moves diagonally (in any of the 4 diagonal directions).
         Parameters:
             current = current center's location/coordinate
-            horizontal_distance = difference between the current center's row and
-            the new center's row.
-            vertical_distance = difference (tiles away) between current center's column
-             and new center's column
+            new = new center's location/coordinate
+            horizontal_distance = difference between the current center's column and
+            the new center's column.
         Returns:
             an updated game board back to the GessGame class.
         """
-        new_column = ord(new[0].upper()) - 64
-        new_row = int(new[1:])
-
-        current_column = ord(current[0].upper()) - 64
-        current_row = int(current[1:])
-
-        surrounding = self.search_surrounding2(current)
-
-        # moving bottom left
-        if new_column < current_column and new_row > current_row:
-            for x in range(9):
-                num1 = surrounding[x][0]
-                num2 = surrounding[x][1]
-                num3 = surrounding[x][0] + abs(horizontal_distance)
-                num4 = surrounding[x][1] - abs(horizontal_distance)
-                self.set_game_board(num1, num2, num3, num4)
-
-        # moving bottom right
-        elif new_column > current_column and new_row > current_row:
-
-            for x in range(9):
-                num1 = surrounding[x][0]
-                num2 = surrounding[x][1]
-                num3 = surrounding[x][0] + horizontal_distance
-                num4 = surrounding[x][1] + horizontal_distance
-                self.set_game_board(num1, num2, num3, num4)
-
-        # moving top left
-        elif new_column < current_column:
-            for x in range(8, -1, -1):
-                num1 = surrounding[x][0]
-                num2 = surrounding[x][1]
-                num3 = surrounding[x][0] - abs(horizontal_distance)
-                num4 = surrounding[x][1] - abs(horizontal_distance)
-                self.set_game_board(num1, num2, num3, num4)
-
-        # moving top right
+        if int(new[1:]) > int(current[1:]):
+            row_distance = abs(horizontal_distance)
         else:
-            for x in range(8, -1, -1):
-                num1 = surrounding[x][0]
-                num2 = surrounding[x][1]
-                num3 = surrounding[x][0] - horizontal_distance
-                num4 = surrounding[x][1] + horizontal_distance
-                self.set_game_board(num1, num2, num3, num4)
-        return self.get_game_board()
+            row_distance = -abs(horizontal_distance)
+        return self.move_footprint(current, row_distance, horizontal_distance)
+
+
+def record_random_games(count, max_moves=60, seed=0, board_size=BOARD_SIZE):
+    """
+    Plays a few games of random legal moves in this process (for
+    benchmarks, profiling and load tests that replay the same moves).
+    Parameters:
+        count = number of games to record
+        max_moves = maximum number of moves per game
+        seed = seed of the random move choices
+        board_size = number of rows (and columns) of the board
+    Returns:
+        a list of games, each a list of (current, new) moves
+    """
+    chooser = random.Random(seed)
+    games = []
+    for x in range(count):
+        game = GessGame(board_size=board_size)
+        moves = []
+        while len(moves) < max_moves and game.get_game_state() == "UNFINISHED":
+            legal_moves = game.generate_legal_moves()
+            if not legal_moves:
+                break
+            move = chooser.choice(legal_moves)
+            game.make_move(move[0], move[1])
+            moves.append(move)
+        games.append(moves)
+    return games
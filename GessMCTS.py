@@ -0,0 +1,490 @@
+# Description: Monte Carlo tree search engine for Gess (UCT or PUCT).
+# Every iteration walks down the tree, adds the children of the position
+# it reaches, and plays the game out (random or capture-guided moves)
+# until ring_check ends it. The tree lives in a fixed-size node pool,
+# and several trees can be searched at once on a process pool.
+# Run with: python GessMCTS.py [--playouts N] [--time S] [--workers N]
+
+
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from GessGame import FOOTPRINT_MASKS, GessGame
+from GessSearch import SearchResult, get_move_names
+
+
+# a playout still running after this many moves is scored by the evaluation
+MAX_PLAYOUT_MOVES = 200
+
+# evaluation score worth about half a win, when a playout is cut short
+EVALUATION_SCALE = 500
+
+# children of a node that the pool had no room to expand: the node stays
+# a leaf, and every visit plays out from it
+NO_ROOM = ()
+
+
+class NodePool:
+    """
+    The NodePool class stores the nodes of a search tree in parallel
+    lists (node n is index n of every list), up to a fixed capacity.
+    Nodes that are released (the parts of the tree that the game has
+    moved away from) go on a free list and are handed out again, so
+    the tree never takes more than the capacity.
+    """
+
+    def __init__(self, capacity):
+        """
+        Parameter:
+            capacity = most nodes held at once
+        """
+        self._capacity = capacity
+        self._free = []
+        self.parents = []
+        self.moves = []  # move that leads to the node, as square numbers
+        self.children = []  # list of child nodes, None until expanded, or NO_ROOM
+        self.visits = []
+        self.values = []  # total result, for the player who made the move
+        self.priors = []
+        self.hashes = []  # position hash, to find the node again later
+
+    def get_size(self):
+        """
+        Returns the number of nodes in use.
+        """
+        return len(self.parents) - len(self._free)
+
+    def get_capacity(self):
+        """
+        Returns the most nodes the pool holds.
+        """
+        return self._capacity
+
+    def has_room(self, count):
+        """
+        Returns True if a number of nodes can be added.
+        """
+        return self.get_size() + count <= self._capacity
+
+    def allocate(self, parent, move, prior, position_hash):
+        """
+        Adds a node.
+        Parameters:
+            parent = the parent node (None for a root)
+            move = the move from the parent, as square numbers
+            prior = probability the policy gives the move
+            position_hash = hash of the node's position
+        Returns:
+            the new node, or None if the pool is full
+        """
+        if self._free:
+            node = self._free.pop()
+            self.parents[node] = parent
+            self.moves[node] = move
+            self.children[node] = None
+            self.visits[node] = 0
+            self.values[node] = 0.0
+            self.priors[node] = prior
+            self.hashes[node] = position_hash
+            return node
+
+        if len(self.parents) >= self._capacity:
+            return None
+        self.parents.append(parent)
+        self.moves.append(move)
+        self.children.append(None)
+        self.visits.append(0)
+        self.values.append(0.0)
+        self.priors.append(prior)
+        self.hashes.append(position_hash)
+        return len(self.parents) - 1
+
+    def release(self, node, keep=None):
+        """
+        Puts a node and everything below it back on the free list.
+        Parameters:
+            node = the node to release
+            keep = optional node below it to keep (with its own subtree)
+        """
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            if node == keep:
+                continue
+            if self.children[node]:
+                pending.extend(self.children[node])
+            self.children[node] = None
+            self._free.append(node)
+
+
+def get_move_weights(game, moves):
+    """
+    Weighs moves for the capture policy: 1, plus 2 for every opponent
+    stone the Piece lands on.
+    Parameters:
+        game = the GessGame the moves belong to
+        moves = list of (current square, new square)
+    Returns:
+        list of weights
+    """
+    board = game.get_bitboard()
+    if game.get_game_turn() == "BLACK":
+        opponent = board.get_white()
+    else:
+        opponent = board.get_black()
+    return [1 + 2 * (FOOTPRINT_MASKS[new_square] & opponent).bit_count() for current, new_square in moves]
+
+
+class MCTSEngine:
+    """
+    The MCTSEngine class picks a move with Monte Carlo tree search.
+
+    Children are picked with PUCT (the policy's prior scaled by the
+    parent's visits) or with plain UCT. Playouts pick random moves,
+    or with the capture policy, moves weighted by the stones they take.
+    A playout that doesn't end within MAX_PLAYOUT_MOVES is scored by
+    the game's evaluation instead.
+
+    The tree is kept between searches: when the game has moved on by a
+    move or two, the node of the new position becomes the root and the
+    rest of the tree goes back to the node pool. With more than one
+    worker, every worker searches its own tree (root parallelism) and
+    their visits at the root are added up.
+    """
+
+    def __init__(self, playouts=1000, time_limit=None, workers=1, max_nodes=200000, exploration=1.4,
+                 formula="puct", policy="captures", seed=0):
+        """
+        Parameters:
+            playouts = playouts per search (None for no limit, with a time limit)
+            time_limit = seconds per search (None for no limit)
+            workers = number of worker processes (1 searches in this process)
+            max_nodes = node pool capacity (per worker)
+            exploration = exploration constant of UCT / PUCT
+            formula = "puct" or "uct"
+            policy = "captures" (guided priors and playouts) or "random"
+            seed = seed of the playouts
+        """
+        if formula not in ("puct", "uct"):
+            raise ValueError("unknown formula: " + formula)
+        if policy not in ("captures", "random"):
+            raise ValueError("unknown policy: " + policy)
+        self._playouts = playouts
+        self._time_limit = time_limit
+        self._workers = workers or os.cpu_count() or 1
+        self._exploration = exploration
+        self._formula = formula
+        self._policy = policy
+        self._chooser = random.Random(seed)
+        self._seed = seed
+        self._pool = NodePool(max_nodes)
+        self._root = None
+        self._executor = None
+
+    def get_pool(self):
+        """
+        Returns the node pool of the search tree (in this process).
+        """
+        return self._pool
+
+    def search(self, game, playouts=None, time_limit=None):
+        """
+        Searches the position for the best move.
+        Parameters:
+            game = the GessGame to search (unchanged afterwards)
+            playouts = playouts to run (defaults to the engine's)
+            time_limit = seconds to search for (defaults to the engine's)
+        Returns:
+            a SearchResult: the most visited move, its average result
+            (x 1000), the most visited line, and the number of playouts
+            as its nodes (so nodes per second is playouts per second)
+        """
+        if playouts is None:
+            playouts = self._playouts
+        if time_limit is None:
+            time_limit = self._time_limit
+        if playouts is None and time_limit is None:
+            raise ValueError("a playout or time budget is needed")
+        start = time.perf_counter()
+
+        if self._workers == 1:
+            root_stats, done = self.run(game, playouts, time_limit)
+            line = self.get_principal_variation()
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self._workers)
+            share = None if playouts is None else -(-playouts // self._workers)
+            futures = [self._executor.submit(search_tree, game, share, time_limit, self._exploration, self._formula,
+                                             self._policy, self._pool.get_capacity(), self._seed + index)
+                       for index in range(self._workers)]
+            root_stats = {}
+            done = 0
+            for future in futures:
+                worker_stats, worker_playouts = future.result()
+                done += worker_playouts
+                for move, (visits, value) in worker_stats.items():
+                    total = root_stats.setdefault(move, [0, 0.0])
+                    total[0] += visits
+                    total[1] += value
+            line = None
+
+        seconds = time.perf_counter() - start
+        if not root_stats:
+            return SearchResult(None, 0, [], 0, done, seconds)
+
+        best = max(root_stats, key=lambda move: root_stats[move][0])
+        visits, value = root_stats[best]
+        score = int(1000 * value / visits) if visits else 0
+        if not line:
+            line = get_move_names([best])
+        return SearchResult(get_move_names([best])[0], score, line, len(line), done, seconds)
+
+    def run(self, game, playouts, time_limit):
+        """
+        Runs the playouts on this process's tree.
+        Parameters:
+            game = the GessGame to search
+            playouts = playouts to run (None for no limit)
+            time_limit = seconds to run for (None for no limit)
+        Returns:
+            (dict of root move -> [visits, total result], playouts run)
+        """
+        pool = self._pool
+        root = self._find_root(game)
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        turn = game.get_game_turn()
+
+        done = 0
+        while playouts is None or done < playouts:
+            if deadline is not None and done % 16 == 0 and time.perf_counter() > deadline:
+                break
+            self.iterate(game.fork(), root, turn)
+            done += 1
+
+        stats = {}
+        for child in pool.children[root] or ():
+            stats[pool.moves[child]] = [pool.visits[child], pool.values[child]]
+        return stats, done
+
+    def _find_root(self, game):
+        """
+        Finds the game's position in the tree kept from the last search
+        (the old root, or a position up to two moves below it) and makes
+        it the root, releasing the rest of the tree. Starts a new tree
+        if the position isn't there.
+        Returns:
+            the root node
+        """
+        pool = self._pool
+        position_hash = game.get_hash()
+        root = self._root
+
+        found = None
+        if root is not None:
+            if pool.hashes[root] == position_hash:
+                found = root
+            else:
+                for child in pool.children[root] or ():
+                    if pool.hashes[child] == position_hash:
+                        found = child
+                        break
+                    for grandchild in pool.children[child] or ():
+                        if pool.hashes[grandchild] == position_hash:
+                            found = grandchild
+                            break
+                    if found is not None:
+                        break
+            if found != root:
+                pool.release(root, keep=found)
+
+        if found is None:
+            found = pool.allocate(None, None, 1.0, position_hash)
+        pool.parents[found] = None
+        self._root = found
+        return found
+
+    def iterate(self, game, root, turn):
+        """
+        One MCTS iteration: selection, expansion, playout and backup.
+        Parameters:
+            game = a fork of the root's game (it gets moved along)
+            root = the root node
+            turn = the color to move at the root
+        """
+        pool = self._pool
+        children = pool.children
+        path = [root]
+        node = root
+
+        # selection: walk down the expanded nodes (a node gets its hash
+        # the first time it's entered, so _find_root can find it later)
+        while children[node]:
+            node = self._select(node)
+            game.move_piece(*pool.moves[node])
+            if not pool.hashes[node]:
+                pool.hashes[node] = game.get_hash()
+            path.append(node)
+
+        # expansion: add the children of the position reached, then step into one
+        if game.get_game_state() == "UNFINISHED" and children[node] is None:
+            moves = game.generate_legal_squares()
+            if not moves:
+                children[node] = []
+            elif not pool.has_room(len(moves)):
+                # the pool is full: the node stays a leaf, so later visits
+                # play out from it without trying again
+                children[node] = NO_ROOM
+            else:
+                weights = self._get_weights(game, moves)
+                total = sum(weights)
+                children[node] = [pool.allocate(node, move, weight / total, 0)
+                                  for move, weight in zip(moves, weights)]
+                node = self._select(node)
+                game.move_piece(*pool.moves[node])
+                pool.hashes[node] = game.get_hash()
+                path.append(node)
+
+        value = self.playout(game)
+
+        # backup: the result counts for the player who made each move
+        for depth, node in enumerate(path):
+            pool.visits[node] += 1
+            if depth:
+                mover = turn if depth % 2 == 1 else ("WHITE" if turn == "BLACK" else "BLACK")
+                pool.values[node] += value if mover == "BLACK" else -value
+
+    def _select(self, node):
+        """
+        Picks the child to visit next with UCT or PUCT.
+        """
+        pool = self._pool
+        visits = pool.visits
+        values = pool.values
+        parent_visits = visits[node]
+        best = None
+        best_score = None
+
+        if self._formula == "puct":
+            scale = self._exploration * math.sqrt(parent_visits + 1)
+            priors = pool.priors
+            for child in pool.children[node]:
+                child_visits = visits[child]
+                score = scale * priors[child] / (1 + child_visits)
+                if child_visits:
+                    score += values[child] / child_visits
+                if best_score is None or score > best_score:
+                    best, best_score = child, score
+            return best
+
+        log_visits = math.log(parent_visits + 1)
+        for child in pool.children[node]:
+            child_visits = visits[child]
+            if not child_visits:
+                return child
+            score = values[child] / child_visits + self._exploration * math.sqrt(log_visits / child_visits)
+            if best_score is None or score > best_score:
+                best, best_score = child, score
+        return best
+
+    def _get_weights(self, game, moves):
+        """
+        Returns the policy's weight of every move.
+        """
+        if self._policy == "captures":
+            return get_move_weights(game, moves)
+        return [1] * len(moves)
+
+    def playout(self, game):
+        """
+        Plays the game out from its position.
+        Parameter:
+            game = the GessGame to play out (it gets moved along)
+        Returns:
+            the result for black: 1 for a win, -1 for a loss, or the scaled
+            evaluation (between -1 and 1) if the game didn't end in time
+        """
+        chooser = self._chooser
+        for x in range(MAX_PLAYOUT_MOVES):
+            state = game.get_game_state()
+            if state != "UNFINISHED":
+                return 1.0 if state == "BLACK_WON" else -1.0
+
+            moves = game.generate_legal_squares()
+            if not moves:
+                # a player that can't move loses
+                return -1.0 if game.get_game_turn() == "BLACK" else 1.0
+            if self._policy == "captures":
+                move = chooser.choices(moves, get_move_weights(game, moves))[0]
+            else:
+                move = chooser.choice(moves)
+            game.move_piece(*move)
+
+        score = math.tanh(game.evaluate() / EVALUATION_SCALE)
+        return score if game.get_game_turn() == "BLACK" else -score
+
+    def get_principal_variation(self):
+        """
+        Returns the most visited line from the root, as center names.
+        """
+        pool = self._pool
+        line = []
+        node = self._root
+        while node is not None and pool.children[node]:
+            node = max(pool.children[node], key=lambda child: pool.visits[child])
+            if not pool.visits[node]:
+                break
+            line.append(pool.moves[node])
+        return get_move_names(line)
+
+    def close(self):
+        """
+        Shuts down the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def search_tree(game, playouts, time_limit, exploration, formula, policy, max_nodes, seed):
+    """
+    Worker of a parallel MCTSEngine: searches one tree in a fresh engine.
+    Returns:
+        (dict of root move -> [visits, total result], playouts run)
+    """
+    engine = MCTSEngine(playouts, time_limit, 1, max_nodes, exploration, formula, policy, seed)
+    return engine.run(game, playouts, time_limit)
+
+
+def main():
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Search the starting Gess position with MCTS")
+    parser.add_argument("--playouts", type=int, default=None, help="playouts per search")
+    parser.add_argument("--time", type=float, default=None, help="seconds per search")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--formula", default="puct", help="puct or uct")
+    parser.add_argument("--policy", default="captures", help="captures or random")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the playouts")
+    args = parser.parse_args()
+    if args.playouts is None and args.time is None:
+        args.playouts = 500
+
+    with MCTSEngine(args.playouts, args.time, args.workers, formula=args.formula, policy=args.policy,
+                    seed=args.seed) as engine:
+        result = engine.search(GessGame())
+    print(", ".join("%s=%s" % (key, value) for key, value in result.as_dict().items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# Description: perft for Gess - counts the leaf nodes of the legal move
+# tree, to check move generation against pinned counts and to measure
+# its speed.
+# Run with: python GessPerft.py [--depth N] [--verify] [--divide]
+
+
+import argparse
+import sys
+import time
+
+from GessGame import SQUARE_NAMES, GessGame
+
+
+# positions to count from, as the moves that lead to them from the start
+TEST_POSITIONS = {
+    "start": [],
+    "rings_moved": [('B3', 'C4'), ('P19', 'O18'), ('G3', 'H2'), ('I18', 'H18'), ('E8', 'G6'),
+                    ('L19', 'M19'), ('L3', 'L6'), ('L15', 'L14')],
+    "ring_shifted": [('L4', 'M4'), ('R19', 'S18'), ('R4', 'Q3'), ('I13', 'I14'), ('M3', 'M5'),
+                     ('H18', 'I17'), ('H6', 'J8'), ('I17', 'I18')],
+    "long_moves": [('J6', 'G9'), ('D17', 'C18'), ('P6', 'N8'), ('G13', 'F14'), ('I3', 'I13'),
+                   ('O13', 'O14'), ('H15', 'H14'), ('H18', 'I17')],
+}
+
+# leaf node counts of every test position, by depth
+REFERENCE_COUNTS = {
+    "start": {1: 380, 2: 124264},
+    "rings_moved": {1: 343, 2: 97792},
+    "ring_shifted": {1: 370, 2: 105848},
+    "long_moves": {1: 435, 2: 122252},
+}
+
+
+def get_position(name):
+    """
+    Sets up one of the TEST_POSITIONS.
+    Parameter:
+        name = the position's name
+    Returns:
+        a GessGame at that position
+    """
+    game = GessGame()
+    for current, new in TEST_POSITIONS[name]:
+        if not game.make_move(current, new):
+            raise ValueError("illegal move %s-%s in test position %s" % (current, new, name))
+    return game
+
+
+def perft(game, depth):
+    """
+    Counts the positions reached after exactly 'depth' legal moves.
+    Moves are made and taken back with push_move_squares and pop_move, so the
+    game is unchanged afterwards, and every move made on the way is checked
+    against make_move's validation. The last move's positions are only
+    counted (the length of the move list), so at depth 1 no move is made
+    or checked. Finished games have no legal moves, so they add nothing
+    past their depth.
+    Parameters:
+        game = the GessGame to count from
+        depth = number of moves
+    Returns:
+        the number of leaf nodes
+    """
+    if depth == 0:
+        return 1
+
+    moves = game.generate_legal_squares()
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for current, new in moves:
+        if not game.push_move_squares(current, new):
+            raise AssertionError("make_move rejected generated move %s-%s"
+                                 % (SQUARE_NAMES[current], SQUARE_NAMES[new]))
+        nodes += perft(game, depth - 1)
+        game.pop_move()
+    return nodes
+
+
+def divide(game, depth):
+    """
+    Splits a perft count by the first move, to find which move's
+    subtree differs when a count doesn't match.
+    Parameters:
+        game = the GessGame to count from
+        depth = number of moves (at least 1)
+    Returns:
+        dict of (current, new) -> leaf nodes below that move
+    """
+    counts = {}
+    for current, new in game.generate_legal_moves():
+        if not game.push_move(current, new):
+            raise AssertionError("make_move rejected generated move %s-%s" % (current, new))
+        counts[(current, new)] = perft(game, depth - 1)
+        game.pop_move()
+    return counts
+
+
+def run_perft(name, depth):
+    """
+    Times a perft count from a test position.
+    Parameters:
+        name = the position's name (see TEST_POSITIONS)
+        depth = number of moves
+    Returns:
+        (leaf nodes, nodes per second)
+    """
+    game = get_position(name)
+    start = time.perf_counter()
+    nodes = perft(game, depth)
+    seconds = time.perf_counter() - start
+    return nodes, nodes / seconds if seconds else 0.0
+
+
+def verify(max_depth=2):
+    """
+    Checks every test position against its pinned counts.
+    Parameter:
+        max_depth = deepest depth to check
+    Returns:
+        list of (position, depth, expected, found) for every mismatch
+    """
+    mismatches = []
+    for name, counts in REFERENCE_COUNTS.items():
+        for depth, expected in sorted(counts.items()):
+            if depth > max_depth:
+                continue
+            found = perft(get_position(name), depth)
+            if found != expected:
+                mismatches.append((name, depth, expected, found))
+    return mismatches
+
+
+def main():
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Count Gess legal move trees")
+    parser.add_argument("--depth", type=int, default=2, help="number of moves")
+    parser.add_argument("--position", default=None, help="one of: " + ", ".join(TEST_POSITIONS))
+    parser.add_argument("--verify", action="store_true", help="check the pinned reference counts")
+    parser.add_argument("--divide", action="store_true", help="split the count by the first move")
+    args = parser.parse_args()
+
+    if args.verify:
+        mismatches = verify(args.depth)
+        for name, depth, expected, found in mismatches:
+            print("%s depth %d: expected %d, found %d" % (name, depth, expected, found))
+        print("FAILED" if mismatches else "OK")
+        sys.exit(1 if mismatches else 0)
+
+    for name in [args.position] if args.position else TEST_POSITIONS:
+        if args.divide:
+            for move, nodes in sorted(divide(get_position(name), args.depth).items()):
+                print("%s-%s: %d" % (move[0], move[1], nodes))
+        nodes, nodes_per_second = run_perft(name, args.depth)
+        print("%s depth %d: %d nodes, %.0f nodes/s" % (name, args.depth, nodes, nodes_per_second))
+
+
+if __name__ == "__main__":
+    main()
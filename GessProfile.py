@@ -0,0 +1,154 @@
+# Description: per-phase profiling of Gess moves. A MoveProfiler given
+# to a GessGame counts and times every phase of make_move (and push_move)
+# and counts why moves were rejected. Without one, the game only pays
+# for a few "is None" checks.
+# Run with: python GessProfile.py [--games N] [--attempts N] [--json]
+
+
+import argparse
+import json
+import random
+import time
+
+from GessGame import SQUARE_NAMES, GessGame, INTERIOR_MASK, iterate_squares, record_random_games
+
+
+# the phases of a move, in the order they run (the last three only for legal moves)
+PHASES = ("validation", "direction_check", "last_ring", "path_clear", "footprint", "clear_edges", "ring_check")
+
+
+class MoveProfiler:
+    """
+    The MoveProfiler class collects the call counts and cumulative
+    times of the phases of every move, and the rejection reasons of
+    the moves that weren't legal (see GessGame.get_move_error).
+
+    A move calls start() once, then lap(phase) as each phase ends,
+    so a phase's time runs from the end of the one before it.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets everything collected so far.
+        """
+        self._moves = 0
+        self._accepted = 0
+        self._calls = dict.fromkeys(PHASES, 0)
+        self._seconds = dict.fromkeys(PHASES, 0.0)
+        self._rejections = {}
+        self._last = 0.0
+
+    def start(self):
+        """
+        Starts timing a move.
+        """
+        self._moves += 1
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        """
+        Ends a phase of the current move.
+        Parameter:
+            phase = one of PHASES
+        """
+        now = time.perf_counter()
+        self._seconds[phase] += now - self._last
+        self._calls[phase] += 1
+        self._last = now
+
+    def accept(self):
+        """
+        Counts a move that was made.
+        """
+        self._accepted += 1
+
+    def reject(self, reason):
+        """
+        Counts a move that was rejected.
+        Parameter:
+            reason = why (see GessGame.get_move_error)
+        """
+        self._rejections[reason] = self._rejections.get(reason, 0) + 1
+
+    def get_snapshot(self):
+        """
+        Returns everything collected so far as a dict: the number of moves
+        tried and made, the calls, total seconds and mean microseconds of
+        every phase, and the count of every rejection reason.
+        """
+        phases = {}
+        for phase in PHASES:
+            calls = self._calls[phase]
+            phases[phase] = {
+                "calls": calls,
+                "seconds": self._seconds[phase],
+                "mean_us": self._seconds[phase] / calls * 1000000 if calls else 0.0,
+            }
+        return {
+            "moves": self._moves,
+            "accepted": self._accepted,
+            "rejected": self._moves - self._accepted,
+            "phases": phases,
+            "rejections": dict(sorted(self._rejections.items())),
+        }
+
+    def to_json(self):
+        """
+        Returns get_snapshot as a JSON string.
+        """
+        return json.dumps(self.get_snapshot(), indent=2)
+
+
+def profile_games(games, attempts=0, seed=0):
+    """
+    Replays recorded games with a profiler, trying a number of random
+    (mostly illegal) moves before every real one, like a player would.
+    Parameters:
+        games = games from GessGame.record_random_games
+        attempts = random moves tried before each real move
+        seed = seed of the random moves
+    Returns:
+        the MoveProfiler
+    """
+    profiler = MoveProfiler()
+    chooser = random.Random(seed)
+    centers = [SQUARE_NAMES[square] for square in iterate_squares(INTERIOR_MASK)]
+    for game_moves in games:
+        game = GessGame(profiler=profiler)
+        for current, new in game_moves:
+            for x in range(attempts):
+                if game.push_move(chooser.choice(centers), chooser.choice(centers)):
+                    game.pop_move()
+            game.make_move(current, new)
+    return profiler
+
+
+def main():
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Profile the phases of Gess moves")
+    parser.add_argument("--games", type=int, default=50, help="number of random games to replay")
+    parser.add_argument("--attempts", type=int, default=5, help="random moves tried before every real move")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the games and the random moves")
+    parser.add_argument("--json", action="store_true", help="print the snapshot as JSON")
+    args = parser.parse_args()
+
+    profiler = profile_games(record_random_games(args.games, seed=args.seed), args.attempts, args.seed)
+    if args.json:
+        print(profiler.to_json())
+        return
+
+    snapshot = profiler.get_snapshot()
+    print("moves=%(moves)d accepted=%(accepted)d rejected=%(rejected)d" % snapshot)
+    for phase, stats in snapshot["phases"].items():
+        print("%s: calls=%d seconds=%.4f mean_us=%.2f" % (phase, stats["calls"], stats["seconds"], stats["mean_us"]))
+    for reason, count in snapshot["rejections"].items():
+        print("rejected (%s)=%d" % (reason, count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+# Description: compact binary records of Gess games. Every move takes
+# 2 bytes, every game a 4 byte header with its result, and positions
+# can be stored as fixed 101 byte records. The reader memory-maps the
+# file and uses the index at its end to jump straight to any game or
+# position.
+# Run with: python GessRecord.py convert games.jsonl games.gess [--positions]
+#           python GessRecord.py info games.gess
+
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from GessGame import (BOARD_SIZE, DIRECTIONS, INTERIOR_MASK, SQUARE_NAMES, Bitboard, GessGame,
+                      get_direction, iterate_squares, parse_square)
+
+
+# File layout (all numbers little-endian):
+#   file header:  magic, flags
+#   every game:   result (1 byte), unused (1 byte), number of moves (2 bytes),
+#                 the moves (2 bytes each), then the positions if stored
+#                 (number of moves + 1 of them, POSITION_BYTES each)
+#   game index:   for every game, its offset and the number of its first position
+#   trailer:      index offset, number of games, number of positions, magic
+FILE_MAGIC = b"GESSREC1"
+INDEX_MAGIC = b"GESSIDX1"
+FILE_HEADER = struct.Struct("<8sI4x")
+GAME_HEADER = struct.Struct("<BxH")
+INDEX_ENTRY = struct.Struct("<QQ")
+TRAILER = struct.Struct("<QQQ8s")
+
+POSITIONS_STORED = 1  # file header flag
+
+RESULTS = ("UNFINISHED", "BLACK_WON", "WHITE_WON")
+RESULT_CODES = {result: code for code, result in enumerate(RESULTS)}
+
+# a move is its center (one of the 324 interior squares), its direction
+# (0 - 7, see DIRECTIONS) and its distance (1 - 17), packed in one number
+INTERIOR_SQUARES = list(iterate_squares(INTERIOR_MASK))
+INTERIOR_INDEXES = {square: index for index, square in enumerate(INTERIOR_SQUARES)}
+MAX_DISTANCE = BOARD_SIZE - 3
+
+# a position is the black and white bitboards, then one byte for the
+# player turn (bit 0 set for white) and the game state (bits 1 - 2)
+BITBOARD_BYTES = (BOARD_SIZE * BOARD_SIZE + 7) // 8
+POSITION_BYTES = 2 * BITBOARD_BYTES + 1
+
+
+def encode_move(current_square, new_square):
+    """
+    Packs a move into a 16 bit number.
+    Parameters:
+        current_square = square number of the Piece's center
+        new_square = square number of the new center
+    Returns:
+        the move's code (0 - 44063)
+    """
+    if current_square not in INTERIOR_INDEXES or new_square not in INTERIOR_INDEXES:
+        raise ValueError("not a move: %r-%r" % (current_square, new_square))
+    vector = get_direction(current_square, new_square)
+    if vector is None:
+        raise ValueError("not a move: %s-%s" % (SQUARE_NAMES[current_square], SQUARE_NAMES[new_square]))
+    direction, distance = vector
+    return (INTERIOR_INDEXES[current_square] * len(DIRECTIONS) + direction) * MAX_DISTANCE + distance - 1
+
+
+def decode_move(code):
+    """
+    Unpacks a move packed by encode_move.
+    Parameter:
+        code = the move's code
+    Returns:
+        (current square, new square)
+    """
+    current_square = INTERIOR_SQUARES[code // (len(DIRECTIONS) * MAX_DISTANCE)]
+    row_step, column_step = DIRECTIONS[code // MAX_DISTANCE % len(DIRECTIONS)]
+    distance = code % MAX_DISTANCE + 1
+    return current_square, current_square + distance * (row_step * BOARD_SIZE + column_step)
+
+
+def encode_position(game):
+    """
+    Packs a game's position (stones, turn and state) into POSITION_BYTES bytes.
+    Parameter:
+        game = the GessGame to pack
+    Returns:
+        the position's bytes
+    """
+    board = game.get_bitboard()
+    flags = (game.get_game_turn() == "WHITE") | RESULT_CODES[game.get_game_state()] << 1
+    return (board.get_black().to_bytes(BITBOARD_BYTES, "little")
+            + board.get_white().to_bytes(BITBOARD_BYTES, "little") + bytes((flags,)))
+
+
+def decode_position(data):
+    """
+    Unpacks a position packed by encode_position.
+    Parameter:
+        data = the position's bytes
+    Returns:
+        a GessGame at that position
+    """
+    black = int.from_bytes(data[:BITBOARD_BYTES], "little")
+    white = int.from_bytes(data[BITBOARD_BYTES:2 * BITBOARD_BYTES], "little")
+    flags = data[2 * BITBOARD_BYTES]
+
+    game = GessGame()
+    game.set_position(Bitboard(black, white), "WHITE" if flags & 1 else "BLACK", RESULTS[flags >> 1])
+    return game
+
+
+class GameWriter:
+    """
+    The GameWriter class streams games into a record file, one at a
+    time, and writes the game index when it's closed.
+    Only the index (16 bytes per game) is kept in memory.
+    """
+
+    def __init__(self, path, positions=False):
+        """
+        Parameters:
+            path = the record file to create
+            positions = if True, the position before every move (and after
+            the last one) is stored too, so the reader doesn't have to
+            replay the game to get one
+        """
+        self._file = open(path, "wb")
+        self._positions = positions
+        self._index = array("Q")
+        self._position_count = 0
+        self._file.write(FILE_HEADER.pack(FILE_MAGIC, POSITIONS_STORED if positions else 0))
+
+    def write_game(self, result, moves):
+        """
+        Adds a game to the file. The moves are replayed from the starting
+        position, so a game with an illegal move is never stored.
+        Parameters:
+            result = the game's state at the end, e.g. "BLACK_WON"
+            moves = list of (current, new) center names
+        Returns:
+            none
+        """
+        squares = []
+        for current, new in moves:
+            current_square, new_square = parse_square(current), parse_square(new)
+            if current_square is None or new_square is None:
+                raise ValueError("not a square: %s" % (current if current_square is None else new))
+            squares.append((current_square, new_square))
+        data = bytearray(GAME_HEADER.pack(RESULT_CODES[result], len(squares)))
+        data += struct.pack("<%dH" % len(squares), *[encode_move(*move) for move in squares])
+
+        game = GessGame()
+        if self._positions:
+            data += encode_position(game)
+        for current_square, new_square in squares:
+            if game.get_move_error(current_square, new_square) is not None:
+                raise ValueError("illegal move %s-%s" % (SQUARE_NAMES[current_square], SQUARE_NAMES[new_square]))
+            game.move_piece(current_square, new_square)
+            if self._positions:
+                data += encode_position(game)
+
+        self._index.append(self._file.tell())
+        self._index.append(self._position_count)
+        self._position_count += len(squares) + 1
+        self._file.write(data)
+
+    def close(self):
+        """
+        Writes the game index and the trailer, and closes the file.
+        """
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        if sys.byteorder != "little":
+            self._index.byteswap()
+        self._index.tofile(self._file)
+        self._file.write(TRAILER.pack(index_offset, len(self._index) // 2, self._position_count, INDEX_MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class GameReader:
+    """
+    The GameReader class reads a record file written by the GameWriter.
+
+    The file is memory-mapped, so only the parts that are read are
+    loaded from disk. A game is found through the index at the end
+    of the file, and a position by a binary search of the index
+    (positions are numbered across all the games, a game with n moves
+    having n + 1 of them). Nothing before the game is parsed.
+    """
+
+    def __init__(self, path):
+        """
+        Parameter:
+            path = the record file to read
+        """
+        self._file = open(path, "rb")
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, flags = FILE_HEADER.unpack_from(self._data, 0)
+        if magic != FILE_MAGIC:
+            raise ValueError("not a Gess record file: %s" % path)
+        self._positions = bool(flags & POSITIONS_STORED)
+
+        index_offset, games, positions, magic = TRAILER.unpack_from(self._data, len(self._data) - TRAILER.size)
+        if magic != INDEX_MAGIC:
+            raise ValueError("Gess record file has no index (not closed?): %s" % path)
+        self._index_offset = index_offset
+        self._game_count = games
+        self._position_count = positions
+
+    def __len__(self):
+        return self._game_count
+
+    def get_position_count(self):
+        """
+        Returns the number of positions in the file.
+        """
+        return self._position_count
+
+    def has_positions(self):
+        """
+        Returns True if the positions are stored in the file.
+        """
+        return self._positions
+
+    def _get_index_entry(self, game_number):
+        """
+        Returns (offset, first position number) of a game.
+        """
+        if not 0 <= game_number < self._game_count:
+            raise IndexError("no game %d" % game_number)
+        return INDEX_ENTRY.unpack_from(self._data, self._index_offset + game_number * INDEX_ENTRY.size)
+
+    def get_game_squares(self, game_number):
+        """
+        Reads one game, with the moves as square numbers.
+        Parameter:
+            game_number = the game's number (from 0)
+        Returns:
+            (result, list of (current square, new square))
+        """
+        offset = self._get_index_entry(game_number)[0]
+        code, move_count = GAME_HEADER.unpack_from(self._data, offset)
+        codes = struct.unpack_from("<%dH" % move_count, self._data, offset + GAME_HEADER.size)
+        return RESULTS[code], [decode_move(move) for move in codes]
+
+    def get_game(self, game_number):
+        """
+        Reads one game.
+        Parameter:
+            game_number = the game's number (from 0)
+        Returns:
+            (result, list of (current, new) center names)
+        """
+        result, moves = self.get_game_squares(game_number)
+        return result, [(SQUARE_NAMES[current], SQUARE_NAMES[new]) for current, new in moves]
+
+    def find_position(self, position_number):
+        """
+        Finds the game a position belongs to.
+        Parameter:
+            position_number = the position's number (from 0)
+        Returns:
+            (game number, number of moves played before the position)
+        """
+        if not 0 <= position_number < self._position_count:
+            raise IndexError("no position %d" % position_number)
+
+        # the last game that starts at or before the position
+        low, high = 0, self._game_count - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._get_index_entry(middle)[1] <= position_number:
+                low = middle
+            else:
+                high = middle - 1
+        return low, position_number - self._get_index_entry(low)[1]
+
+    def get_position(self, position_number):
+        """
+        Reads one position. If the positions aren't stored in the file,
+        the moves of its game are replayed up to it.
+        Parameter:
+            position_number = the position's number (from 0)
+        Returns:
+            a GessGame at that position
+        """
+        game_number, move_number = self.find_position(position_number)
+        offset = self._get_index_entry(game_number)[0]
+
+        if self._positions:
+            move_count = GAME_HEADER.unpack_from(self._data, offset)[1]
+            start = offset + GAME_HEADER.size + 2 * move_count + move_number * POSITION_BYTES
+            return decode_position(self._data[start:start + POSITION_BYTES])
+
+        game = GessGame()
+        for current_square, new_square in self.get_game_squares(game_number)[1][:move_number]:
+            game.move_piece(current_square, new_square)
+        return game
+
+    def __iter__(self):
+        """
+        Reads the games in order, as (result, moves) like get_game.
+        """
+        for game_number in range(self._game_count):
+            yield self.get_game(game_number)
+
+    def close(self):
+        """
+        Unmaps and closes the file.
+        """
+        self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def convert(source, target, positions=False):
+    """
+    Converts self-play output (JSON lines with "result" and "moves",
+    see GessSelfPlay) to a record file.
+    Parameters:
+        source = the JSON lines file to read
+        target = the record file to write
+        positions = store the positions too (see GameWriter)
+    Returns:
+        the number of games converted
+    """
+    count = 0
+    with open(source) as games, GameWriter(target, positions) as writer:
+        for line in games:
+            if line.strip():
+                game_record = json.loads(line)
+                writer.write_game(game_record["result"], game_record["moves"])
+                count += 1
+    return count
+
+
+def main():
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Convert and inspect Gess game records")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_parser = commands.add_parser("convert", help="convert JSON lines games to a record file")
+    convert_parser.add_argument("source", help="JSON lines file (from GessSelfPlay)")
+    convert_parser.add_argument("target", help="record file to write")
+    convert_parser.add_argument("--positions", action="store_true", help="store every position too")
+    info_parser = commands.add_parser("info", help="summarize a record file")
+    info_parser.add_argument("path", help="record file to read")
+    info_parser.add_argument("--game", type=int, default=None, help="print one game's moves")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        print("%d games converted" % convert(args.source, args.target, args.positions))
+        return
+
+    with GameReader(args.path) as reader:
+        print("games=%d positions=%d positions_stored=%s"
+              % (len(reader), reader.get_position_count(), reader.has_positions()))
+        if args.game is not None:
+            result, moves = reader.get_game(args.game)
+            print(result + ": " + " ".join("%s-%s" % move for move in moves))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,679 @@
+# Description: the Gess engine - a negamax alpha-beta search with
+# iterative deepening and a time limit, backed by a transposition table
+# keyed by GessGame's Zobrist hash.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from GessGame import FOOTPRINT_MASKS, SQUARE_NAMES
+
+
+# kinds of scores stored in the transposition table
+EXACT = 0
+LOWER_BOUND = 1  # the real score is at least this (the search failed high)
+UPPER_BOUND = 2  # the real score is at most this (the search failed low)
+
+# rough size of one stored entry: the table's slot, the entry tuple,
+# the 64-bit key and the score (the move tuple is shared with the move list)
+ENTRY_BYTES = 160
+
+
+class TranspositionTable:
+    """
+    The TranspositionTable class remembers search results by position
+    hash, so a position reached again through a different move order
+    doesn't have to be searched again.
+
+    The table is split into buckets of two entries:
+    1. a depth-preferred entry, only replaced by a search at least as deep
+       (or by the same position), so expensive results stay in the table
+    2. an always-replace entry, which takes whatever the first entry turned
+       down, so recent positions are still remembered
+
+    Every entry remembers the search (generation) that stored it. A
+    depth-preferred entry left over from an earlier search is replaced
+    like an empty one, so deep results of old positions don't hold on
+    to their buckets for the rest of the game.
+
+    The number of buckets comes from a memory budget, and is rounded down
+    to a power of two so a bucket can be picked with a mask of the hash.
+    """
+
+    def __init__(self, memory_mb=16):
+        """
+        Allocates the (empty) table.
+        Parameter:
+            memory_mb = memory budget in megabytes
+        """
+        buckets = max(1, int(memory_mb * 1024 * 1024) // (2 * ENTRY_BYTES))
+        self._mask = (1 << (buckets.bit_length() - 1)) - 1
+        self._entries = [None] * (2 * (self._mask + 1))
+        self._generation = 0
+        self._stored = 0
+        self._probes = 0
+        self._hits = 0
+
+    def get_capacity(self):
+        """
+        Returns the number of entries the table can hold.
+        """
+        return len(self._entries)
+
+    def new_search(self):
+        """
+        Starts a new generation: the entries stored so far become old.
+        """
+        self._generation += 1
+
+    def probe(self, key):
+        """
+        Looks up a position.
+        Parameter:
+            key = the position's hash (GessGame.get_hash)
+        Returns:
+            (depth, score, flag, move) if the position is stored, else None
+        """
+        self._probes += 1
+        index = (key & self._mask) << 1
+        entries = self._entries
+        for entry in (entries[index], entries[index + 1]):
+            if entry is not None and entry[0] == key:
+                self._hits += 1
+                return entry[1:5]
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        """
+        Stores a search result, following the bucket's replacement policy.
+        Parameters:
+            key = the position's hash
+            depth = remaining depth the position was searched to
+            score = the score found
+            flag = EXACT, LOWER_BOUND or UPPER_BOUND
+            move = best move found, as (current, new), or None
+        Returns:
+            none
+        """
+        index = (key & self._mask) << 1
+        entries = self._entries
+        entry = (key, depth, score, flag, move, self._generation)
+
+        preferred = entries[index]
+        if preferred is None or preferred[0] == key or depth >= preferred[1] or preferred[5] != self._generation:
+            # the depth-preferred entry moves down to always-replace,
+            # unless it's just an older result for the same position
+            if preferred is None:
+                self._stored += 1
+            elif preferred[0] != key:
+                if entries[index + 1] is None:
+                    self._stored += 1
+                entries[index + 1] = preferred
+            entries[index] = entry
+        else:
+            if entries[index + 1] is None:
+                self._stored += 1
+            entries[index + 1] = entry
+
+    def clear(self):
+        """
+        Empties the table (e.g. before a new game).
+        """
+        self._entries = [None] * len(self._entries)
+        self._generation = 0
+        self._stored = 0
+        self._probes = 0
+        self._hits = 0
+
+    def get_stats(self):
+        """
+        Returns a dict with the table's capacity, how full it is,
+        and how many probes found their position.
+        """
+        return {
+            "capacity": len(self._entries),
+            "stored": self._stored,
+            "probes": self._probes,
+            "hits": self._hits,
+        }
+
+
+# scores are from the point of view of the player to move
+WIN_SCORE = 1000000  # minus the number of moves it takes to win
+
+# scores past this (either way) are wins or losses, not evaluations
+MATE_THRESHOLD = WIN_SCORE - 1000
+
+# depth searched when neither a depth nor a time limit is given,
+# and the deepest depth a search with only a time limit goes to
+DEFAULT_DEPTH = 3
+MAX_DEPTH = 64
+
+
+def get_search_depth(max_depth, time_limit):
+    """
+    Picks the deepest depth of a search: max_depth if it's given,
+    otherwise MAX_DEPTH with a time limit or DEFAULT_DEPTH without one
+    (so a search with neither always ends).
+    """
+    if max_depth is not None:
+        return max_depth
+    if time_limit is not None:
+        return MAX_DEPTH
+    return DEFAULT_DEPTH
+
+
+def score_to_table(score, ply):
+    """
+    Converts a score for the transposition table: a win or loss found
+    'ply' moves below the root is stored as its distance from the
+    position itself, so it's right wherever the position is reached again.
+    """
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """
+    Converts a score from the transposition table back to a distance
+    from the root (see score_to_table).
+    """
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+def get_move_names(moves):
+    """
+    Converts moves given as square numbers to center names.
+    Parameter:
+        moves = list of (current square, new square)
+    Returns:
+        list of (current, new), e.g. ('L3', 'L6')
+    """
+    return [(SQUARE_NAMES[current], SQUARE_NAMES[new]) for current, new in moves]
+
+
+def evaluate(game, weights=None):
+    """
+    Scores a position from the point of view of the player to move:
+    the weighted features (stones, rings, pieces, free pieces and
+    mobility) of the player minus those of the opponent. The features
+    are kept up to date by the game's FeatureAccumulator.
+    Parameters:
+        game = the GessGame to score
+        weights = dict of feature weights (defaults to GessGame's DEFAULT_WEIGHTS)
+    Returns:
+        the score (higher is better for the player to move)
+    """
+    return game.evaluate(weights)
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time limit runs out,
+    to unwind back to the root.
+    """
+
+
+class SearchResult:
+    """
+    The SearchResult class holds the outcome of a search: the best move,
+    its score, the principal variation (the line both players are
+    expected to play), and how much work the search took.
+    """
+
+    def __init__(self, best_move, score, principal_variation, depth, nodes, seconds):
+        """
+        Parameters:
+            best_move = the move to play, as (current, new), or None
+            score = score of the best move for the player to move
+            principal_variation = list of moves, starting with best_move
+            depth = deepest fully searched depth
+            nodes = number of positions visited
+            seconds = time the search took
+        """
+        self._best_move = best_move
+        self._score = score
+        self._principal_variation = principal_variation
+        self._depth = depth
+        self._nodes = nodes
+        self._seconds = seconds
+
+    def get_best_move(self):
+        """
+        Returns the best move found, as (current, new), or None.
+        """
+        return self._best_move
+
+    def get_score(self):
+        """
+        Returns the best move's score, from the point of view of the player to move.
+        """
+        return self._score
+
+    def get_principal_variation(self):
+        """
+        Returns the expected line of play, as a list of moves.
+        """
+        return self._principal_variation
+
+    def get_depth(self):
+        """
+        Returns the deepest depth that was fully searched.
+        """
+        return self._depth
+
+    def get_nodes(self):
+        """
+        Returns the number of positions the search visited.
+        """
+        return self._nodes
+
+    def get_nodes_per_second(self):
+        """
+        Returns the search speed in positions per second.
+        """
+        if self._seconds <= 0:
+            return 0.0
+        return self._nodes / self._seconds
+
+    def as_dict(self):
+        """
+        Returns the result as a plain dict (e.g. for logging).
+        """
+        return {
+            "best_move": self._best_move,
+            "score": self._score,
+            "principal_variation": self._principal_variation,
+            "depth": self._depth,
+            "nodes": self._nodes,
+            "seconds": self._seconds,
+            "nodes_per_second": self.get_nodes_per_second(),
+        }
+
+
+class GessEngine:
+    """
+    The GessEngine class picks a move for the player to move.
+
+    It runs a negamax alpha-beta search one depth at a time (iterative
+    deepening), until it reaches the maximum depth or runs out of time.
+    Each finished depth seeds the next one: the transposition table
+    remembers the best move of every position, which is tried first.
+    After that, moves that capture the most opponent stones are tried,
+    then the 'killer' moves that caused cut-offs at the same depth.
+
+    The search makes and takes back moves with GessGame's push_move_squares
+    and pop_move, so the game passed in is left exactly as it was. Inside
+    the search (and in the transposition table) moves are pairs of square
+    numbers; they're only converted to center names for the SearchResult.
+
+    With an opening book (see GessBook), positions in the book are
+    answered with the book's most played move, without searching.
+    """
+
+    def __init__(self, max_depth=None, time_limit=None, memory_mb=16, book=None, weights=None):
+        """
+        Parameters:
+            max_depth = deepest depth to search (see get_search_depth)
+            time_limit = seconds per move (None for no limit)
+            memory_mb = memory budget of the transposition table
+            book = optional GessBook.OpeningBook
+            weights = evaluation weights (see evaluate)
+        """
+        self._max_depth = max_depth
+        self._time_limit = time_limit
+        self._book = book
+        self._weights = weights
+        self._table = TranspositionTable(memory_mb)
+        self._deadline = None
+        self._nodes = 0
+        self._killers = []
+
+    def get_table(self):
+        """
+        Returns the engine's transposition table.
+        """
+        return self._table
+
+    def search(self, game, max_depth=None, time_limit=None, report=None, moves=None):
+        """
+        Searches the position for the best move.
+        Parameters:
+            game = the GessGame to search (unchanged afterwards)
+            max_depth = deepest depth to search (defaults to the engine's)
+            time_limit = seconds to search for (defaults to the engine's)
+            report = optional function called with a SearchResult
+            after every finished depth
+            moves = only search these root moves, as square numbers
+            (defaults to all legal moves)
+        Returns:
+            a SearchResult from the deepest finished depth
+            (depth 0 for a book move)
+        """
+        if max_depth is None:
+            max_depth = self._max_depth
+        if time_limit is None:
+            time_limit = self._time_limit
+        max_depth = get_search_depth(max_depth, time_limit)
+
+        start = time.perf_counter()
+        if self._book is not None and moves is None:
+            book_move = self._book.choose_move(game)
+            if book_move is not None:
+                return SearchResult(book_move, 0, [book_move], 0, 0, time.perf_counter() - start)
+
+        self._deadline = None if time_limit is None else start + time_limit
+        self._nodes = 0
+        self._table.new_search()
+        self._killers = [[None, None] for x in range(max_depth + 1)]
+
+        result = SearchResult(None, 0, [], 0, 0, 0.0)
+        for depth in range(1, max_depth + 1):
+            try:
+                score, principal_variation = self.search_root(game, depth, moves)
+            except SearchTimeout:
+                break
+
+            principal_variation = get_move_names(principal_variation)
+            result = SearchResult(principal_variation[0] if principal_variation else None, score,
+                                  principal_variation, depth, self._nodes, time.perf_counter() - start)
+            if report is not None:
+                report(result)
+
+            # no need to look deeper once the game's outcome is known
+            if abs(score) >= MATE_THRESHOLD:
+                break
+
+        # the time ran out before depth 1 finished: play any legal move
+        if result.get_best_move() is None:
+            if moves is None:
+                moves = game.generate_legal_squares()
+            if moves:
+                best_move = get_move_names(self.order_moves(game, moves, None, 0)[:1])[0]
+                result = SearchResult(best_move, 0, [best_move], 0, self._nodes, time.perf_counter() - start)
+
+        self._deadline = None
+        return result
+
+    def search_root(self, game, depth, moves=None):
+        """
+        Searches the moves of the root position to a depth.
+        Parameters:
+            game = the GessGame to search
+            depth = number of moves to look ahead
+            moves = the root moves to search, as square numbers
+            (defaults to all legal moves)
+        Returns:
+            (score, principal variation)
+        """
+        if moves is None:
+            return self.negamax(game, depth, -WIN_SCORE - 1, WIN_SCORE + 1, 0)
+
+        self._nodes += 1
+        entry = self._table.probe(game.get_hash())
+        table_move = entry[3] if entry is not None else None
+
+        alpha = -WIN_SCORE - 1
+        best_line = []
+        for move in self.order_moves(game, moves, table_move, 0):
+            game.push_move_squares(move[0], move[1])
+            try:
+                score, line = self.negamax(game, depth - 1, -WIN_SCORE - 1, -alpha, 1)
+            finally:
+                game.pop_move()
+            if -score > alpha:
+                alpha = -score
+                best_line = [move] + line
+        return alpha, best_line
+
+    def negamax(self, game, depth, alpha, beta, ply):
+        """
+        Scores a position with alpha-beta pruning, from the point of
+        view of the player to move.
+        Parameters:
+            game = the GessGame to search
+            depth = remaining number of moves to look ahead
+            alpha = score the player to move is already guaranteed
+            beta = score the opponent is already guaranteed (the player
+            won't get more than this)
+            ply = number of moves from the root
+        Returns:
+            (score, principal variation)
+        """
+        self._nodes += 1
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+
+        game_state = game.get_game_state()
+        if game_state != "UNFINISHED":
+            if game_state == game.get_game_turn() + "_WON":
+                return WIN_SCORE - ply, []
+            return -WIN_SCORE + ply, []
+
+        key = game.get_hash()
+        entry = self._table.probe(key)
+        table_move = None
+        if entry is not None:
+            entry_depth, entry_score, entry_flag, table_move = entry
+            entry_score = score_from_table(entry_score, ply)
+            if ply > 0 and entry_depth >= depth:
+                if entry_flag == EXACT:
+                    return entry_score, [table_move] if table_move else []
+                if entry_flag == LOWER_BOUND and entry_score >= beta:
+                    return entry_score, [table_move] if table_move else []
+                if entry_flag == UPPER_BOUND and entry_score <= alpha:
+                    return entry_score, []
+
+        if depth == 0:
+            return evaluate(game, self._weights), []
+
+        moves = game.generate_legal_squares()
+        if not moves:
+            return -WIN_SCORE + ply, []  # a player that can't move loses
+
+        original_alpha = alpha
+        best_score = -WIN_SCORE - 1
+        best_line = []
+        for move in self.order_moves(game, moves, table_move, ply):
+            game.push_move_squares(move[0], move[1])
+            try:
+                score, line = self.negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.pop_move()
+            score = -score
+
+            if score > best_score:
+                best_score = score
+                best_line = [move] + line
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        killers = self._killers[ply]
+                        if move != killers[0]:
+                            killers[1] = killers[0]
+                            killers[0] = move
+                        break
+
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self._table.store(key, depth, score_to_table(best_score, ply), flag, best_line[0])
+        return best_score, best_line
+
+    def order_moves(self, game, moves, table_move, ply):
+        """
+        Sorts moves so the likely best ones are searched first: the
+        transposition table's move, then captures (most opponent stones
+        first), then killer moves, then everything else.
+        Parameters:
+            game = the GessGame the moves belong to
+            moves = list of legal moves, as square numbers
+            table_move = best move stored for the position, or None
+            ply = number of moves from the root (for the killer moves)
+        Returns:
+            the sorted list of moves
+        """
+        board = game.get_bitboard()
+        if game.get_game_turn() == "BLACK":
+            opponent = board.get_white()
+        else:
+            opponent = board.get_black()
+        killers = self._killers[ply] if ply < len(self._killers) else (None, None)
+
+        def priority(move):
+            if move == table_move:
+                return 1000
+            captured = (FOOTPRINT_MASKS[move[1]] & opponent).bit_count()
+            if captured:
+                return 100 + captured
+            if move == killers[0] or move == killers[1]:
+                return 50
+            return 0
+
+        return sorted(moves, key=priority, reverse=True)
+
+
+def search_root_moves(game, moves, max_depth, time_limit, memory_mb, weights=None):
+    """
+    Worker of the ParallelEngine: searches a share of the root moves
+    with a fresh GessEngine (so the result only depends on the arguments).
+    Parameters:
+        game = the GessGame to search
+        moves = this worker's root moves, as square numbers
+        max_depth = deepest depth to search
+        time_limit = seconds to search for (None for no limit)
+        memory_mb = memory budget of the worker's transposition table
+        weights = evaluation weights (see evaluate)
+    Returns:
+        list of (depth, score, principal variation, nodes), one per finished depth
+    """
+    finished = []
+    engine = GessEngine(max_depth, time_limit, memory_mb, weights=weights)
+    engine.search(game, report=lambda result: finished.append(
+        (result.get_depth(), result.get_score(), result.get_principal_variation(), result.get_nodes())), moves=moves)
+    return finished
+
+
+class ParallelEngine:
+    """
+    The ParallelEngine class spreads a search over several worker
+    processes (the pure-Python search can't use more than one core
+    from threads, because of the GIL).
+
+    The root moves are sorted and dealt out to the workers in turn
+    (root splitting). Each worker searches its moves with its own
+    GessEngine and transposition table, and the best of the workers'
+    moves is played. The root moves, their split and every worker's
+    search only depend on the position, so a search to a fixed depth
+    (no time limit) always gives the same result for the same number
+    of workers. With a time limit, the deepest depth that every worker
+    finished is used. Positions in the opening book (if any) are
+    answered from the book without starting the workers.
+    """
+
+    def __init__(self, workers=None, max_depth=None, time_limit=None, memory_mb=16, book=None, weights=None):
+        """
+        Parameters:
+            workers = number of worker processes (defaults to the number of cores)
+            max_depth = deepest depth to search (see get_search_depth)
+            time_limit = seconds per move (None for no limit)
+            memory_mb = memory budget of each worker's transposition table
+            book = optional GessBook.OpeningBook
+            weights = evaluation weights of the workers (see evaluate)
+        """
+        self._workers = workers or os.cpu_count() or 1
+        self._max_depth = max_depth
+        self._time_limit = time_limit
+        self._memory_mb = memory_mb
+        self._book = book
+        self._weights = weights
+        self._executor = None
+
+    def get_workers(self):
+        """
+        Returns the number of worker processes.
+        """
+        return self._workers
+
+    def search(self, game, max_depth=None, time_limit=None):
+        """
+        Searches the position for the best move on all the workers.
+        Parameters:
+            game = the GessGame to search (unchanged afterwards)
+            max_depth = deepest depth to search (defaults to the engine's)
+            time_limit = seconds to search for (defaults to the engine's)
+        Returns:
+            a SearchResult; its node count adds up all the workers
+        """
+        if max_depth is None:
+            max_depth = self._max_depth
+        if time_limit is None:
+            time_limit = self._time_limit
+        max_depth = get_search_depth(max_depth, time_limit)
+        start = time.perf_counter()
+
+        if self._book is not None:
+            book_move = self._book.choose_move(game)
+            if book_move is not None:
+                return SearchResult(book_move, 0, [book_move], 0, 0, time.perf_counter() - start)
+
+        moves = game.generate_legal_squares()
+        if not moves:
+            return SearchResult(None, 0, [], 0, 0, 0.0)
+        moves = GessEngine(memory_mb=0).order_moves(game, moves, None, 0)
+        shares = [moves[index::self._workers] for index in range(self._workers)]
+        shares = [share for share in shares if share]
+
+        if len(shares) == 1:
+            outcomes = [search_root_moves(game, shares[0], max_depth, time_limit, self._memory_mb, self._weights)]
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self._workers)
+            futures = [self._executor.submit(search_root_moves, game, share, max_depth, time_limit,
+                                             self._memory_mb, self._weights) for share in shares]
+            outcomes = [future.result() for future in futures]
+
+        nodes = sum(outcome[-1][3] for outcome in outcomes if outcome)
+        seconds = time.perf_counter() - start
+        moves = get_move_names(moves)
+        if not all(outcomes):
+            # a worker ran out of time before depth 1: fall back to the first move
+            return SearchResult(moves[0], 0, [moves[0]], 0, nodes, seconds)
+
+        # compare the workers at the deepest depth all of them finished
+        depth = min(outcome[-1][0] for outcome in outcomes)
+        best = None
+        for outcome in outcomes:
+            for finished_depth, score, line, worker_nodes in outcome:
+                if finished_depth != depth or not line:
+                    continue
+                # ties go to the move that comes first in the root order
+                rank = (-score, moves.index(line[0]))
+                if best is None or rank < best[0]:
+                    best = (rank, score, line)
+
+        return SearchResult(best[2][0], best[1], best[2], depth, nodes, seconds)
+
+    def close(self):
+        """
+        Shuts down the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,359 @@
+# Description: plays many complete Gess games (random, scripted or
+# engine players) on a pool of worker processes, and streams the
+# finished games to disk.
+# Run with: python GessSelfPlay.py --games 1000 --output games.jsonl
+
+
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+from GessBook import OpeningBook
+from GessGame import GessGame
+from GessMCTS import MCTSEngine
+from GessRecord import GameWriter
+from GessSearch import GessEngine
+
+
+class RandomPlayer:
+    """
+    Plays a random legal move.
+    """
+
+    def __init__(self, chooser):
+        """
+        Parameter:
+            chooser = random.Random used to pick the moves
+        """
+        self._chooser = chooser
+
+    def choose_move(self, game):
+        """
+        Picks the move to play.
+        Parameter:
+            game = the GessGame to move in
+        Returns:
+            (current, new), or None if there is no legal move
+        """
+        moves = game.generate_legal_moves()
+        if not moves:
+            return None
+        return self._chooser.choice(moves)
+
+
+class ScriptedPlayer:
+    """
+    Plays the moves of a script (e.g. an opening line) in order, then
+    random legal moves once the script runs out or one of its moves
+    isn't legal in the game.
+    """
+
+    def __init__(self, chooser, script):
+        """
+        Parameters:
+            chooser = random.Random used after the script
+            script = list of (current, new) moves for this player
+        """
+        self._script = list(script)
+        self._fallback = RandomPlayer(chooser)
+
+    def choose_move(self, game):
+        """
+        Picks the move to play.
+        Parameter:
+            game = the GessGame to move in
+        Returns:
+            (current, new), or None if there is no legal move
+        """
+        if self._script:
+            move = tuple(self._script.pop(0))
+            if move in game.generate_legal_moves():
+                return move
+            self._script = []
+        return self._fallback.choose_move(game)
+
+
+class EnginePlayer:
+    """
+    Plays the GessEngine's best move, searched to a fixed depth or for
+    a fixed time per move. (Only fixed-depth games are exactly repeatable.)
+    """
+
+    def __init__(self, max_depth, time_limit):
+        """
+        Parameters:
+            max_depth = depth of every search
+            time_limit = seconds per move (None for no limit)
+        """
+        self._engine = GessEngine(max_depth, time_limit)
+
+    def choose_move(self, game):
+        """
+        Picks the move to play.
+        Parameter:
+            game = the GessGame to move in
+        Returns:
+            (current, new), or None if there is no legal move
+        """
+        return self._engine.search(game).get_best_move()
+
+
+class BookPlayer:
+    """
+    Plays a move from an opening book while the game is in the book
+    (picked at random, weighted by how often it was played), then
+    lets another player take over.
+    """
+
+    def __init__(self, chooser, book, player):
+        """
+        Parameters:
+            chooser = random.Random used to pick the book moves
+            book = the GessBook.OpeningBook
+            player = the player used outside the book
+        """
+        self._chooser = chooser
+        self._book = book
+        self._player = player
+
+    def choose_move(self, game):
+        """
+        Picks the move to play.
+        Parameter:
+            game = the GessGame to move in
+        Returns:
+            (current, new), or None if there is no legal move
+        """
+        move = self._book.choose_move(game, chooser=self._chooser)
+        if move is not None:
+            return move
+        return self._player.choose_move(game)
+
+
+class MCTSPlayer:
+    """
+    Plays the MCTSEngine's most visited move, with a fixed number of
+    playouts or a fixed time per move.
+    """
+
+    def __init__(self, playouts, time_limit, seed):
+        """
+        Parameters:
+            playouts = playouts per move (None with a time limit)
+            time_limit = seconds per move (None for no limit)
+            seed = seed of the playouts
+        """
+        self._engine = MCTSEngine(playouts, time_limit, seed=seed)
+
+    def choose_move(self, game):
+        """
+        Picks the move to play.
+        Parameter:
+            game = the GessGame to move in
+        Returns:
+            (current, new), or None if there is no legal move
+        """
+        return self._engine.search(game).get_best_move()
+
+
+def make_player(spec, chooser):
+    """
+    Builds a player from its command line description:
+    "random", "scripted:<file>" (a JSON list of [current, new] moves for
+    the player), "engine[:depth=<n>][:time=<seconds>]" or
+    "mcts[:playouts=<n>][:time=<seconds>]". Any of them can
+    end with ":book=<file>" to play from an opening book first.
+    Parameters:
+        spec = the player's description
+        chooser = random.Random for the player's random choices
+    Returns:
+        a player with a choose_move(game) method
+    """
+    base, _, book_path = spec.partition(":book=")
+    if book_path:
+        return BookPlayer(chooser, OpeningBook(book_path), make_player(base, chooser))
+
+    kind, _, options = spec.partition(":")
+    if kind == "random":
+        return RandomPlayer(chooser)
+    if kind == "scripted":
+        with open(options) as script_file:
+            return ScriptedPlayer(chooser, json.load(script_file))
+    if kind == "engine":
+        settings = dict(option.split("=") for option in options.split(":") if option)
+        time_limit = settings.get("time")
+        return EnginePlayer(int(settings.get("depth", 1)), None if time_limit is None else float(time_limit))
+    if kind == "mcts":
+        settings = dict(option.split("=") for option in options.split(":") if option)
+        time_limit = settings.get("time")
+        playouts = settings.get("playouts", None if time_limit else 200)
+        return MCTSPlayer(None if playouts is None else int(playouts),
+                          None if time_limit is None else float(time_limit), chooser.getrandbits(32))
+    raise ValueError("unknown player: " + spec)
+
+
+def play_game(index, seed, black, white, max_moves):
+    """
+    Plays one complete game. Every game gets its own random seed from
+    the run's seed and the game's number, so the same game is played
+    whatever worker (or order) it's played in.
+    Parameters:
+        index = the game's number in the run
+        seed = the run's seed
+        black = description of the black player (see make_player)
+        white = description of the white player
+        max_moves = the game stops as unfinished after this many moves
+    Returns:
+        a dict with the game's number, players, result and moves
+    """
+    chooser = random.Random("%d-%d" % (seed, index))
+    players = {"BLACK": make_player(black, chooser), "WHITE": make_player(white, chooser)}
+
+    game = GessGame()
+    moves = []
+    while game.get_game_state() == "UNFINISHED" and len(moves) < max_moves:
+        move = players[game.get_game_turn()].choose_move(game)
+        if move is None or not game.make_move(move[0], move[1]):
+            break
+        moves.append(list(move))
+
+    return {
+        "game": index,
+        "black": black,
+        "white": white,
+        "result": game.get_game_state(),
+        "moves": moves,
+    }
+
+
+def _play_game_task(arguments):
+    """
+    Unpacks play_game's arguments for Pool.imap.
+    """
+    return play_game(*arguments)
+
+
+def run_self_play(games, output, black="random", white="random", workers=None, seed=0,
+                  max_moves=200, report=None):
+    """
+    Plays a batch of games on a pool of worker processes, and writes each
+    finished game to the output as a line of JSON (or to a GessRecord
+    GameWriter, in the binary record format). The games are written
+    in order, so a run with the same seed writes exactly the same file.
+    Parameters:
+        games = number of games to play
+        output = file object or GameWriter to write the games to
+        black = description of the black player (see make_player)
+        white = description of the white player
+        workers = number of worker processes (defaults to the number of cores)
+        seed = the run's seed
+        max_moves = maximum number of moves per game
+        report = optional function called with the stats every 1000 games
+    Returns:
+        dict with the run's stats (see get_stats)
+    """
+    workers = workers or multiprocessing.cpu_count()
+    tasks = ((index, seed, black, white, max_moves) for index in range(games))
+    lengths = []
+    results = {}
+    start = time.perf_counter()
+
+    def record(game_record):
+        if isinstance(output, GameWriter):
+            output.write_game(game_record["result"], game_record["moves"])
+        else:
+            output.write(json.dumps(game_record) + "\n")
+        lengths.append(len(game_record["moves"]))
+        results[game_record["result"]] = results.get(game_record["result"], 0) + 1
+        if report is not None and len(lengths) % 1000 == 0:
+            report(get_stats(lengths, results, time.perf_counter() - start))
+
+    if workers == 1:
+        for task in tasks:
+            record(_play_game_task(task))
+    else:
+        # several games per task keep the workers busy without queueing every game at once
+        chunksize = max(1, min(64, games // (workers * 8)))
+        with multiprocessing.Pool(workers) as pool:
+            for game_record in pool.imap(_play_game_task, tasks, chunksize):
+                record(game_record)
+
+    if not isinstance(output, GameWriter):
+        output.flush()
+    return get_stats(lengths, results, time.perf_counter() - start)
+
+
+def get_stats(lengths, results, seconds):
+    """
+    Summarizes a run.
+    Parameters:
+        lengths = number of moves of every finished game
+        results = count of every game result (e.g. "BLACK_WON")
+        seconds = time the run took so far
+    Returns:
+        dict with games and moves per second, the results,
+        and the distribution of game lengths
+    """
+    games = len(lengths)
+    moves = sum(lengths)
+    ordered = sorted(lengths)
+
+    # game lengths in buckets of 10 moves (0-9, 10-19, ...)
+    histogram = {}
+    for length in ordered:
+        bucket = "%d-%d" % (length // 10 * 10, length // 10 * 10 + 9)
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    return {
+        "games": games,
+        "moves": moves,
+        "seconds": seconds,
+        "games_per_second": games / seconds if seconds else 0.0,
+        "moves_per_second": moves / seconds if seconds else 0.0,
+        "results": results,
+        "length_min": ordered[0] if ordered else 0,
+        "length_median": ordered[games // 2] if ordered else 0,
+        "length_mean": moves / games if games else 0.0,
+        "length_max": ordered[-1] if ordered else 0,
+        "length_histogram": histogram,
+    }
+
+
+def main():
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Play a batch of Gess games")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--output", default="-",
+                        help="JSON lines file for the games ('-' for stdout), or a binary record file (.gess)")
+    parser.add_argument("--black", default="random", help="random, scripted:<file>, engine[:depth=n][:time=s] or mcts[:playouts=n][:time=s], then [:book=<file>]")
+    parser.add_argument("--white", default="random", help="random, scripted:<file>, engine[:depth=n][:time=s] or mcts[:playouts=n][:time=s], then [:book=<file>]")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="seed that makes the run repeatable")
+    parser.add_argument("--max-moves", type=int, default=200, help="maximum number of moves per game")
+    args = parser.parse_args()
+
+    def report(stats):
+        print("%(games)d games, %(games_per_second).1f games/s, %(moves_per_second).1f moves/s" % stats,
+              file=sys.stderr)
+
+    if args.output == "-":
+        stats = run_self_play(args.games, sys.stdout, args.black, args.white, args.workers, args.seed,
+                              args.max_moves, report)
+    elif args.output.endswith(".gess"):
+        with GameWriter(args.output) as output:
+            stats = run_self_play(args.games, output, args.black, args.white, args.workers, args.seed,
+                                  args.max_moves, report)
+    else:
+        with open(args.output, "w") as output:
+            stats = run_self_play(args.games, output, args.black, args.white, args.workers, args.seed,
+                                  args.max_moves, report)
+    print(json.dumps(stats, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+# Description: asyncio server hosting many Gess games at once over TCP,
+# with one JSON request or response per line, and a load-testing client.
+# Run with: python GessServer.py serve [--port 8765]
+#           python GessServer.py loadtest [--sessions 1000,10000] [--connections 100]
+#
+# Requests are JSON objects with an "op" and an optional "id" (echoed in
+# the response), e.g.
+#   {"id": 1, "op": "new"}                               -> {"id": 1, "ok": true, "game": 7}
+#   {"id": 2, "op": "move", "game": 7, "current": "L3", "new": "L6"}
+#                                                        -> {"id": 2, "ok": true, "legal": true,
+#                                                            "state": "UNFINISHED", "turn": "WHITE"}
+#   {"id": 3, "op": "resign", "game": 7}                 -> {"id": 3, "ok": true, "state": ...}
+#   {"id": 4, "op": "state", "game": 7}                  -> state, turn and rings of both colors
+#   {"id": 5, "op": "board", "game": 7}                  -> the 20 rows, row 1 first
+#   {"id": 6, "op": "close", "game": 7}                  -> {"id": 6, "ok": true}
+# Errors are answered with {"ok": false, "error": "..."}.
+
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+from GessGame import GessGame, record_random_games
+
+
+MAX_LINE = 4096  # longest request line accepted
+
+
+class GessServer:
+    """
+    The GessServer class hosts games for any number of connections,
+    all in one event loop (no process or thread per game).
+
+    Every game belongs to the connection that created it (any
+    connection can play in it) and is closed when that connection goes
+    away. A connection's requests are answered one at a time, in order,
+    and the next one isn't read until the response has been handed to
+    the transport below its write limit: a client that sends requests
+    without reading the responses is slowed down by TCP instead of
+    filling the server's memory.
+    """
+
+    def __init__(self, max_games=100000, write_limit=65536):
+        """
+        Parameters:
+            max_games = most games hosted at once
+            write_limit = bytes of unsent responses a connection can have
+            before the server stops reading its requests
+        """
+        self._games = {}
+        self._game_ids = itertools.count(1)
+        self._max_games = max_games
+        self._write_limit = write_limit
+        self._server = None
+        self._operations = {
+            "new": self.new_game,
+            "move": self.make_move,
+            "resign": self.resign_game,
+            "state": self.get_state,
+            "board": self.get_board,
+            "close": self.close_game,
+        }
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """
+        Starts listening for connections.
+        Parameters:
+            host = address to listen on
+            port = port to listen on (0 picks a free one)
+        Returns:
+            the port the server listens on
+        """
+        self._server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """
+        Stops listening and waits for the server to close.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def get_game_count(self):
+        """
+        Returns the number of games being hosted.
+        """
+        return len(self._games)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Answers the requests of one connection until it closes.
+        Parameters:
+            reader, writer = the connection's asyncio streams
+        """
+        writer.transport.set_write_buffer_limits(high=self._write_limit)
+        owned = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # the request line is longer than MAX_LINE; the rest of the stream can't be trusted
+                    writer.write(b'{"ok": false, "error": "request too long"}\n')
+                    break
+                if not line:
+                    break
+
+                writer.write((json.dumps(self.handle_request(line, owned)) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in owned:
+                self._games.pop(game_id, None)
+            writer.close()
+
+    def handle_request(self, line, owned):
+        """
+        Answers one request.
+        Parameters:
+            line = the request's JSON line
+            owned = set of ids of the games the connection created
+        Returns:
+            the response, as a dict
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {"ok": False, "error": "not JSON"}
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "not a JSON object"}
+
+        operation = self._operations.get(request.get("op"))
+        if operation is None:
+            response = {"ok": False, "error": "unknown op"}
+        elif operation == self.new_game:
+            response = operation(owned)
+        else:
+            game_id = request.get("game")
+            # bool is an int too, but not a game id
+            if not isinstance(game_id, int) or isinstance(game_id, bool):
+                game = None
+            else:
+                game = self._games.get(game_id)
+            if game is None:
+                response = {"ok": False, "error": "no such game"}
+            else:
+                response = operation(request, game, owned)
+
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    def new_game(self, owned):
+        """
+        Starts a game owned by the connection.
+        """
+        if len(self._games) >= self._max_games:
+            return {"ok": False, "error": "too many games"}
+        game_id = next(self._game_ids)
+        self._games[game_id] = GessGame()
+        owned.add(game_id)
+        return {"ok": True, "game": game_id}
+
+    def make_move(self, request, game, owned):
+        """
+        Makes a move ("current" and "new" centers) in a game.
+        """
+        current = request.get("current")
+        new = request.get("new")
+        if not isinstance(current, str) or not isinstance(new, str) or not current or not new:
+            return {"ok": False, "error": "current and new centers required"}
+        legal = game.make_move(current, new)
+        return {"ok": True, "legal": legal, "state": game.get_game_state(), "turn": game.get_game_turn()}
+
+    def resign_game(self, request, game, owned):
+        """
+        The player to move resigns a game.
+        """
+        game.resign_game()
+        return {"ok": True, "state": game.get_game_state()}
+
+    def get_state(self, request, game, owned):
+        """
+        Returns the state, turn and rings of a game.
+        """
+        return {"ok": True, "state": game.get_game_state(), "turn": game.get_game_turn(),
+                "black_rings": game.get_rings("BLACK"), "white_rings": game.get_rings("WHITE")}
+
+    def get_board(self, request, game, owned):
+        """
+        Returns the board of a game, one string per row.
+        """
+        return {"ok": True, "board": ["".join(row) for row in game.get_game_board()]}
+
+    def close_game(self, request, game, owned):
+        """
+        Closes a game (only the connection that created it can).
+        """
+        game_id = request.get("game")
+        if game_id not in owned:
+            return {"ok": False, "error": "not this connection's game"}
+        owned.discard(game_id)
+        del self._games[game_id]
+        return {"ok": True}
+
+
+class GessClient:
+    """
+    The GessClient class sends requests over one connection without
+    waiting for the previous responses (the responses are matched to
+    their requests by id), so many sessions can share a connection.
+    """
+
+    def __init__(self, reader, writer):
+        """
+        Parameters:
+            reader, writer = the connection's asyncio streams
+        """
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._waiting = {}
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, host, port):
+        """
+        Opens a connection to a GessServer.
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, op, **fields):
+        """
+        Sends a request and waits for its response.
+        Parameters:
+            op = the request's op
+            fields = the rest of the request
+        Returns:
+            the response, as a dict
+        """
+        if self._receiver.done():
+            raise ConnectionError("connection closed")
+        request_id = next(self._ids)
+        fields["op"] = op
+        fields["id"] = request_id
+        response = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = response
+        self._writer.write((json.dumps(fields) + "\n").encode())
+        await self._writer.drain()
+        return await response
+
+    async def _receive(self):
+        """
+        Hands every response to the request waiting for it. When the
+        connection closes or sends something that isn't a JSON object,
+        every request still waiting fails with a ConnectionError.
+        """
+        error = ConnectionError("connection closed")
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                try:
+                    response = json.loads(line)
+                except ValueError:
+                    response = None
+                if not isinstance(response, dict):
+                    error = ConnectionError("bad response: %r" % line[:100])
+                    break
+                waiting = self._waiting.pop(response.get("id"), None)
+                if waiting is not None and not waiting.done():
+                    waiting.set_result(response)
+        except (ConnectionError, ValueError) as exception:
+            error = ConnectionError("connection failed: %s" % exception)
+        finally:
+            for waiting in self._waiting.values():
+                if not waiting.done():
+                    waiting.set_exception(error)
+            self._waiting.clear()
+
+    async def close(self):
+        """
+        Closes the connection.
+        """
+        self._writer.close()
+        await self._writer.wait_closed()
+        await self._receiver
+
+
+async def run_session(client, script, latencies):
+    """
+    Plays one scripted game on the server, timing every move.
+    Parameters:
+        client = the GessClient to use
+        script = list of (current, new) moves, all legal in turn
+        latencies = list the seconds of every move are added to
+    """
+    game_id = (await client.request("new"))["game"]
+    for current, new in script:
+        start = time.perf_counter()
+        response = await client.request("move", game=game_id, current=current, new=new)
+        latencies.append(time.perf_counter() - start)
+        if not response.get("legal"):
+            raise AssertionError("server rejected scripted move %s-%s" % (current, new))
+    await client.request("close", game=game_id)
+
+
+async def load_test(sessions, host, port, connections=100, scripts=None):
+    """
+    Plays many games on a server at once and measures the move latency.
+    The sessions are spread over the connections, and all of them play
+    at the same time.
+    Parameters:
+        sessions = number of games played at once
+        host, port = the server's address
+        connections = number of connections the sessions share
+        scripts = games to replay (from GessGame.record_random_games)
+    Returns:
+        dict with the number of moves, moves per second and the
+        p50 / p99 move latency in milliseconds
+    """
+    if scripts is None:
+        scripts = record_random_games(200)
+    clients = [await GessClient.connect(host, port) for x in range(min(connections, sessions))]
+    latencies = []
+
+    start = time.perf_counter()
+    await asyncio.gather(*[run_session(clients[index % len(clients)], scripts[index % len(scripts)], latencies)
+                           for index in range(sessions)])
+    seconds = time.perf_counter() - start
+    for client in clients:
+        await client.close()
+
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "moves": len(latencies),
+        "moves_per_second": len(latencies) / seconds if seconds else 0.0,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p99_ms": latencies[len(latencies) * 99 // 100] * 1000 if latencies else 0.0,
+    }
+
+
+async def run_load_tests(session_counts, connections, address=None):
+    """
+    Runs a load test for every number of sessions, against a server
+    at the address or (without one) a server in this event loop.
+    Returns:
+        list of the load_test results
+    """
+    server = None
+    if address is None:
+        server = GessServer()
+        host, port = "127.0.0.1", await server.start(port=0)
+    else:
+        host, _, port = address.rpartition(":")
+        port = int(port)
+
+    scripts = record_random_games(200)
+    results = [await load_test(sessions, host, port, connections, scripts) for sessions in session_counts]
+    if server is not None:
+        await server.close()
+    return results
+
+
+async def serve(host, port, max_games):
+    """
+    Runs a server until it's interrupted.
+    """
+    server = GessServer(max_games)
+    port = await server.start(host, port)
+    print("listening on %s:%d" % (host, port))
+    await asyncio.Event().wait()
+
+
+def main():
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Host Gess games over TCP")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run a server")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    serve_parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    serve_parser.add_argument("--max-games", type=int, default=100000, help="most games hosted at once")
+    load_parser = commands.add_parser("loadtest", help="measure move latency with many sessions")
+    load_parser.add_argument("--sessions", default="1000,10000", help="comma separated session counts")
+    load_parser.add_argument("--connections", type=int, default=100, help="connections the sessions share")
+    load_parser.add_argument("--connect", default=None,
+                             help="host:port of a running server (defaults to one in this process)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.max_games))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    session_counts = [int(count) for count in args.sessions.split(",")]
+    for result in asyncio.run(run_load_tests(session_counts, args.connections, args.connect)):
+        print(", ".join("%s=%s" % (key, round(value, 2)) for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
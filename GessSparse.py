@@ -0,0 +1,1189 @@
+# Description: Gess on boards of any size from 20x20 up (e.g. 50x50 or
+# 100x100), for experimental large-board variants. GessGame(board_size=n)
+# makes a SparseGessGame for any size but the standard 20x20. Its stones
+# are kept as sets of occupied squares instead of bitboards, and every
+# step of a move (validation, path, edges, rings, hash) only looks at the
+# tiles around the Piece, so a move costs about the same whatever the
+# size of the board (see GessBench's scaling benchmark).
+
+
+import random
+
+from GessGame import BOARD_SIZE, DIRECTION_INDEXES, DIRECTIONS, STARTING_BOARD, GessGame, iterate_squares
+
+
+# the lookup tables of every board size used so far (see get_geometry)
+GEOMETRIES = {}
+
+
+def get_geometry(size):
+    """
+    Returns the BoardGeometry of a board size, building it the first
+    time the size is used.
+    Parameter:
+        size = number of rows (and columns) of the board
+    Returns:
+        the BoardGeometry
+    """
+    geometry = GEOMETRIES.get(size)
+    if geometry is None:
+        geometry = GEOMETRIES[size] = BoardGeometry(size)
+    return geometry
+
+
+def get_column_name(column):
+    """
+    Names a column like a spreadsheet does: A to Z, then AA, AB, ...
+    Parameter:
+        column = column index (0 for A)
+    Returns:
+        the column's letters
+    """
+    name = ""
+    column += 1
+    while column:
+        column, letter = divmod(column - 1, 26)
+        name = chr(letter + 65) + name
+    return name
+
+
+class BoardGeometry:
+    """
+    The BoardGeometry class holds the lookup tables of one board size.
+    Squares are numbered row by row (square = row * size + column), like
+    on the standard board, and none of the tables holds a whole-board
+    mask, so they stay small on large boards:
+    - size, squares: rows (and columns) of the board, and number of squares
+    - offsets: offsets of a footprint's tiles from its center, in the
+      order of GessGame's SURROUNDING_OFFSETS (NW, N, NE, E, SE, S, SW, W, center)
+    - steps: offset of one step in each of DIRECTIONS (the first 8 offsets)
+    - leading: for every direction, the offsets from a Piece's new center
+      of the footprint tiles it didn't cover one step before
+    - rows, columns: row and column of every square
+    - interior: 1 for the squares that can be a Piece's center, followed
+      by a row of zeros, so the tiles around any square of the board can
+      be looked up without checking the bounds (a tile past the first row
+      wraps around to the zeros at the end)
+    - black_keys, white_keys, white_turn_key: Zobrist keys (the same as
+      GessGame's on the standard board)
+    - black_start, white_start: squares of the starting stones
+    """
+
+    def __init__(self, size):
+        """
+        Builds the tables.
+        Parameter:
+            size = number of rows (and columns), at least BOARD_SIZE
+        """
+        if size < BOARD_SIZE:
+            raise ValueError("boards are at least %dx%d" % (BOARD_SIZE, BOARD_SIZE))
+        self.size = size
+        self.squares = size * size
+        self.offsets = tuple(row * size + column for row, column in DIRECTIONS + ((0, 0),))
+        self.steps = self.offsets[:8]
+        self.leading = tuple(tuple(row * size + column for row in (-1, 0, 1) for column in (-1, 0, 1)
+                                   if max(abs(row + row_step), abs(column + column_step)) > 1)
+                             for row_step, column_step in DIRECTIONS)
+
+        self.rows = [square // size for square in range(self.squares)]
+        self.columns = [square % size for square in range(self.squares)]
+        self.interior = bytearray(0 < row < size - 1 and 0 < column < size - 1
+                                  for row, column in zip(self.rows, self.columns)) + bytearray(size + 1)
+        self._names = {}
+        self._squares = {}
+
+        # drawn in the same order as GessGame's keys, so a 20x20 board gets the same ones
+        key_random = random.Random(20200603)
+        self.black_keys = [key_random.getrandbits(64) for square in range(self.squares)]
+        self.white_keys = [key_random.getrandbits(64) for square in range(self.squares)]
+        self.white_turn_key = key_random.getrandbits(64)
+
+        # the standard starting stones, centered between the left and right
+        # edges, with each color as far from its own edge as on 20x20
+        column_shift = (size - BOARD_SIZE) // 2
+        row_shift = size - BOARD_SIZE
+        self.black_start = frozenset(square // BOARD_SIZE * size + square % BOARD_SIZE + column_shift
+                                     for square in iterate_squares(STARTING_BOARD.get_black()))
+        self.white_start = frozenset((square // BOARD_SIZE + row_shift) * size + square % BOARD_SIZE + column_shift
+                                     for square in iterate_squares(STARTING_BOARD.get_white()))
+
+    def get_square_name(self, square):
+        """
+        Returns a square's name, e.g. 'L3' (or 'AB47' on a large board).
+        Names are kept once made.
+        """
+        name = self._names.get(square)
+        if name is None:
+            name = self._names[square] = get_column_name(self.columns[square]) + str(self.rows[square] + 1)
+        return name
+
+    def get_center_names(self, centers):
+        """
+        Lists centers by name, ordered column by column and then by row
+        (like GessGame's ring lists).
+        Parameter:
+            centers = iterable of square numbers
+        Returns:
+            list of center names
+        """
+        ordered = sorted(centers, key=lambda square: (self.columns[square], self.rows[square]))
+        return [self.get_square_name(square) for square in ordered]
+
+    def parse_square(self, name):
+        """
+        Converts a square's name (e.g. 'L3', 'l3' or 'AB47') to its square number.
+        Parameter:
+            name = the square's column letters and row number
+        Returns:
+            the square number, or None if there's no such square
+        """
+        square = self._squares.get(name, -1)
+        if square == -1:
+            square = self._squares[name] = self._parse_square(name)
+        return square
+
+    def _parse_square(self, name):
+        """
+        parse_square without keeping the result.
+        """
+        name = name.upper()
+        letters = name.rstrip("0123456789")
+        digits = name[len(letters):]
+        if not letters or not digits or digits[0] == "0" or not (letters.isascii() and letters.isalpha()):
+            return None
+
+        column = 0
+        for letter in letters:
+            column = column * 26 + ord(letter) - 64
+        column -= 1
+        row = int(digits) - 1
+        if column >= self.size or row >= self.size:
+            return None
+        return row * self.size + column
+
+    def is_center(self, square):
+        """
+        Returns True if a square number is on the board and can be a Piece's center.
+        """
+        return 0 <= square < self.squares and self.interior[square] == 1
+
+    def get_direction(self, square, new_square):
+        """
+        Finds the direction and distance from one center to another
+        (see GessGame.get_direction).
+        Returns:
+            (direction index, distance) if the centers are on the same row,
+            column or diagonal, otherwise None
+        """
+        row_distance = self.rows[new_square] - self.rows[square]
+        column_distance = self.columns[new_square] - self.columns[square]
+
+        if row_distance and column_distance and abs(row_distance) != abs(column_distance):
+            return None
+        if not row_distance and not column_distance:
+            return None
+        step = ((row_distance > 0) - (row_distance < 0), (column_distance > 0) - (column_distance < 0))
+        return DIRECTION_INDEXES[step], max(abs(row_distance), abs(column_distance))
+
+    def get_nearby_centers(self, square, distance):
+        """
+        Lists the centers at most a number of rows and columns away from a square.
+        Parameters:
+            square = the square number
+            distance = greatest row or column distance
+        Returns:
+            list of square numbers
+        """
+        row = self.rows[square]
+        column = self.columns[square]
+        centers = []
+        for near_row in range(max(row - distance, 1), min(row + distance, self.size - 2) + 1):
+            first = near_row * self.size
+            centers.extend(range(first + max(column - distance, 1), first + min(column + distance, self.size - 2) + 1))
+        return centers
+
+
+class SparseBoard:
+    """
+    The SparseBoard class stores the stones of a board of any size as
+    two sets of square numbers, one per color, so looking at a tile or
+    moving a footprint costs the same on any board.
+    """
+
+    def __init__(self, size, black=(), white=()):
+        """
+        Parameters:
+            size = number of rows (and columns) of the board
+            black = square numbers of the black stones
+            white = square numbers of the white stones
+        """
+        self._size = size
+        self._black = set(black)
+        self._white = set(white)
+
+    @classmethod
+    def from_grid(cls, grid):
+        """
+        Builds a SparseBoard from a square grid of 'B', 'W' and '.'.
+        Parameter:
+            grid = list of rows, each row a list of one character strings
+        Returns:
+            a new SparseBoard
+        """
+        size = len(grid)
+        board = cls(size)
+        for row_index, row in enumerate(grid):
+            for column_index, content in enumerate(row):
+                board.set_square(row_index * size + column_index, content)
+        return board
+
+    def get_size(self):
+        """
+        Returns the number of rows (and columns) of the board.
+        """
+        return self._size
+
+    def get_black(self):
+        """
+        Returns the set of the black stones' squares (the board's own set).
+        """
+        return self._black
+
+    def get_white(self):
+        """
+        Returns the set of the white stones' squares (the board's own set).
+        """
+        return self._white
+
+    def get_square(self, square):
+        """
+        Check the content of a square number.
+        Returns:
+            'B', 'W', or '.' of a tile
+        """
+        if square in self._black:
+            return 'B'
+        if square in self._white:
+            return 'W'
+        return '.'
+
+    def set_square(self, square, content):
+        """
+        Puts a stone on a square, or empties it.
+        Parameters:
+            square = the square number
+            content = 'B', 'W' or '.'
+        """
+        self._black.discard(square)
+        self._white.discard(square)
+        if content == 'B':
+            self._black.add(square)
+        elif content == 'W':
+            self._white.add(square)
+
+    def get_stone(self, row, column):
+        """
+        Check the content of a (row, column) index pair. Like
+        Bitboard.get_stone, negative indexes count from the far side of
+        the board, and indexes past the board raise IndexError.
+        Returns:
+            'B', 'W', or '.' of a tile
+        """
+        if row < 0:
+            row += self._size
+        if column < 0:
+            column += self._size
+        if not 0 <= row < self._size or not 0 <= column < self._size:
+            raise IndexError("board index out of range")
+        return self.get_square(row * self._size + column)
+
+    def move_stone(self, current_row, current_column, new_row, new_column):
+        """
+        Replaces the new position's content with the current position's
+        content, and empties the current position.
+        """
+        content = self.get_stone(current_row, current_column)
+        self.get_stone(new_row, new_column)  # same bounds check as the grid
+        self.set_square((current_row % self._size) * self._size + current_column % self._size, '.')
+        self.set_square((new_row % self._size) * self._size + new_column % self._size, content)
+
+    def get_grid(self):
+        """
+        Builds the grid of 'B', 'W' and '.' (a fresh copy).
+        Returns:
+            list of rows, each row a list of one character strings
+        """
+        grid = [['.'] * self._size for row in range(self._size)]
+        for stones, content in ((self._black, 'B'), (self._white, 'W')):
+            for square in stones:
+                grid[square // self._size][square % self._size] = content
+        return grid
+
+    def move_footprint(self, square, new_square, offsets):
+        """
+        Replaces the new center's footprint with the current center's
+        footprint (stones and empty tiles alike), and empties the tiles of
+        the current footprint that the new footprint doesn't cover.
+        Parameters:
+            square = square number of the current center
+            new_square = square number of the new center
+            offsets = the footprint offsets of the board's size (see BoardGeometry)
+        Returns:
+            dict of the tiles that changed, with what they held before
+        """
+        black, white = self._black, self._white
+        current = [square + offset for offset in offsets]
+        shift = new_square - square
+        moved_black = [tile + shift for tile in current if tile in black]
+        moved_white = [tile + shift for tile in current if tile in white]
+
+        before = {}
+        for tile in current + [new_square + offset for offset in offsets]:
+            before[tile] = 'B' if tile in black else 'W' if tile in white else '.'
+        black.difference_update(before)
+        white.difference_update(before)
+        black.update(moved_black)
+        white.update(moved_white)
+        return {tile: content for tile, content in before.items()
+                if ('B' if tile in black else 'W' if tile in white else '.') != content}
+
+    def get_ring_centers(self, region, offsets):
+        """
+        Finds the rings among some centers - an empty center
+        surrounded by 8 stones of the same color.
+        Parameters:
+            region = iterable of center square numbers to check
+            offsets = the footprint offsets of the board's size
+        Returns:
+            (set of black ring centers, set of white ring centers)
+        """
+        black, white = self._black, self._white
+        outer = offsets[:8]
+        black_found = set()
+        white_found = set()
+        for center in region:
+            if center in black or center in white:
+                continue
+            # a ring's tiles are all of one color: its N tile tells which to check
+            north = center + outer[1]
+            if north in black:
+                if black.issuperset([center + offset for offset in outer]):
+                    black_found.add(center)
+            elif north in white:
+                if white.issuperset([center + offset for offset in outer]):
+                    white_found.add(center)
+        return black_found, white_found
+
+    def copy(self):
+        """
+        Returns an independent copy of the board.
+        """
+        return SparseBoard(self._size, self._black, self._white)
+
+
+class SparseFeatures:
+    """
+    The SparseFeatures class keeps the same evaluation features as
+    GessGame's FeatureAccumulator, for the stones of a SparseBoard.
+    The first count only looks at the centers next to a stone, so it
+    depends on the number of stones, not on the size of the board.
+    After that, update only re-counts the centers whose footprint holds
+    a tile that changed (taking off what they counted before the change
+    and adding what they count now), so it costs about the same
+    whatever the number of stones.
+    """
+
+    def __init__(self, board, geometry):
+        """
+        Counts the features of a board.
+        Parameters:
+            board = the SparseBoard
+            geometry = the BoardGeometry of its size
+        """
+        self._stones = [len(board.get_black()), len(board.get_white())]
+        self._pieces = [0, 0]
+        self._free_pieces = [0, 0]
+        self._mobility = [0, 0]
+        black, white = board.get_black(), board.get_white()
+        centers = set(stone + offset for stone in black | white for offset in geometry.offsets)
+        self._count_centers([center for center in centers if geometry.is_center(center)], black, white,
+                            geometry.offsets, 1)
+
+    def _count_centers(self, centers, black, white, offsets, sign):
+        """
+        Adds (sign 1) or takes off (sign -1) the pieces, free pieces and
+        mobility of some centers.
+        Parameters:
+            centers = the center square numbers
+            black, white = sets of the squares of the stones
+            offsets = the footprint offsets of the board's size
+            sign = 1 or -1
+        """
+        outer = offsets[:8]
+        for center in centers:
+            tiles = [center + offset for offset in outer]
+            has_black = center in black or not black.isdisjoint(tiles)
+            has_white = center in white or not white.isdisjoint(tiles)
+            if has_black == has_white:
+                continue
+            index, own = (0, black) if has_black else (1, white)
+            self._pieces[index] += sign
+            self._free_pieces[index] += sign * (center in own)
+            self._mobility[index] += sign * len(own.intersection(tiles))
+
+    def update(self, board, geometry, changes):
+        """
+        Brings the features up to date after tiles changed.
+        Parameters:
+            board = the SparseBoard, as it is now
+            geometry = the BoardGeometry of its size
+            changes = dict of the tiles that changed since the features
+            were last brought up to date, with what they held then
+        Returns:
+            none
+        """
+        changes = {tile: content for tile, content in changes.items() if board.get_square(tile) != content}
+        if not changes:
+            return
+        offsets = geometry.offsets
+        centers = [center for center in set(tile + offset for tile in changes for offset in offsets)
+                   if geometry.is_center(center)]
+
+        # count the centers with the tiles put back as they were, then as they are
+        black, white = board.get_black(), board.get_white()
+        current = {tile: board.get_square(tile) for tile in changes}
+        for tile, content in changes.items():
+            board.set_square(tile, content)
+        stones = (len(black), len(white))
+        self._count_centers(centers, black, white, offsets, -1)
+        for tile, content in current.items():
+            board.set_square(tile, content)
+        self._stones[0] += len(black) - stones[0]
+        self._stones[1] += len(white) - stones[1]
+        self._count_centers(centers, black, white, offsets, 1)
+
+    def copy(self):
+        """
+        Returns an independent copy of the features.
+        """
+        features = SparseFeatures.__new__(SparseFeatures)
+        features._stones = list(self._stones)
+        features._pieces = list(self._pieces)
+        features._free_pieces = list(self._free_pieces)
+        features._mobility = list(self._mobility)
+        return features
+
+    def get_features(self):
+        """
+        Returns the features as a dict, e.g. {"black_stones": 43, ...}.
+        """
+        features = {}
+        for index, color in enumerate(("black", "white")):
+            features[color + "_stones"] = self._stones[index]
+            features[color + "_pieces"] = self._pieces[index]
+            features[color + "_free_pieces"] = self._free_pieces[index]
+            features[color + "_mobility"] = self._mobility[index]
+        return features
+
+    def get_differences(self):
+        """
+        Returns black's features minus white's, as a tuple of
+        (stones, pieces, free_pieces, mobility).
+        """
+        return (self._stones[0] - self._stones[1], self._pieces[0] - self._pieces[1],
+                self._free_pieces[0] - self._free_pieces[1], self._mobility[0] - self._mobility[1])
+
+
+class SparseGessGame(GessGame):
+    """
+    The SparseGessGame class plays Gess with the same rules and methods
+    as GessGame on a board of any size (GessGame(board_size=n) makes one
+    for any size but 20). The stones are kept on a SparseBoard, and
+    nothing a move does looks past the tiles around the Piece:
+    - validation, the direction stone and the path only read the tiles
+      the footprint covers or sweeps over
+    - only the new footprint can reach the edges, so only its tiles are cleared
+    - the hash is updated from the tiles that changed
+    - rings are only looked for within one tile of the tiles that changed
+    Listing the legal moves walks from the player's stones, so it
+    depends on the number of stones, not on the size of the board.
+
+    On 300 random games (best of 5 runs), a move takes about twice as
+    long as with the bitboard GessGame (41 us against 20 us), and a move
+    list about 1.4 times as long (0.55 ms against 0.38 ms). On 200x200
+    a move takes about 69 us and a move list 1.1 ms: the Pieces slide
+    further, so the paths are longer and there are about 2.5 times as
+    many moves to list.
+
+    get_bitboard returns the SparseBoard (sets of squares instead of
+    bitboards), and get_position isn't available (Position packs
+    20x20 boards).
+    """
+
+    def __init__(self, debug=False, profiler=None, board_size=BOARD_SIZE):
+        """
+        Sets up the starting position of a board size (the standard
+        starting stones, centered between the left and right edges).
+        Parameters:
+            debug = if True, ring_check compares its result with a full
+            rescan of the board after every move
+            profiler = optional MoveProfiler (see GessProfile)
+            board_size = number of rows (and columns) of the board, at least 20
+        """
+        geometry = get_geometry(board_size)
+        self._geometry = geometry
+        self._game_state = "UNFINISHED"
+        self._game_board = SparseBoard(board_size, geometry.black_start, geometry.white_start)
+        self._game_turn = "BLACK"
+        self._debug = debug
+        self._profiler = profiler
+        self._undo_stack = []
+        self._destinations = {}
+        self._destinations_position = None
+        self._reset_tracking()
+
+    def _reset_tracking(self):
+        """
+        Finds the rings and the hash of the whole board (after the board was set up).
+        """
+        board = self._game_board
+        geometry = self._geometry
+        self._ring_centers = tuple(frozenset(found) for found in board.get_ring_centers(
+            self._get_centers_near(board.get_black() | board.get_white()), geometry.offsets))
+        self._black_rings = geometry.get_center_names(self._ring_centers[0])
+        self._white_rings = geometry.get_center_names(self._ring_centers[1])
+
+        # the features are counted the first time they're needed, then kept
+        # up to date from the tiles that changed since (see _update_features)
+        self._features = None
+        self._feature_changes = {}
+
+        self._hash = geometry.white_turn_key if self._game_turn == "WHITE" else 0
+        for square in board.get_black():
+            self._hash ^= geometry.black_keys[square]
+        for square in board.get_white():
+            self._hash ^= geometry.white_keys[square]
+
+    def _get_centers_near(self, tiles):
+        """
+        Returns the set of centers whose footprint holds at least one of the tiles.
+        """
+        interior = self._geometry.interior
+        return {tile + offset for tile in tiles for offset in self._geometry.offsets if interior[tile + offset]}
+
+    def get_board_size(self):
+        """
+        Returns the number of rows (and columns) of the board.
+        """
+        return self._geometry.size
+
+    def _get_shared_objects(self):
+        """
+        Returns the objects a game refers to but doesn't own, for
+        get_memory_usage: the profiler and the board size's BoardGeometry
+        (see get_geometry), which every game of that size shares.
+        """
+        return (self._profiler, self._geometry)
+
+    def get_geometry(self):
+        """
+        Returns the BoardGeometry of the board's size (square names and numbers).
+        """
+        return self._geometry
+
+    def _update_features(self):
+        """
+        Brings the features up to date with the tiles that changed since
+        they were last needed (in debug mode, checking them against a
+        fresh count).
+        Returns:
+            the SparseFeatures
+        """
+        if self._features is None:
+            self._features = SparseFeatures(self._game_board, self._geometry)
+        elif self._feature_changes:
+            self._features.update(self._game_board, self._geometry, self._feature_changes)
+        self._feature_changes = {}
+        if self._debug:
+            if self._features.get_features() != SparseFeatures(self._game_board, self._geometry).get_features():
+                raise AssertionError("incremental features don't match a fresh count")
+        return self._features
+
+    def _note_feature_changes(self, changes):
+        """
+        Remembers what changed tiles held when the features were last
+        brought up to date.
+        Parameter:
+            changes = dict of the tiles that are changing, with what they hold before
+        """
+        feature_changes = self._feature_changes
+        for tile, content in changes.items():
+            if tile not in feature_changes:
+                feature_changes[tile] = content
+
+    def update_tile_hash(self, changes):
+        """
+        Brings the hash up to date after stones changed.
+        Parameter:
+            changes = dict of the tiles that changed, with what they held before
+        Returns:
+            none
+        """
+        geometry = self._geometry
+        board = self._game_board
+        for tile, before in changes.items():
+            for content in (before, board.get_square(tile)):
+                if content == 'B':
+                    self._hash ^= geometry.black_keys[tile]
+                elif content == 'W':
+                    self._hash ^= geometry.white_keys[tile]
+
+    def set_game_board(self, current_row, current_column, new_row, new_column):
+        """
+        Replaces the new position's content (stones) with the selected (current) content.
+        Afterwards, the current position's content is emptied.
+        """
+        size = self._geometry.size
+        squares = ((current_row % size) * size + current_column % size, (new_row % size) * size + new_column % size)
+        before = {square: self._game_board.get_square(square) for square in squares}
+        self._game_board.move_stone(current_row, current_column, new_row, new_column)
+        self.update_tile_hash(before)
+        self._note_feature_changes(before)
+
+    def update_game_board(self, new_board):
+        """
+        Replaces the board.
+        Parameter:
+            new_board = a SparseBoard or a grid (e.g. from get_game_board)
+        """
+        if not isinstance(new_board, SparseBoard):
+            new_board = SparseBoard.from_grid(new_board)
+        self._game_board = new_board
+        self._reset_tracking()
+
+    def set_position(self, new_board, game_turn, game_state="UNFINISHED"):
+        """
+        Sets up a whole position: the stones, the player turn and the
+        game state. The moves remembered by push_move are forgotten.
+        Parameters:
+            new_board = the SparseBoard of the position (it is used, not copied)
+            game_turn = "BLACK" or "WHITE"
+            game_state = "UNFINISHED", "BLACK_WON" or "WHITE_WON"
+        """
+        self._game_turn = game_turn
+        self._game_state = game_state
+        self._game_board = new_board
+        self._undo_stack = []
+        self._reset_tracking()
+
+    def get_position(self):
+        """
+        Not available: Position only packs 20x20 boards.
+        """
+        raise ValueError("Position only packs %dx%d boards" % (BOARD_SIZE, BOARD_SIZE))
+
+    def fork(self):
+        """
+        Makes an independent copy of the game for exploring a variation
+        (see GessGame.fork). The stones are copied; the rings are shared
+        until one of the games moves.
+        Returns:
+            the new SparseGessGame
+        """
+        game = SparseGessGame.__new__(SparseGessGame)
+        game.__dict__.update(self.__dict__)
+        game._game_board = self._game_board.copy()
+        game._undo_stack = []
+        game._destinations = {}
+        game._feature_changes = dict(self._feature_changes)
+        if self._features is not None:
+            game._features = self._features.copy()
+        return game
+
+    def toggle_game_turn(self):
+        """
+        Switches the game's player turn to the opposite color.
+        """
+        self._game_turn = "WHITE" if self._game_turn == "BLACK" else "BLACK"
+        self._hash ^= self._geometry.white_turn_key
+
+    def clear_edges(self):
+        """
+        Removes all stones (if any) on the edges of the board. Moves only
+        clear the tiles of the new footprint (see move_piece); this looks
+        at every stone.
+        Returns:
+            none
+        """
+        board = self._game_board
+        interior = self._geometry.interior
+        changes = {}
+        for stones in (board.get_black(), board.get_white()):
+            for square in [square for square in stones if not interior[square]]:
+                changes[square] = board.get_square(square)
+                stones.discard(square)
+        self.update_tile_hash(changes)
+        self._note_feature_changes(changes)
+
+    def make_move(self, current, new):
+        """
+        Makes a move given by center names (see GessGame.make_move).
+        Returns:
+            False if the move is not valid, otherwise True
+        """
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.start()
+
+        current_square = self._geometry.parse_square(current)
+        new_square = self._geometry.parse_square(new)
+        if current_square is None or new_square is None:
+            if profiler is not None:
+                profiler.lap("validation")
+                profiler.reject("not a square")
+            return False
+
+        reason = self.get_move_error(current_square, new_square, None, profiler)
+        if reason is not None:
+            if profiler is not None:
+                profiler.reject(reason)
+            return False
+        return self.move_piece(current_square, new_square, profiler)
+
+    def get_move_error(self, current_square, new_square, color=None, profiler=None):
+        """
+        Validates a move given as square numbers, with the same checks
+        (in the same order) as GessGame.get_move_error.
+        Returns:
+            None if the move is legal, otherwise the reason it isn't
+        """
+        if color is None:
+            color = self._game_turn
+        geometry = self._geometry
+        board = self._game_board
+        black, white = board.get_black(), board.get_white()
+        opponent = white if color == 'BLACK' else black
+
+        reason = None
+        vector = None
+        if not geometry.is_center(current_square) or not geometry.is_center(new_square):
+            reason = "off the board"
+        else:
+            vector = geometry.get_direction(current_square, new_square)
+            if vector is None:
+                reason = "not a line"
+            elif self._game_state != "UNFINISHED":
+                reason = "game over"
+            elif any(current_square + offset in opponent for offset in geometry.offsets):
+                reason = "opponent stones"
+            elif vector[1] > 3 and current_square not in black and current_square not in white:
+                reason = "too far"
+
+        if profiler is not None:
+            profiler.lap("validation")
+        if reason is not None:
+            return reason
+        direction, distance = vector
+
+        stone = current_square + geometry.steps[direction]
+        if stone not in black and stone not in white:
+            reason = "no stone in direction"
+        if profiler is not None:
+            profiler.lap("direction_check")
+        if reason is not None:
+            return reason
+
+        if len(self._black_rings) == 1 or len(self._white_rings) == 1:
+            if not self.last_ring_squares(current_square, new_square, color):
+                reason = "last ring"
+            if profiler is not None:
+                profiler.lap("last_ring")
+            if reason is not None:
+                return reason
+
+        if not self._is_path_clear(current_square, direction, distance):
+            reason = "path blocked"
+        if profiler is not None:
+            profiler.lap("path_clear")
+        return reason
+
+    def _is_path_clear(self, square, direction, distance):
+        """
+        Checks the tiles a footprint sweeps over before reaching a distance
+        (the tiles it covers one step at a time, leaving out its own).
+        """
+        step = self._geometry.steps[direction]
+        tiles = [center + offset for center in range(square + step, square + distance * step, step)
+                 for offset in self._geometry.leading[direction]]
+        return self._game_board.get_black().isdisjoint(tiles) and self._game_board.get_white().isdisjoint(tiles)
+
+    def _move_piece(self, current_square, new_square, profiler=None):
+        """
+        Moves a validated Piece, switches turns, clears the edges the new
+        footprint reaches and updates the rings.
+        Returns:
+            dict of the tiles that changed, with what they held before
+        """
+        geometry = self._geometry
+        board = self._game_board
+        changes = board.move_footprint(current_square, new_square, geometry.offsets)
+        self.update_tile_hash(changes)
+        self.toggle_game_turn()
+        if profiler is not None:
+            profiler.lap("footprint")
+
+        # only the new footprint can hold stones on the edges
+        edges = {}
+        for offset in geometry.offsets:
+            tile = new_square + offset
+            if not geometry.interior[tile] and board.get_square(tile) != '.':
+                edges[tile] = board.get_square(tile)
+                board.set_square(tile, '.')
+        if edges:
+            self.update_tile_hash(edges)
+            for tile, content in edges.items():
+                changes.setdefault(tile, content)
+        self._note_feature_changes(changes)
+        if profiler is not None:
+            profiler.lap("clear_edges")
+
+        self.ring_check(changes)
+        if profiler is not None:
+            profiler.lap("ring_check")
+            profiler.accept()
+        return changes
+
+    def move_piece(self, current_square, new_square, profiler=None):
+        """
+        Moves a Piece that has already been validated (see get_move_error),
+        then switches turns, clears the edges and updates the rings.
+        Returns:
+            True
+        """
+        self._move_piece(current_square, new_square, profiler)
+        return True
+
+    def push_move(self, current, new):
+        """
+        Makes a move like make_move, but remembers what it changed so
+        pop_move can take it back.
+        Returns:
+            False if the move is not valid, otherwise True
+        """
+        current_square = self._geometry.parse_square(current)
+        new_square = self._geometry.parse_square(new)
+        if current_square is None or new_square is None:
+            profiler = self._profiler
+            if profiler is not None:
+                profiler.start()
+                profiler.lap("validation")
+                profiler.reject("not a square")
+            return False
+        return self.push_move_squares(current_square, new_square)
+
+    def push_move_squares(self, current_square, new_square):
+        """
+        push_move for a move given as square numbers. Only the tiles
+        the move changed are remembered, with the turn, game state,
+        rings and hash from before the move.
+        Returns:
+            False if the move is not valid, otherwise True
+        """
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.start()
+        reason = self.get_move_error(current_square, new_square, None, profiler)
+        if reason is not None:
+            if profiler is not None:
+                profiler.reject(reason)
+            return False
+
+        undo = [None, self._game_turn, self._game_state, self._black_rings, self._white_rings,
+                self._ring_centers, self._hash]
+        undo[0] = self._move_piece(current_square, new_square, profiler)
+        self._undo_stack.append(undo)
+        return True
+
+    def pop_move(self):
+        """
+        Takes back the latest move made with push_move.
+        Returns:
+            False if there is no move to take back, otherwise True.
+        """
+        if not self._undo_stack:
+            return False
+        changes, self._game_turn, self._game_state, self._black_rings, self._white_rings, \
+            self._ring_centers, self._hash = self._undo_stack.pop()
+        board = self._game_board
+        self._note_feature_changes({tile: board.get_square(tile) for tile in changes})
+        for tile, content in changes.items():
+            board.set_square(tile, content)
+        return True
+
+    def generate_legal_moves(self, color=None):
+        """
+        Lists every legal move for a player color (see GessGame.generate_legal_moves).
+        Returns:
+            a list of (current, new) center pairs
+        """
+        name = self._geometry.get_square_name
+        return [(name(current_square), name(new_square))
+                for current_square, new_square in self.generate_legal_squares(color)]
+
+    def generate_legal_squares(self, color=None):
+        """
+        generate_legal_moves with square numbers. Only the centers next
+        to the player's stones are tried.
+        Returns:
+            a list of (current square, new square) pairs, by current square
+        """
+        if color is None:
+            color = self._game_turn
+        if self._game_state != "UNFINISHED":
+            return []
+
+        board = self._game_board
+        own, opponent = (board.get_black(), board.get_white()) if color == 'BLACK' else \
+            (board.get_white(), board.get_black())
+        occupied = own | opponent
+        check_last_ring = len(self._black_rings) == 1 or len(self._white_rings) == 1
+        last_ring_area = self._get_last_ring_area(color) if check_last_ring else None
+
+        moves = []
+        for square in sorted(self._get_centers_near(own) - self._get_centers_near(opponent)):
+            for new_square in self._get_destinations(square, own, occupied):
+                if not check_last_ring or self._keeps_last_ring(square, new_square, last_ring_area):
+                    moves.append((square, new_square))
+        return moves
+
+    def _get_destinations(self, square, own, occupied):
+        """
+        Walks the 8 directions from a Piece's center, like GessGame's
+        get_destinations, one footprint step at a time.
+        Parameters:
+            square = square number of the Piece's center
+            own = set of the player's stones
+            occupied = set of all the stones
+        Returns:
+            list of new square numbers
+        """
+        geometry = self._geometry
+        interior = geometry.interior
+        max_distance = geometry.size if square in own else 3
+        destinations = []
+
+        for direction, step in enumerate(geometry.steps):
+            if square + step not in own:
+                continue
+            leading = geometry.leading[direction]
+            new_square = square
+            for x in range(max_distance):
+                new_square += step
+                if not interior[new_square]:
+                    break
+                destinations.append(new_square)
+
+                # the Piece can land on stones, but can't move past them
+                if not occupied.isdisjoint([new_square + offset for offset in leading]):
+                    break
+        return destinations
+
+    def legal_destinations(self, center, color=None):
+        """
+        Lists every center a Piece can legally move to (see GessGame.legal_destinations).
+        Returns:
+            list of new centers (empty if the Piece can't move)
+        """
+        square = self._geometry.parse_square(center)
+        if square is None:
+            return []
+        return [self._geometry.get_square_name(new_square)
+                for new_square in self.legal_destination_squares(square, color)]
+
+    def legal_destination_squares(self, square, color=None):
+        """
+        legal_destinations with square numbers, kept until the position changes.
+        Returns:
+            tuple of new square numbers
+        """
+        if color is None:
+            color = self._game_turn
+        position = (self._hash, self._game_state)
+        if self._destinations_position != position:
+            self._destinations = {}
+            self._destinations_position = position
+        destinations = self._destinations.get((square, color))
+        if destinations is not None:
+            return destinations
+
+        destinations = ()
+        board = self._game_board
+        own, opponent = (board.get_black(), board.get_white()) if color == 'BLACK' else \
+            (board.get_white(), board.get_black())
+        if self._game_state == "UNFINISHED" and self._geometry.is_center(square) \
+                and not any(square + offset in opponent for offset in self._geometry.offsets):
+            destinations = self._get_destinations(square, own, board.get_black() | board.get_white())
+            if len(self._black_rings) == 1 or len(self._white_rings) == 1:
+                last_ring_area = self._get_last_ring_area(color)
+                destinations = [new_square for new_square in destinations
+                                if self._keeps_last_ring(square, new_square, last_ring_area)]
+            destinations = tuple(destinations)
+        self._destinations[(square, color)] = destinations
+        return destinations
+
+    def ring_check(self, changes=None):
+        """
+        Updates the rings of both colors and the game state. Only the
+        centers within one tile of the changed tiles are checked again
+        (all the centers next to a stone without changes), and in debug
+        mode the result is compared with a full rescan.
+        Parameter:
+            changes = optional tiles that changed since the last check
+        Returns:
+            True
+        """
+        board = self._game_board
+        geometry = self._geometry
+        if changes is None:
+            self._reset_tracking()
+        elif changes:
+            region = self._get_centers_near(changes)
+            black_found, white_found = board.get_ring_centers(region, geometry.offsets)
+            black_centers, white_centers = self._ring_centers
+            new_black_centers = (black_centers - region) | black_found
+            new_white_centers = (white_centers - region) | white_found
+            if new_black_centers != black_centers:
+                self._black_rings = geometry.get_center_names(new_black_centers)
+            if new_white_centers != white_centers:
+                self._white_rings = geometry.get_center_names(new_white_centers)
+            self._ring_centers = (new_black_centers, new_white_centers)
+
+        if self._debug:
+            found = board.get_ring_centers(self._get_centers_near(board.get_black() | board.get_white()),
+                                           geometry.offsets)
+            if tuple(found) != self._ring_centers:
+                raise AssertionError("incremental ring tracking doesn't match a full rescan")
+
+        if not self._black_rings:
+            self._game_state = 'WHITE_WON'
+        elif not self._white_rings:
+            self._game_state = 'BLACK_WON'
+        return True
+
+    def last_ring(self, current, new, color=None):
+        """
+        While the player has only one ring left, prevents moves that
+        break it (see GessGame.last_ring).
+        Returns:
+            False if the move would break the player's last ring, else True
+        """
+        return self.last_ring_squares(self._geometry.parse_square(current), self._geometry.parse_square(new), color)
+
+    def last_ring_squares(self, current_square, new_square, color=None):
+        """
+        last_ring for a move given as square numbers, with GessGame's rule:
+        when the new footprint's NE tile is on the player's first ring, none
+        of the ring's tiles may be left empty by the move, and a ring's
+        center can't be moved to the second or next to last row or column.
+        Returns:
+            False if the move would break the player's last ring, else True
+        """
+        if color is None:
+            color = self._game_turn
+        return self._keeps_last_ring(current_square, new_square, self._get_last_ring_area(color))
+
+    def _get_last_ring_area(self, color):
+        """
+        Finds the ring last_ring guards: a color's first ring, column by
+        column (like the ring lists).
+        Returns:
+            (center, set of the footprint's tiles), or (None, empty set)
+            if the color has no ring
+        """
+        geometry = self._geometry
+        rows, columns = geometry.rows, geometry.columns
+        centers = self._ring_centers[color == 'WHITE']
+        if not centers:
+            return None, frozenset()
+        last_ring = min(centers, key=lambda center: (columns[center], rows[center]))
+        return last_ring, frozenset(last_ring + offset for offset in geometry.offsets)
+
+    def _keeps_last_ring(self, current_square, new_square, last_ring_area):
+        """
+        last_ring_squares with the guarded ring already found (see _get_last_ring_area).
+        """
+        geometry = self._geometry
+        offsets = geometry.offsets
+        last_ring, area = last_ring_area
+        if current_square != last_ring and new_square + offsets[2] in area:
+            black, white = self._game_board.get_black(), self._game_board.get_white()
+            for offset in offsets:
+                tile = current_square + offset
+                if new_square + offset in area and tile not in black and tile not in white:
+                    return False
+
+        black_centers, white_centers = self._ring_centers
+        if current_square in black_centers or current_square in white_centers:
+            edges = (1, geometry.size - 2)
+            if geometry.rows[new_square] in edges or geometry.columns[new_square] in edges:
+                return False
+        return True
+
+    def direction_check(self, current, new):
+        """
+        Returns the content ('B', 'W' or '.') of the current footprint's
+        tile in the direction of the new center.
+        """
+        current_square = self._geometry.parse_square(current)
+        direction, distance = self._geometry.get_direction(current_square, self._geometry.parse_square(new))
+        return self._game_board.get_square(current_square + self._geometry.steps[direction])
+
+    def list_center_stones(self, center):
+        """
+        Returns the footprint's content of a center, as a list in the
+        order [NW, N, NE, E, SE, S, SW, W, centerx].
+        """
+        square = self._geometry.parse_square(center)
+        return [self._game_board.get_square(square + offset) for offset in self._geometry.offsets]
+
+    def search_surrounding2(self, center):
+        """
+        Find the 1-based (row, column) indexes that circle around the
+        selected center (see GessGame.search_surrounding2).
+        """
+        square = self._geometry.parse_square(center)
+        row = self._geometry.rows[square] + 1
+        column = self._geometry.columns[square] + 1
+        return [(row, column - 2), (row, column - 1), (row, column), (row - 1, column - 2), (row - 1, column - 1),
+                (row - 1, column), (row - 2, column - 2), (row - 2, column - 1), (row - 2, column)]
+
+    def path_clear(self, current, new):
+        """
+        Check for stones in the movement path from 'current center' to 'new center'.
+        Returns:
+             True if no stones in the way, else returns False.
+        """
+        current_square = self._geometry.parse_square(current)
+        new_square = self._geometry.parse_square(new)
+        if current_square is None or new_square is None or not self._geometry.is_center(new_square):
+            return False
+        return self.path_clear_squares(current_square, new_square)
+
+    def path_clear_squares(self, current_square, new_square):
+        """
+        path_clear for a straight move given as square numbers.
+        """
+        direction, distance = self._geometry.get_direction(current_square, new_square)
+        return self._is_path_clear(current_square, direction, distance)
+
+    def scan(self, location):
+        """
+        Check the content of the specified location.
+        Returns:
+             the content of the location/position
+        """
+        square = self._geometry.parse_square(location)
+        if square is None:
+            raise IndexError("board index out of range")
+        return self._game_board.get_square(square)
+
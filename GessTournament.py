@@ -0,0 +1,395 @@
+# Description: engine-vs-engine matches between two player configurations
+# (see GessSelfPlay.make_player). The games are played in pairs on a pool
+# of worker processes: both games of a pair start from the same opening,
+# and each configuration moves first (as black) in one of them. The
+# match stops early once a sequential probability ratio test (SPRT)
+# decides between two Elo hypotheses, and every finished pair is written
+# to a JSON lines file right away, so an interrupted match can resume.
+# Run with: python GessTournament.py --first engine:depth=2 --second engine:depth=1 --output match.jsonl
+
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+
+from GessDataset import read_games
+from GessGame import SQUARE_NAMES, GessGame
+from GessSelfPlay import RandomPlayer, make_player
+
+
+# the match settings that have to be the same to resume a match
+MATCH_SETTINGS = ("first", "second", "seed", "opening_moves", "openings", "max_moves",
+                  "elo0", "elo1", "alpha", "beta")
+
+# the scores a pair can get, and how many pairs of each are made up when
+# measuring the variance of the pair scores, so a one-sided match (every
+# pair won) still has one and the SPRT can stop it
+PAIR_SCORES = (0.0, 0.25, 0.5, 0.75, 1.0)
+PRIOR_PAIRS = 0.5
+
+
+def get_expected_score(elo):
+    """
+    Returns the expected score (0 to 1) of a player that is elo points
+    stronger than its opponent (the logistic Elo model).
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def get_elo(score):
+    """
+    Returns the Elo difference that gives an expected score (the inverse
+    of get_expected_score). Scores of 0 and 1 give -inf and inf.
+    """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def get_pair_statistics(pair_scores):
+    """
+    Works out the mean and variance of the pair scores. A pair is
+    counted as one sample (its two games are played from the same
+    opening, so they aren't independent). The variance also counts
+    PRIOR_PAIRS made-up pairs of every score.
+    Parameter:
+        pair_scores = score of the first configuration in every pair, from 0 to 1
+    Returns:
+        (mean, variance of one pair's score)
+    """
+    count = len(pair_scores)
+    mean = sum(pair_scores) / count
+    deviations = sum((score - mean) ** 2 for score in pair_scores)
+    deviations += PRIOR_PAIRS * sum((score - mean) ** 2 for score in PAIR_SCORES)
+    return mean, deviations / (count + PRIOR_PAIRS * len(PAIR_SCORES))
+
+
+def get_elo_estimate(pair_scores):
+    """
+    Estimates the Elo difference between the two configurations.
+    Parameter:
+        pair_scores = score of the first configuration in every pair, from 0 to 1
+    Returns:
+        (Elo difference, lower bound, upper bound) with a 95% confidence
+        interval, from the first configuration's point of view
+    """
+    mean, variance = get_pair_statistics(pair_scores)
+    margin = 1.96 * math.sqrt(variance / len(pair_scores))
+    return get_elo(mean), get_elo(mean - margin), get_elo(mean + margin)
+
+
+def get_sprt_bounds(alpha, beta):
+    """
+    Returns the (lower, upper) log-likelihood ratio bounds of an SPRT
+    with false positive rate alpha and false negative rate beta.
+    """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def get_log_likelihood_ratio(pair_scores, elo0, elo1):
+    """
+    The log-likelihood ratio of H1 (the first configuration is elo1
+    stronger) against H0 (it is elo0 stronger), with the pair scores
+    taken as normally distributed around the expected score of each
+    hypothesis, with their measured variance.
+    Parameters:
+        pair_scores = score of the first configuration in every pair, from 0 to 1
+        elo0 = Elo difference of H0
+        elo1 = Elo difference of H1
+    Returns:
+        the ratio (0 before the first pair)
+    """
+    if not pair_scores:
+        return 0.0
+    mean, variance = get_pair_statistics(pair_scores)
+    score0 = get_expected_score(elo0)
+    score1 = get_expected_score(elo1)
+    return (score1 - score0) * len(pair_scores) * (2 * mean - score0 - score1) / (2 * variance)
+
+
+def get_opening(pair, seed, opening_moves, openings=None):
+    """
+    Picks the opening of a pair: the first moves of one of the given
+    games (in turn), or random legal moves.
+    Parameters:
+        pair = the pair's number in the match
+        seed = the match's seed
+        opening_moves = number of moves in the opening
+        openings = optional list of games (lists of (current, new) moves)
+    Returns:
+        list of (current, new) moves, all legal in turn
+    """
+    if openings:
+        return [tuple(move) for move in openings[pair % len(openings)][:opening_moves]]
+
+    player = RandomPlayer(random.Random("%d-opening-%d" % (seed, pair)))
+    game = GessGame()
+    opening = []
+    while len(opening) < opening_moves and game.get_game_state() == "UNFINISHED":
+        move = player.choose_move(game)
+        if move is None:
+            break
+        game.make_move(move[0], move[1])
+        opening.append(move)
+
+    # a random opening can end the game; leave the last move out then
+    if game.get_game_state() != "UNFINISHED":
+        opening.pop()
+    return opening
+
+
+def play_match_game(opening, black, white, chooser, max_moves):
+    """
+    Plays one game from an opening.
+    Parameters:
+        opening = list of (current, new) moves to start with
+        black = description of the black player (see GessSelfPlay.make_player)
+        white = description of the white player
+        chooser = random.Random for the players' random choices
+        max_moves = the game stops as unfinished after this many moves
+        (the opening included)
+    Returns:
+        (result, number of moves)
+    """
+    players = {"BLACK": make_player(black, chooser), "WHITE": make_player(white, chooser)}
+    game = GessGame()
+    moves = 0
+    for current, new in opening:
+        if not game.make_move(current, new):
+            break
+        moves += 1
+
+    while game.get_game_state() == "UNFINISHED" and moves < max_moves:
+        move = players[game.get_game_turn()].choose_move(game)
+        if move is None or not game.make_move(move[0], move[1]):
+            break
+        moves += 1
+    return game.get_game_state(), moves
+
+
+def play_pair(pair, settings, openings=None):
+    """
+    Plays both games of a pair: the first configuration is black (and
+    moves first) in one of them and white in the other, from the same
+    opening. A game that isn't finished after max_moves is a draw.
+    Parameters:
+        pair = the pair's number in the match
+        settings = the match's settings (see run_tournament)
+        openings = optional list of games the openings are taken from
+    Returns:
+        dict with the pair's number, opening, games and the first
+        configuration's score (0 to 1)
+    """
+    opening = get_opening(pair, settings["seed"], settings["opening_moves"], openings)
+    games = []
+    points = 0.0
+    for first_color, black, white in (("BLACK", settings["first"], settings["second"]),
+                                      ("WHITE", settings["second"], settings["first"])):
+        chooser = random.Random("%d-%d-%s" % (settings["seed"], pair, first_color))
+        result, moves = play_match_game(opening, black, white, chooser, settings["max_moves"])
+        if result == "UNFINISHED":
+            points += 0.5
+        elif result == first_color + "_WON":
+            points += 1
+        games.append({"first": first_color, "result": result, "moves": moves})
+
+    return {
+        "pair": pair,
+        "opening": [list(move) for move in opening],
+        "games": games,
+        "score": points / 2,
+    }
+
+
+def _play_pair_task(arguments):
+    """
+    Unpacks play_pair's arguments for Pool.imap.
+    """
+    return play_pair(*arguments)
+
+
+def load_match(path, settings):
+    """
+    Reads back the pairs of an interrupted match. A last line that was
+    only partly written is cut off the file, so the match can go on
+    appending to it.
+    Parameters:
+        path = the match's JSON lines file
+        settings = the settings the match is resumed with
+    Returns:
+        list of the finished pairs' records (empty if the file doesn't exist)
+    """
+    if not os.path.exists(path):
+        return []
+
+    pairs = []
+    complete = 0
+    with open(path, "rb") as match_file:
+        for line in match_file:
+            if not line.endswith(b"\n"):
+                break
+            record = json.loads(line)
+            if "settings" in record:
+                saved = record["settings"]
+                for name in MATCH_SETTINGS:
+                    if saved.get(name) != settings[name]:
+                        raise ValueError("%s was played with %s=%r" % (path, name, saved.get(name)))
+            else:
+                pairs.append(record)
+            complete += len(line)
+
+    if complete != os.path.getsize(path):
+        os.truncate(path, complete)
+    return pairs
+
+
+def get_summary(pair_scores, settings, status):
+    """
+    Summarizes a match.
+    Parameters:
+        pair_scores = score of the first configuration in every pair
+        settings = the match's settings
+        status = "H0", "H1" (accepted by the SPRT) or "unfinished"
+    Returns:
+        dict with the number of pairs, the first configuration's score,
+        its Elo difference (with a 95% interval) and the SPRT's state
+    """
+    lower, upper = get_sprt_bounds(settings["alpha"], settings["beta"])
+    summary = {
+        "pairs": len(pair_scores),
+        "games": 2 * len(pair_scores),
+        "score": sum(pair_scores) / len(pair_scores) if pair_scores else 0.5,
+        "elo": 0.0,
+        "elo_lower": -math.inf,
+        "elo_upper": math.inf,
+        "llr": get_log_likelihood_ratio(pair_scores, settings["elo0"], settings["elo1"]),
+        "llr_lower": lower,
+        "llr_upper": upper,
+        "status": status,
+    }
+    if pair_scores:
+        summary["elo"], summary["elo_lower"], summary["elo_upper"] = get_elo_estimate(pair_scores)
+    return summary
+
+
+def run_tournament(path, first, second, pairs=1000, workers=None, seed=0, opening_moves=4,
+                   openings=None, max_moves=200, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05, report=None):
+    """
+    Plays a match between two configurations, or goes on with an
+    interrupted one: the pairs already in the file are counted and not
+    played again. The match stops after the given number of pairs or as
+    soon as the SPRT accepts a hypothesis, H0 (the first configuration
+    is elo0 stronger than the second) or H1 (it is elo1 stronger).
+    Parameters:
+        path = JSON lines file the pairs are written to (a settings line, then one line per pair)
+        first, second = descriptions of the two configurations (see GessSelfPlay.make_player)
+        pairs = most pairs of games to play
+        workers = number of worker processes (defaults to the number of cores)
+        seed = the match's seed
+        opening_moves = number of moves in every opening
+        openings = optional file of games to take the openings from
+        (GessRecord or JSON lines, see GessDataset.read_games), instead
+        of random ones
+        max_moves = maximum number of moves per game
+        elo0, elo1 = Elo differences of the SPRT's hypotheses
+        alpha, beta = false positive and false negative rates of the SPRT
+        report = optional function called with the summary after every pair
+    Returns:
+        the match's summary (see get_summary)
+    """
+    settings = {"first": first, "second": second, "seed": seed, "opening_moves": opening_moves,
+                "openings": openings, "max_moves": max_moves, "elo0": elo0, "elo1": elo1,
+                "alpha": alpha, "beta": beta}
+    opening_games = None
+    if openings is not None:
+        opening_games = [[(SQUARE_NAMES[current], SQUARE_NAMES[new]) for current, new in moves[:opening_moves]]
+                         for result, moves in read_games([openings])]
+
+    played = load_match(path, settings)
+    pair_scores = [record["score"] for record in played]
+    lower, upper = get_sprt_bounds(alpha, beta)
+
+    def get_status():
+        llr = get_log_likelihood_ratio(pair_scores, elo0, elo1)
+        if llr <= lower:
+            return "H0"
+        if llr >= upper:
+            return "H1"
+        return "unfinished"
+
+    status = get_status()
+    if status != "unfinished":
+        return get_summary(pair_scores, settings, status)
+
+    done = set(record["pair"] for record in played)
+    tasks = ((pair, settings, opening_games) for pair in range(pairs) if pair not in done)
+    workers = workers or multiprocessing.cpu_count()
+
+    with open(path, "a") as match_file:
+        if not played and match_file.tell() == 0:
+            match_file.write(json.dumps({"settings": settings}) + "\n")
+
+        def record(pair_record):
+            match_file.write(json.dumps(pair_record) + "\n")
+            match_file.flush()
+            pair_scores.append(pair_record["score"])
+            status = get_status()
+            if report is not None:
+                report(get_summary(pair_scores, settings, status))
+            return status
+
+        if workers == 1:
+            for task in tasks:
+                status = record(_play_pair_task(task))
+                if status != "unfinished":
+                    break
+        else:
+            # leaving the pool's block terminates the workers, so a decided
+            # match doesn't wait for the pairs still being played
+            with multiprocessing.Pool(workers) as pool:
+                for pair_record in pool.imap_unordered(_play_pair_task, tasks):
+                    status = record(pair_record)
+                    if status != "unfinished":
+                        break
+
+    return get_summary(pair_scores, settings, status)
+
+
+def main():
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Play a match between two Gess player configurations")
+    parser.add_argument("--first", required=True, help="the configuration tested (see GessSelfPlay --black)")
+    parser.add_argument("--second", required=True, help="the configuration it's tested against")
+    parser.add_argument("--output", required=True, help="JSON lines file of the match (resumed if it exists)")
+    parser.add_argument("--pairs", type=int, default=1000, help="most pairs of games to play")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the openings and the players")
+    parser.add_argument("--opening-moves", type=int, default=4, help="number of moves in every opening")
+    parser.add_argument("--openings", default=None, help="file of games (.gess or .jsonl) to take the openings from")
+    parser.add_argument("--max-moves", type=int, default=200, help="maximum number of moves per game")
+    parser.add_argument("--elo0", type=float, default=0.0, help="Elo difference of the SPRT's H0")
+    parser.add_argument("--elo1", type=float, default=10.0, help="Elo difference of the SPRT's H1")
+    parser.add_argument("--alpha", type=float, default=0.05, help="false positive rate of the SPRT")
+    parser.add_argument("--beta", type=float, default=0.05, help="false negative rate of the SPRT")
+    args = parser.parse_args()
+
+    def report(summary):
+        print("pairs=%(pairs)d score=%(score).3f elo=%(elo).1f llr=%(llr).2f (%(llr_lower).2f, %(llr_upper).2f)"
+              % summary, file=sys.stderr)
+
+    summary = run_tournament(args.output, args.first, args.second, args.pairs, args.workers, args.seed,
+                             args.opening_moves, args.openings, args.max_moves, args.elo0, args.elo1,
+                             args.alpha, args.beta, report)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# Description: vectorized ring and footprint detection for Gess.
+# Uses NumPy when it's installed; otherwise (and as the reference the
+# NumPy results are checked against) the pure-Python versions are used.
+
+
+from GessGame import BOARD_SIZE, FOOTPRINT_MASKS, INTERIOR_MASK, iterate_squares
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional
+    numpy = None
+
+
+# kinds of footprint, for every center
+EMPTY = 0
+PURE_BLACK = 1  # only black stones - a black Piece
+PURE_WHITE = 2  # only white stones - a white Piece
+MIXED = 3  # stones of both colors - can't be moved by either player
+
+
+def has_numpy():
+    """
+    Returns True if NumPy is installed (and the vectorized path is used).
+    """
+    return numpy is not None
+
+
+def get_board_array(game):
+    """
+    Converts a game's board to a 20x20 int8 array:
+    1 for black stones, -1 for white stones, and 0 for empty tiles.
+    Parameter:
+        game = the GessGame to convert
+    Returns:
+        the board array (NumPy is required)
+    """
+    board = game.get_bitboard()
+    size = BOARD_SIZE * BOARD_SIZE
+    black = _unpack_mask(board.get_black(), size)
+    white = _unpack_mask(board.get_white(), size)
+    return (black.astype(numpy.int8) - white.astype(numpy.int8)).reshape(BOARD_SIZE, BOARD_SIZE)
+
+
+def _unpack_mask(mask, size):
+    """
+    Converts a bitboard to a flat bool array (square n is element n).
+    """
+    data = numpy.frombuffer(mask.to_bytes((size + 7) // 8, "little"), dtype=numpy.uint8)
+    return numpy.unpackbits(data, bitorder="little")[:size].astype(bool)
+
+
+def _pack_mask(flags):
+    """
+    Converts a flat bool array back to a bitboard.
+    """
+    return int.from_bytes(numpy.packbits(flags, bitorder="little").tobytes(), "little")
+
+
+def _window_counts(stones):
+    """
+    Counts the stones in the 3x3 window around every interior center,
+    in one pass of 9 shifted slices (a 3x3 convolution).
+    Parameter:
+        stones = 20x20 array of 0s and 1s
+    Returns:
+        (counts of the 8 tiles around each center, counts of the whole
+        footprint), as 18x18 arrays
+    """
+    last = BOARD_SIZE - 2
+    around = numpy.zeros((last, last), dtype=numpy.int8)
+    for row in range(3):
+        for column in range(3):
+            if row != 1 or column != 1:
+                around += stones[row:row + last, column:column + last]
+    return around, around + stones[1:-1, 1:-1]
+
+
+def _interior_to_mask(flags):
+    """
+    Converts an 18x18 array of interior centers to a bitboard.
+    """
+    full = numpy.zeros((BOARD_SIZE, BOARD_SIZE), dtype=bool)
+    full[1:-1, 1:-1] = flags
+    return _pack_mask(full.ravel())
+
+
+def scan_numpy(board_array):
+    """
+    Finds the ring centers and the footprint kind of every center of
+    both colors, from a single sliding-window pass per color.
+    A ring is an empty center with 8 stones of one color around it.
+    Parameter:
+        board_array = the board from get_board_array
+    Returns:
+        (black ring centers, white ring centers, pure black centers,
+        pure white centers, mixed centers) as bitboards
+    """
+    empty = board_array[1:-1, 1:-1] == 0
+    rings = []
+    present = []
+    for color in (1, -1):
+        around, whole = _window_counts((board_array == color).astype(numpy.int8))
+        rings.append(_interior_to_mask(empty & (around == 8)))
+        present.append(whole > 0)
+
+    black, white = present
+    return (rings[0], rings[1], _interior_to_mask(black & ~white), _interior_to_mask(white & ~black),
+            _interior_to_mask(black & white))
+
+
+def find_rings_numpy(board_array):
+    """
+    Finds every ring center of both colors at once (see scan_numpy).
+    Parameter:
+        board_array = the board from get_board_array
+    Returns:
+        (black ring centers, white ring centers) as bitboards
+    """
+    return scan_numpy(board_array)[:2]
+
+
+def get_ownership_numpy(board_array):
+    """
+    Sorts every center by the stones in its footprint at once (see scan_numpy).
+    Parameter:
+        board_array = the board from get_board_array
+    Returns:
+        (pure black centers, pure white centers, mixed centers) as bitboards
+    """
+    return scan_numpy(board_array)[2:]
+
+
+def find_rings_python(game):
+    """
+    Pure-Python version of find_rings_numpy (using the bitboards).
+    Parameter:
+        game = the GessGame to check
+    Returns:
+        (black ring centers, white ring centers) as bitboards
+    """
+    return game.get_bitboard().get_ring_centers()
+
+
+def get_ownership_python(game):
+    """
+    Pure-Python version of get_ownership_numpy, checking one
+    footprint at a time.
+    Parameter:
+        game = the GessGame to check
+    Returns:
+        (pure black centers, pure white centers, mixed centers) as bitboards
+    """
+    board = game.get_bitboard()
+    black = board.get_black()
+    white = board.get_white()
+    pure_black = pure_white = mixed = 0
+
+    for square in iterate_squares(INTERIOR_MASK):
+        footprint = FOOTPRINT_MASKS[square]
+        has_black = black & footprint
+        has_white = white & footprint
+        if has_black and has_white:
+            mixed |= 1 << square
+        elif has_black:
+            pure_black |= 1 << square
+        elif has_white:
+            pure_white |= 1 << square
+    return pure_black, pure_white, mixed
+
+
+def scan(game):
+    """
+    Finds the ring centers and footprint kinds of both colors
+    (see scan_numpy), with NumPy if it's installed.
+    Parameter:
+        game = the GessGame to check
+    Returns:
+        (black ring centers, white ring centers, pure black centers,
+        pure white centers, mixed centers) as bitboards
+    """
+    if numpy is None:
+        return find_rings_python(game) + get_ownership_python(game)
+    return scan_numpy(get_board_array(game))
+
+
+def find_rings(game):
+    """
+    Finds the ring centers of both colors, with NumPy if it's installed.
+    Parameter:
+        game = the GessGame to check
+    Returns:
+        (black ring centers, white ring centers) as bitboards
+    """
+    if numpy is None:
+        return find_rings_python(game)
+    return find_rings_numpy(get_board_array(game))
+
+
+def get_ownership(game):
+    """
+    Sorts every center as pure black, pure white or mixed,
+    with NumPy if it's installed.
+    Parameter:
+        game = the GessGame to check
+    Returns:
+        (pure black centers, pure white centers, mixed centers) as bitboards
+    """
+    if numpy is None:
+        return get_ownership_python(game)
+    return get_ownership_numpy(get_board_array(game))
+
+
+def get_center_kind(ownership, square):
+    """
+    Looks up one center in the result of get_ownership.
+    Parameters:
+        ownership = (pure black, pure white, mixed) bitboards
+        square = the center's square number
+    Returns:
+        EMPTY, PURE_BLACK, PURE_WHITE or MIXED
+    """
+    pure_black, pure_white, mixed = ownership
+    if pure_black >> square & 1:
+        return PURE_BLACK
+    if pure_white >> square & 1:
+        return PURE_WHITE
+    if mixed >> square & 1:
+        return MIXED
+    return EMPTY
+
+
+def check_equivalence(game):
+    """
+    Compares the NumPy and pure-Python results for a position.
+    Parameter:
+        game = the GessGame to check
+    Returns:
+        True if both paths agree (or NumPy isn't installed), else False
+    """
+    if numpy is None:
+        return True
+    return scan_numpy(get_board_array(game)) == find_rings_python(game) + get_ownership_python(game)
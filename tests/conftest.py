@@ -0,0 +1,8 @@
+# Description: lets the tests import the Gess modules from the repository root.
+# Run with: python -m pytest tests
+
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
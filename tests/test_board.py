@@ -0,0 +1,130 @@
+# Description: tests of the bitboard game board (Bitboard) and of the
+# moves GessGame makes on it.
+
+
+import random
+
+import pytest
+
+from GessGame import BOARD_SIZE, Bitboard, GessGame, Piece, get_center_names
+
+# the 8 directions a Piece can move in, as (row step, column step)
+STEPS = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+
+
+def get_empty_grid():
+    return [['.'] * BOARD_SIZE for row in range(BOARD_SIZE)]
+
+
+def get_name(row, column):
+    return chr(column + 65) + str(row + 1)
+
+
+def test_grid_round_trip():
+    grid = GessGame().get_game_board()
+    assert sum(row.count('B') for row in grid) == sum(row.count('W') for row in grid) == 43
+    board = Bitboard.from_grid(grid)
+    assert board.get_grid() == grid
+    assert board.get_black().bit_count() == 43
+    assert board.get_occupied() == board.get_black() | board.get_white()
+
+    # the grid is a copy
+    grid[0][0] = 'B'
+    assert board.get_stone(0, 0) == '.'
+
+
+def test_stones_by_index():
+    board = Bitboard.from_grid(GessGame().get_game_board())
+    assert board.get_stone(2, 11) == '.'  # the black ring's center, L3
+    assert board.get_stone(1, 11) == 'B'
+    assert board.get_stone(-4, 11) == 'W'  # row 17, counted from the far side
+    with pytest.raises(IndexError):
+        board.get_stone(BOARD_SIZE, 0)
+
+    board.move_stone(1, 11, 5, 5)
+    assert board.get_stone(1, 11) == '.' and board.get_stone(5, 5) == 'B'
+
+
+def test_start_rings():
+    black_centers, white_centers = Bitboard.from_grid(GessGame().get_game_board()).get_ring_centers()
+    assert get_center_names(black_centers) == ["L3"]
+    assert get_center_names(white_centers) == ["L18"]
+
+
+def test_moves_clear_the_edges():
+    game = GessGame()
+    grid = game.get_game_board()
+    grid[0][0] = grid[19][19] = 'W'
+    game.update_game_board(grid)
+    assert game.make_move("L3", "L6")
+    board = game.get_game_board()
+    assert board[0][0] == board[19][19] == '.'
+
+
+@pytest.mark.parametrize("color", ["BLACK", "WHITE"])
+def test_pieces_stop_at_the_first_stone_in_every_direction(color):
+    # the original path_clear let a black piece moving up, a white piece
+    # moving down, and any piece moving left (straight or diagonally) jump the stone
+    own, other = ('B', 'W') if color == "BLACK" else ('W', 'B')
+    for row_step, column_step in STEPS:
+        for distance, legal in ((3, True), (5, False)):
+            game = GessGame()
+            grid = get_empty_grid()
+            for row in (8, 9, 10):
+                for column in (8, 9, 10):
+                    grid[row][column] = own
+            grid[9 + 4 * row_step][9 + 4 * column_step] = other
+            game.update_game_board(grid)
+            if color == "WHITE":
+                game.toggle_game_turn()
+            # the piece can land against the stone, but not move past it
+            new = get_name(9 + distance * row_step, 9 + distance * column_step)
+            assert bool(game.make_move("J10", new)) == legal
+
+
+def move_on_grid(grid, row, column, new_row, new_column):
+    """
+    Moves a footprint tile by tile, like the original Piece methods:
+    the new footprint gets the current footprint's content, and the
+    rest of the current footprint is emptied.
+    """
+    grid = [list(line) for line in grid]
+    footprint = [grid[row + y][column + x] for y in (-1, 0, 1) for x in (-1, 0, 1)]
+    for y in (-1, 0, 1):
+        for x in (-1, 0, 1):
+            grid[row + y][column + x] = '.'
+    for index, (y, x) in enumerate((y, x) for y in (-1, 0, 1) for x in (-1, 0, 1)):
+        grid[new_row + y][new_column + x] = footprint[index]
+    return grid
+
+
+def test_footprint_kernel_moves_like_the_grid():
+    chooser = random.Random(5)
+    for x in range(200):
+        grid = [[chooser.choice("BW..") for column in range(BOARD_SIZE)] for row in range(BOARD_SIZE)]
+        row, column = chooser.randint(1, 18), chooser.randint(1, 18)
+        row_step, column_step = chooser.choice(STEPS)
+        distance = chooser.randint(1, 17)
+        new_row, new_column = row + distance * row_step, column + distance * column_step
+        if not (1 <= new_row <= 18 and 1 <= new_column <= 18):
+            continue
+        expected = move_on_grid(grid, row, column, new_row, new_column)
+
+        board = Bitboard.from_grid(grid)
+        board.move_footprint(row * BOARD_SIZE + column, new_row * BOARD_SIZE + new_column)
+        assert board.get_grid() == expected
+
+        # the Piece methods kept for older callers share the kernel
+        current, new = get_name(row, column), get_name(new_row, new_column)
+        piece = Piece(Bitboard.from_grid(grid))
+        if column_step and row_step:
+            moved = piece.move_diagonal_up(current, new, new_column - column)
+        elif column_step > 0:
+            moved = piece.move_right(current, new_column - column)
+        elif column_step < 0:
+            moved = piece.move_left(current, new_column - column)
+        elif row_step > 0:
+            moved = piece.move_vertical_1(current, new_row - row)
+        else:
+            moved = piece.move_vertical_2(current, new_row - row)
+        assert moved.get_grid() == expected
@@ -0,0 +1,62 @@
+# Description: tests of the opening book (GessBook).
+
+
+import random
+
+from GessBook import OpeningBook, build_book
+from GessGame import GessGame, parse_square
+from GessRecord import GameWriter
+from GessSearch import GessEngine
+
+
+def write_games(path, games):
+    with GameWriter(path) as writer:
+        for result, moves in games:
+            writer.write_game(result, moves)
+
+
+def test_book_round_trip(tmp_path):
+    game = GessGame()
+    first, second = game.generate_legal_moves()[:2]
+    game.make_move(*first)
+    reply = game.generate_legal_moves()[0]
+    # the first move is played three times and won twice, the second once
+    games = [("BLACK_WON", [first, reply]), ("BLACK_WON", [first]), ("WHITE_WON", [first, reply]),
+             ("BLACK_WON", [second])]
+    records = str(tmp_path / "games.gess")
+    write_games(records, games)
+
+    path = str(tmp_path / "book.bin")
+    assert build_book([records], path, max_ply=20, min_count=2) == 2
+    with OpeningBook(path) as book:
+        assert len(book) == 2
+        start = GessGame()
+        assert book.lookup(start.get_hash()) == [(parse_square(first[0]), parse_square(first[1]), 3, 2)]
+        assert book.get_moves(start) == [(first, 3, 2 / 3)]
+        assert book.choose_move(start) == first
+        assert book.choose_move(start, min_count=4) is None
+        assert book.choose_move(start, chooser=random.Random(0)) == first
+
+        # the engine plays book moves without searching
+        result = GessEngine(2, book=book).search(start)
+        assert result.get_best_move() == first and result.get_depth() == 0
+
+        assert book.get_moves(game) == [(reply, 2, 0.5)]
+        game.make_move(*reply)
+        assert book.get_moves(game) == []
+        assert book.choose_move(game) is None
+
+
+def test_book_max_ply(tmp_path):
+    game = GessGame()
+    first = game.generate_legal_moves()[0]
+    game.make_move(*first)
+    reply = game.generate_legal_moves()[0]
+    records = str(tmp_path / "games.gess")
+    write_games(records, [("BLACK_WON", [first, reply])] * 2)
+
+    path = str(tmp_path / "book.bin")
+    assert build_book([records], path, max_ply=1) == 1
+    with OpeningBook(path) as book:
+        assert book.choose_move(GessGame()) == first
+        assert book.choose_move(game) is None
@@ -0,0 +1,76 @@
+# Description: tests of the training-data pipeline (GessDataset).
+
+
+import io
+import json
+
+from GessDataset import get_plane, iterate_chunks, read_games, replay_games, write_chunks
+from GessGame import SQUARE_NAMES, GessGame
+from GessRecord import encode_move
+from GessSelfPlay import run_self_play
+
+
+def write_games(path, count):
+    output = io.StringIO()
+    run_self_play(count, output, workers=1, seed=5, max_moves=30)
+    path.write_text(output.getvalue())
+
+
+def get_expected_samples(games):
+    """
+    Replays the games directly, and packs the samples like replay_games.
+    """
+    planes, sides, results, moves = bytearray(), bytearray(), bytearray(), bytearray()
+    values = {"UNFINISHED": 0, "BLACK_WON": 1, "WHITE_WON": -1}
+    for result, game_moves in games:
+        game = GessGame()
+        for current, new in game_moves:
+            side = 1 if game.get_game_turn() == "BLACK" else -1
+            planes += get_plane(game.get_bitboard().get_black()) + get_plane(game.get_bitboard().get_white())
+            sides.append(side & 0xFF)
+            results.append(values[result] * side & 0xFF)
+            moves += encode_move(current, new).to_bytes(2, "little")
+            assert game.make_move(SQUARE_NAMES[current], SQUARE_NAMES[new])
+    return bytes(planes), bytes(sides), bytes(results), bytes(moves)
+
+
+def join_chunks(chunks):
+    return tuple(b"".join(bytes(chunk[key]) for chunk in chunks) for key in ("planes", "side", "result", "move"))
+
+
+def test_samples_match_a_direct_replay(tmp_path):
+    path = tmp_path / "games.jsonl"
+    write_games(path, 12)
+    games = list(read_games([str(path)]))
+    expected = get_expected_samples(games)
+
+    chunks = list(iterate_chunks([str(path)], chunk_size=20, workers=1, games_per_task=5))
+    assert [chunk["count"] for chunk in chunks[:-1]] == [20] * (len(chunks) - 1)
+    assert sum(chunk["count"] for chunk in chunks) == sum(len(moves) for result, moves in games)
+    assert join_chunks(chunks) == expected
+
+    # several workers hand back the same samples, in the same order
+    chunks = list(iterate_chunks([str(path)], chunk_size=20, workers=2, games_per_task=5, max_in_flight=2))
+    assert join_chunks(chunks) == expected
+
+    assert write_chunks(chunks, str(tmp_path / "chunks")) == (len(chunks), len(expected[1]))
+
+
+def test_illegal_move_gets_no_sample():
+    game = GessGame()
+    first = game.generate_legal_squares()[0]
+    # the same Piece can't move again: it's white's turn
+    samples = replay_games([("BLACK_WON", [first, first])])
+    assert samples[0] == 1
+    assert samples[4] == encode_move(*first).to_bytes(2, "little")
+
+
+def test_malformed_square_skips_game(tmp_path):
+    move = [SQUARE_NAMES[square] for square in GessGame().generate_legal_squares()[0]]
+    path = tmp_path / "games.jsonl"
+    path.write_text(json.dumps({"result": "BLACK_WON", "moves": [["Z99", "L6"]]}) + "\n"
+                    + json.dumps({"result": "WHITE_WON", "moves": [move]}) + "\n")
+
+    assert [result for result, moves in read_games([str(path)])] == ["WHITE_WON"]
+    chunks = list(iterate_chunks([str(path)], workers=1))
+    assert sum(chunk["count"] for chunk in chunks) == 1
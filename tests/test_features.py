@@ -0,0 +1,44 @@
+# Description: tests of the evaluation features (FeatureAccumulator).
+
+
+import random
+
+from GessGame import FeatureAccumulator, GessGame
+
+
+def test_features_follow_moves_and_take_backs():
+    chooser = random.Random(4)
+    for x in range(10):
+        game = GessGame()
+        for y in range(80):
+            moves = game.generate_legal_squares()
+            if not moves or game.get_game_state() != "UNFINISHED":
+                break
+            before = game.get_features()
+            game.push_move_squares(*chooser.choice(moves))
+            fresh = FeatureAccumulator(game.get_bitboard()).get_features()
+            assert {key: value for key, value in game.get_features().items() if not key.endswith("_rings")} == fresh
+            if chooser.random() < 0.3:
+                game.pop_move()
+                assert game.get_features() == before
+
+
+def test_accumulator_matches_a_full_count_after_every_move():
+    chooser = random.Random(8)
+    for x in range(40):
+        game = GessGame()
+        accumulator = FeatureAccumulator(game.get_bitboard())
+        for y in range(80):
+            moves = game.generate_legal_squares()
+            if not moves or game.get_game_state() != "UNFINISHED":
+                break
+            game.push_move_squares(*chooser.choice(moves))
+            # sometimes take the move back, or let two moves' changes pile up
+            if chooser.random() < 0.2:
+                game.pop_move()
+            if chooser.random() < 0.3:
+                continue
+            accumulator.update(game.get_bitboard())
+            fresh = FeatureAccumulator(game.get_bitboard())
+            assert accumulator.get_features() == fresh.get_features()
+            assert accumulator.get_differences() == fresh.get_differences()
@@ -0,0 +1,39 @@
+# Description: tests of forking games and their memory accounting.
+
+
+from GessGame import GessGame
+
+
+def test_fork_is_independent():
+    game = GessGame()
+    game.push_move("L3", "L6")
+    fork = game.fork()
+    # the fork has no moves of its own to take back
+    assert not fork.pop_move()
+    assert fork.make_move("L18", "L15")
+    assert game.get_game_turn() == "WHITE"
+    assert game.get_hash() != fork.get_hash()
+    assert game.get_game_board() != fork.get_game_board()
+    assert game.get_rings("WHITE") == ["L18"] and fork.get_rings("WHITE") == ["L15"]
+
+    assert game.pop_move()
+    assert game.get_game_board() == GessGame().get_game_board()
+
+
+def test_memory_usage_counts_container_contents():
+    game = GessGame()
+    before = game.get_memory_usage()
+    for center in ("L3", "C3", "F3", "R3"):
+        game.legal_destinations(center)
+    assert game.get_memory_usage() > before
+
+    # a fork only adds what it doesn't share with the game
+    seen = set()
+    game.get_memory_usage(seen)
+    assert game.fork().get_memory_usage(seen) < before
+
+
+def test_memory_usage_leaves_out_shared_geometry():
+    small = GessGame(board_size=40).get_memory_usage()
+    large = GessGame(board_size=100).get_memory_usage()
+    assert large < 2 * small
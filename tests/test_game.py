@@ -0,0 +1,138 @@
+# Description: tests of the GessGame move generator against make_move,
+# on positions from random games, and of the square numbers and path
+# masks it works with.
+
+
+import random
+
+from GessGame import CENTER_RAYS, DIRECTIONS, PATH_MASKS, SQUARE_NAMES, GessGame, parse_square
+
+CENTERS = [chr(column + 65) + str(row + 1) for row in range(1, 19) for column in range(1, 19)]
+
+
+def copy_game(game):
+    """
+    Sets up a new game at the same position (stones and turn).
+    """
+    copy = GessGame()
+    copy.update_game_board(game.get_game_board())
+    copy.ring_check()
+    if copy.get_game_turn() != game.get_game_turn():
+        copy.toggle_game_turn()
+    return copy
+
+
+def get_line_moves(center):
+    """
+    Lists the moves from a center along its rows, columns and diagonals.
+    """
+    column = ord(center[0]) - 65
+    row = int(center[1:]) - 1
+    moves = []
+    for row_step in (-1, 0, 1):
+        for column_step in (-1, 0, 1):
+            for distance in range(1, 18):
+                new_row = row + distance * row_step
+                new_column = column + distance * column_step
+                if (row_step or column_step) and 1 <= new_row <= 18 and 1 <= new_column <= 18:
+                    moves.append((center, chr(new_column + 65) + str(new_row + 1)))
+    return moves
+
+
+def get_random_positions(count, seed, max_moves=60):
+    """
+    Plays random games and returns one unfinished position from each.
+    """
+    chooser = random.Random(seed)
+    positions = []
+    for x in range(count):
+        game = GessGame()
+        for y in range(chooser.randrange(max_moves)):
+            moves = game.generate_legal_moves()
+            if not moves:
+                break
+            move = chooser.choice(moves)
+            if copy_game(game).make_move(*move) and game.get_game_state() == "UNFINISHED":
+                before = copy_game(game)
+                game.make_move(*move)
+                if game.get_game_state() != "UNFINISHED":
+                    game = before
+                    break
+        positions.append(game)
+    return positions
+
+
+def test_generated_moves_are_exactly_the_legal_ones():
+    for game in [GessGame()] + get_random_positions(3, seed=1):
+        generated = game.generate_legal_moves()
+        assert len(generated) == len(set(generated))
+        # a rejected move leaves the copy as it was, so it's only set up again after a legal one
+        legal = set()
+        copy = copy_game(game)
+        for center in CENTERS:
+            for move in get_line_moves(center):
+                if copy.make_move(*move):
+                    legal.add(move)
+                    copy = copy_game(game)
+        assert set(generated) == legal
+
+
+def test_square_names_are_parsed_once():
+    for center in CENTERS:
+        square = parse_square(center)
+        assert SQUARE_NAMES[square] == center
+        assert parse_square(center.lower()) == square
+    assert parse_square("Z99") is None
+
+
+def test_square_moves_match_named_moves():
+    for game in [GessGame()] + get_random_positions(3, seed=2):
+        squares = game.generate_legal_squares()
+        assert [(SQUARE_NAMES[current], SQUARE_NAMES[new]) for current, new in squares] \
+            == game.generate_legal_moves()
+        for current, new in squares[::25]:
+            assert game.get_move_error(current, new) is None
+            copy = copy_game(game)
+            copy.push_move_squares(current, new)
+            named = copy_game(game)
+            assert named.make_move(SQUARE_NAMES[current], SQUARE_NAMES[new])
+            assert copy.get_game_board() == named.get_game_board()
+
+
+def test_path_masks_hold_the_tiles_swept_on_the_way():
+    for center in CENTERS[::7]:
+        square = parse_square(center)
+        row, column = divmod(square, 20)
+        for direction, (row_step, column_step) in enumerate(DIRECTIONS):
+            for distance in range(1, len(CENTER_RAYS[square][direction]) + 1):
+                # tiles next to a center passed on the way, but not next to the start
+                swept = 0
+                for y in range(20):
+                    for x in range(20):
+                        passed = any(abs(y - row - step * row_step) <= 1 and abs(x - column - step * column_step) <= 1
+                                     for step in range(1, distance))
+                        if passed and (abs(y - row) > 1 or abs(x - column) > 1):
+                            swept |= 1 << (y * 20 + x)
+                assert PATH_MASKS[square][direction][distance - 1] == swept
+
+
+def test_legal_destinations_match_generated_moves():
+    for game in get_random_positions(3, seed=2):
+        moves = game.generate_legal_squares()
+        for current in set(current for current, new in moves):
+            expected = sorted(new for move_current, new in moves if move_current == current)
+            assert sorted(game.legal_destination_squares(current)) == expected
+            # asking again gives the cached answer
+            assert sorted(game.legal_destination_squares(current)) == expected
+
+
+def test_legal_destinations_follow_the_position():
+    game = GessGame()
+    assert "L6" in game.legal_destinations("L3")
+    assert game.legal_destinations("Z99") == []
+    game.make_move("L3", "L6")
+    # it's white's turn, and the Piece has moved
+    assert game.legal_destinations("L6") == []
+    assert "L6" not in game.legal_destinations("L3", "BLACK")
+    assert game.legal_destinations("L6", "BLACK") == \
+        [SQUARE_NAMES[new] for current, new in game.generate_legal_squares("BLACK") if SQUARE_NAMES[current] == "L6"]
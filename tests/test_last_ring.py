@@ -0,0 +1,78 @@
+# Description: tests of the last-ring rule and its ring-safety index,
+# against the original last_ring worked out on the board grid.
+
+
+import random
+
+from GessGame import INTERIOR_MASK, SQUARE_NAMES, GessGame, get_direction, iterate_squares, parse_square
+
+
+def get_surroundings(center):
+    """
+    The (row, column) indexes of a footprint, in the order the original
+    search_surrounding2 listed them (SW, S, SE, W, center, E, NW, N, NE).
+    """
+    row = int(center[1:]) - 1
+    column = ord(center[0]) - 65
+    return [(row + row_step, column + column_step)
+            for row_step in (1, 0, -1) for column_step in (-1, 0, 1)]
+
+
+def keeps_last_ring(game, current, new):
+    """
+    The original last_ring on the game's grid: the new footprint may not
+    leave a tile of the player's first ring empty (checked when its NE
+    tile is on the ring), and a ring can't be moved next to the edge.
+    """
+    grid = game.get_game_board()
+    last_ring = game.get_rings(game.get_game_turn())[0]
+    area = get_surroundings(last_ring)
+    new_surrounding = get_surroundings(new)
+    current_surrounding = get_surroundings(current)
+
+    if current != last_ring and new_surrounding[-1] in area:
+        for index, tile in enumerate(new_surrounding):
+            row, column = current_surrounding[index]
+            if tile in area and grid[row][column] == '.':
+                return False
+
+    rings = game.get_rings("BLACK") + game.get_rings("WHITE")
+    if current in rings and (new[0] in "BS" or new[1:] in ("2", "19")):
+        return False
+    return True
+
+
+def test_last_ring_rejections_match_the_original_rule():
+    chooser = random.Random(11)
+    centers = [(square, SQUARE_NAMES[square]) for square in iterate_squares(INTERIOR_MASK)]
+    checked = 0
+    for x in range(6):
+        game = GessGame()
+        for y in range(chooser.randrange(0, 8)):
+            moves = game.generate_legal_squares()
+            if not moves:
+                break
+            game.move_piece(*chooser.choice(moves))
+        if game.get_game_state() != "UNFINISHED":
+            continue
+        one_ring = len(game.get_rings("BLACK")) == 1 or len(game.get_rings("WHITE")) == 1
+
+        for current, current_name in centers:
+            for new, new_name in centers:
+                if get_direction(current, new) is None:
+                    continue
+                # the last ring is checked after the direction and before the path
+                reason = game.get_move_error(current, new)
+                if reason in (None, "last ring", "path blocked"):
+                    assert (reason == "last ring") == (one_ring and not keeps_last_ring(game, current_name, new_name))
+                    checked += 1
+    assert checked > 500
+
+
+def test_start_position_last_ring_moves():
+    game = GessGame()
+    assert len(game.generate_legal_squares()) == 380
+    # the Piece would land on the only black ring (centered on L3) with an empty tile
+    assert game.get_move_error(parse_square("J2"), parse_square("K3")) == "last ring"
+    assert not game.make_move("J2", "K3")
+    assert game.make_move("L3", "L6")
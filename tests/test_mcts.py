@@ -0,0 +1,53 @@
+# Description: tests of the Monte Carlo tree search engine (GessMCTS).
+
+
+from GessGame import GessGame
+from GessMCTS import MCTSEngine
+
+
+def test_search_plays_a_legal_move():
+    game = GessGame()
+    board = game.get_game_board()
+    engine = MCTSEngine(playouts=30, seed=3)
+    result = engine.search(game)
+    assert result.get_nodes() == 30
+    assert result.get_best_move() in game.generate_legal_moves()
+    assert result.get_principal_variation()[0] == result.get_best_move()
+    assert 1 < engine.get_pool().get_size() <= engine.get_pool().get_capacity()
+    assert game.get_game_board() == board and game.get_game_turn() == "BLACK"
+
+
+def test_search_reuses_played_subtree():
+    game = GessGame()
+    engine = MCTSEngine(playouts=60, seed=1)
+    result = engine.search(game)
+    line = result.get_principal_variation()
+    assert line[0] == result.get_best_move() and len(line) > 1
+    size = engine.get_pool().get_size()
+
+    # after the best move, the tree below it is the new root's: the rest
+    # goes back to the pool, and its most visited line is still there
+    game.make_move(*line[0])
+    engine.search(game, playouts=1)
+    assert 1 < engine.get_pool().get_size() < size
+    assert engine.get_principal_variation()[0] == line[1]
+
+
+def test_full_pool_keeps_searching():
+    # room for the root's children and one more expansion
+    game = GessGame()
+    moves = len(game.generate_legal_squares())
+    engine = MCTSEngine(playouts=40, max_nodes=2 * moves + 50, seed=2)
+    pool = engine.get_pool()
+
+    result = engine.search(game)
+    assert result.get_best_move() is not None
+    assert result.get_nodes() == 40
+    size = pool.get_size()
+    assert size <= pool.get_capacity()
+    assert not pool.has_room(moves)
+
+    # the full tree doesn't grow, and nodes aren't handed out and given back
+    engine.search(game)
+    assert pool.get_size() == size
+    assert len(pool.parents) == size
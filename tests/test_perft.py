@@ -0,0 +1,26 @@
+# Description: perft counts of the move generator (GessPerft), against
+# its pinned reference counts.
+
+
+import pytest
+
+from GessPerft import REFERENCE_COUNTS, divide, get_position, perft, verify
+
+
+def test_reference_counts_match():
+    assert verify(max_depth=2) == []
+
+
+@pytest.mark.parametrize("name", sorted(REFERENCE_COUNTS))
+def test_perft_takes_its_moves_back(name):
+    game = get_position(name)
+    before = (game.get_hash(), game.get_game_board(), game.get_game_turn())
+    assert perft(game, 2) == REFERENCE_COUNTS[name][2]
+    assert (game.get_hash(), game.get_game_board(), game.get_game_turn()) == before
+
+
+def test_divide_adds_up_to_perft():
+    game = get_position("rings_moved")
+    counts = divide(game, 2)
+    assert len(counts) == REFERENCE_COUNTS["rings_moved"][1]
+    assert sum(counts.values()) == REFERENCE_COUNTS["rings_moved"][2]
@@ -0,0 +1,51 @@
+# Description: tests of the compact position snapshots (GessGame.Position).
+
+
+from GessGame import Bitboard, GessGame, Position, record_random_games
+
+
+def test_start_position():
+    position = GessGame().get_position()
+    assert len(position) == 53
+    assert position.get_game_turn() == "BLACK"
+    assert position.get_game_state() == "UNFINISHED"
+
+
+def test_positions_round_trip():
+    game = GessGame()
+    seen = {}
+    for current, new in record_random_games(1, max_moves=60, seed=6)[0]:
+        game.make_move(current, new)
+        position = Position.from_game(game)
+        assert position == game.get_position()
+        board = position.get_bitboard()
+        assert (board.get_black(), board.get_white()) == (game.get_bitboard().get_black(),
+                                                          game.get_bitboard().get_white())
+        assert position.get_game_turn() == game.get_game_turn()
+        assert position.get_game_state() == game.get_game_state()
+
+        restored = position.to_game()
+        assert restored.get_position() == position
+        assert restored.get_hash() == game.get_hash()
+        assert restored.get_game_board() == game.get_game_board()
+        assert sorted(restored.generate_legal_moves()) == sorted(game.generate_legal_moves())
+        seen[position] = game.get_hash()
+    # positions are hashable
+    assert all(Position(position) in seen for position in seen)
+
+
+def test_turn_and_state_round_trip():
+    board = GessGame().get_bitboard()
+    for turn in ("BLACK", "WHITE"):
+        for state in ("UNFINISHED", "BLACK_WON", "WHITE_WON"):
+            position = Position.from_board(board, turn, state)
+            assert (position.get_game_turn(), position.get_game_state()) == (turn, state)
+            game = position.to_game()
+            assert (game.get_game_turn(), game.get_game_state()) == (turn, state)
+
+
+def test_edge_stones_left_out():
+    # a stone on the edge (square 0 is A1) isn't packed
+    board = GessGame().get_bitboard()
+    with_edge = Bitboard(board.get_black() | 1, board.get_white())
+    assert Position.from_board(with_edge) == Position.from_board(board)
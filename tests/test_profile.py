@@ -0,0 +1,31 @@
+# Description: tests of the per-phase move profiler (GessProfile).
+
+
+from GessGame import GessGame, record_random_games
+from GessProfile import MoveProfiler, profile_games
+
+
+def test_unparseable_squares_are_counted_by_make_move_and_push_move():
+    for board_size in (20, 30):
+        profiler = MoveProfiler()
+        game = GessGame(profiler=profiler, board_size=board_size)
+        assert not game.make_move("Z99", "L6")
+        assert not game.push_move("L3", "??")
+        assert not game.push_move("B2", "B9")
+        assert game.push_move(*game.generate_legal_moves()[0])
+
+        snapshot = profiler.get_snapshot()
+        assert snapshot["moves"] == 4
+        assert snapshot["accepted"] == 1
+        assert snapshot["rejected"] == 3
+        assert snapshot["rejections"]["not a square"] == 2
+        assert snapshot["phases"]["validation"]["calls"] == 4
+
+
+def test_profile_games_replays_every_move():
+    games = record_random_games(3, seed=1)
+    snapshot = profile_games(games, attempts=2).get_snapshot()
+    moves = sum(len(moves) for moves in games)
+    assert snapshot["moves"] == 3 * moves
+    assert snapshot["accepted"] >= moves
+    assert snapshot["rejected"] == sum(snapshot["rejections"].values())
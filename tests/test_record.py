@@ -0,0 +1,105 @@
+# Description: tests of the binary game records (GessRecord).
+
+
+import random
+
+import pytest
+
+from GessGame import GessGame
+from GessRecord import (INTERIOR_SQUARES, GameReader, GameWriter, decode_move, decode_position, encode_move,
+                        encode_position)
+
+
+def get_random_games(count, max_moves, seed):
+    """
+    Plays random games.
+    Returns:
+        a list of (result, list of (current, new) moves)
+    """
+    chooser = random.Random(seed)
+    games = []
+    for x in range(count):
+        game = GessGame()
+        moves = []
+        while len(moves) < max_moves and game.get_game_state() == "UNFINISHED":
+            legal = game.generate_legal_moves()
+            if not legal:
+                break
+            moves.append(chooser.choice(legal))
+            assert game.make_move(*moves[-1])
+        games.append((game.get_game_state(), moves))
+    return games
+
+
+def get_position(game):
+    board = game.get_bitboard()
+    return board.get_black(), board.get_white(), game.get_game_turn(), game.get_game_state()
+
+
+def play(moves):
+    """
+    Replays (current, new) moves from the start.
+    Returns:
+        the list of positions (see get_position), the start first
+    """
+    game = GessGame()
+    positions = [get_position(game)]
+    for current, new in moves:
+        assert game.make_move(current, new)
+        positions.append(get_position(game))
+    return positions
+
+
+def test_move_codes_round_trip():
+    game = GessGame()
+    for current, new in game.generate_legal_squares():
+        assert decode_move(encode_move(current, new)) == (current, new)
+    with pytest.raises(ValueError):
+        encode_move(INTERIOR_SQUARES[0], INTERIOR_SQUARES[0])
+    with pytest.raises(ValueError):
+        encode_move(INTERIOR_SQUARES[0], None)
+
+
+@pytest.mark.parametrize("positions", [False, True])
+def test_bad_moves_are_not_written(tmp_path, positions):
+    with GameWriter(str(tmp_path / "games.gess"), positions) as writer:
+        with pytest.raises(ValueError, match="Z99"):
+            writer.write_game("UNFINISHED", [("L3", "Z99")])
+        # J2-K3 would break black's last ring
+        with pytest.raises(ValueError, match="illegal move J2-K3"):
+            writer.write_game("UNFINISHED", [("J2", "K3")])
+        writer.write_game("UNFINISHED", [("L3", "L6")])
+    with GameReader(str(tmp_path / "games.gess")) as reader:
+        assert len(reader) == 1
+
+
+@pytest.mark.parametrize("positions", [False, True])
+def test_games_round_trip(tmp_path, positions):
+    games = get_random_games(5, max_moves=40, seed=3)
+    path = str(tmp_path / "games.gess")
+    with GameWriter(path, positions) as writer:
+        for result, moves in games:
+            writer.write_game(result, moves)
+
+    with GameReader(path) as reader:
+        assert len(reader) == len(games)
+        assert reader.has_positions() == positions
+        assert reader.get_position_count() == sum(len(moves) + 1 for result, moves in games)
+        assert list(reader) == games
+
+        position_number = 0
+        for game_number, (result, moves) in enumerate(games):
+            for move_number, expected in enumerate(play(moves)):
+                assert reader.find_position(position_number) == (game_number, move_number)
+                assert get_position(reader.get_position(position_number)) == expected
+                position_number += 1
+        with pytest.raises(IndexError):
+            reader.find_position(position_number)
+
+
+def test_positions_round_trip():
+    game = GessGame()
+    for current, new in get_random_games(1, max_moves=30, seed=4)[0][1]:
+        assert get_position(decode_position(encode_position(game))) == get_position(game)
+        game.make_move(current, new)
+    assert get_position(decode_position(encode_position(game))) == get_position(game)
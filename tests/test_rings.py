@@ -0,0 +1,53 @@
+# Description: tests of the incremental ring tracking in ring_check,
+# against a full rescan of the board.
+
+
+import random
+
+from GessGame import Bitboard, GessGame, get_center_names
+
+CENTERS = [chr(column + 65) + str(row + 1) for row in range(1, 19) for column in range(1, 19)]
+STEPS = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+
+
+def make_random_move(game, chooser):
+    """
+    Tries random short moves until one is legal.
+    Returns:
+        True if a move was made
+    """
+    for x in range(5000):
+        center = chooser.choice(CENTERS)
+        row_step, column_step = chooser.choice(STEPS)
+        distance = chooser.randint(1, 3)
+        column = ord(center[0]) - 65 + distance * column_step
+        row = int(center[1:]) - 1 + distance * row_step
+        if game.make_move(center, chr(column + 65) + str(row + 1)):
+            return True
+    return False
+
+
+def test_rings_follow_random_games():
+    chooser = random.Random(2)
+    ended = 0
+    for x in range(30):
+        # in debug mode, every ring_check is compared with a full rescan
+        game = GessGame(debug=True)
+        for y in range(40):
+            if game.get_game_state() != "UNFINISHED" or not make_random_move(game, chooser):
+                break
+        if game.get_game_state() != "UNFINISHED":
+            ended += 1
+            black, white = Bitboard.from_grid(game.get_game_board()).get_ring_centers()
+            loser = black if game.get_game_state() == "WHITE_WON" else white
+            assert get_center_names(loser) == []
+    assert ended
+
+
+def test_board_edits_are_picked_up():
+    game = GessGame(debug=True)
+    grid = game.get_game_board()
+    grid[2][11] = 'B'  # fills the center of black's only ring (L3)
+    game.update_game_board(grid)
+    game.ring_check()
+    assert game.get_game_state() == "WHITE_WON"
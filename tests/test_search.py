@@ -0,0 +1,215 @@
+# Description: tests of the Zobrist position hash, the transposition
+# table and the alpha-beta engine (GessSearch).
+
+
+import random
+
+from GessGame import ZOBRIST_WHITE_TURN, Bitboard, GessGame, get_zobrist_changes, parse_square
+from GessSearch import (DEFAULT_DEPTH, ENTRY_BYTES, EXACT, LOWER_BOUND, UPPER_BOUND, WIN_SCORE, GessEngine,
+                        ParallelEngine, TranspositionTable, get_search_depth)
+
+
+def get_fresh_hash(game):
+    """
+    Hashes a game's position from scratch.
+    """
+    board = Bitboard.from_grid(game.get_game_board())
+    fresh = get_zobrist_changes(board.get_black(), board.get_white())
+    return fresh ^ ZOBRIST_WHITE_TURN if game.get_game_turn() == "WHITE" else fresh
+
+
+def test_hash_follows_moves_and_take_backs():
+    chooser = random.Random(6)
+    for x in range(20):
+        game = GessGame()
+        hashes = []
+        for y in range(40):
+            moves = game.generate_legal_moves()
+            if not moves or game.get_game_state() != "UNFINISHED":
+                break
+            hashes.append(game.get_hash())
+            assert game.push_move(*chooser.choice(moves))
+            assert game.get_hash() == get_fresh_hash(game)
+        while hashes:
+            game.pop_move()
+            assert game.get_hash() == hashes.pop()
+
+
+def test_transposed_moves_reach_the_same_hash():
+    first = GessGame()
+    for move in (("L3", "L6"), ("L18", "L15"), ("E3", "E4")):
+        assert first.make_move(*move)
+    second = GessGame()
+    for move in (("E3", "E4"), ("L18", "L15"), ("L3", "L6")):
+        assert second.make_move(*move)
+    assert first.get_game_board() == second.get_game_board()
+    assert first.get_hash() == second.get_hash()
+    assert first.get_hash() != GessGame().get_hash()
+
+
+def test_table_size_follows_the_memory_budget():
+    for memory_mb in (0, 0.01, 1, 16):
+        capacity = TranspositionTable(memory_mb).get_capacity()
+        # two entries per bucket, a power of two of buckets, within the budget
+        assert capacity >= 2 and capacity & (capacity - 1) == 0
+        assert capacity == 2 or capacity * ENTRY_BYTES <= memory_mb * 1024 * 1024
+        assert 2 * capacity * ENTRY_BYTES > memory_mb * 1024 * 1024
+    assert TranspositionTable(0).get_capacity() == 2
+
+
+def test_table_prefers_deeper_entries():
+    # with no memory budget, every key lands in the same bucket
+    table = TranspositionTable(0)
+    table.store(1, 5, 10, EXACT, (1, 2))
+    table.store(2, 2, 20, LOWER_BOUND, (3, 4))
+    assert table.probe(1) == (5, 10, EXACT, (1, 2))
+    assert table.probe(2) == (2, 20, LOWER_BOUND, (3, 4))
+
+    # a shallower result goes to the always-replace entry
+    table.store(3, 1, 30, UPPER_BOUND, None)
+    assert table.probe(1) is not None and table.probe(2) is None
+    assert table.probe(3) == (1, 30, UPPER_BOUND, None)
+
+    # a deeper one takes the depth-preferred entry, which moves down
+    table.store(4, 7, 40, EXACT, None)
+    assert table.probe(4) == (7, 40, EXACT, None)
+    assert table.probe(1) == (5, 10, EXACT, (1, 2))
+    assert table.probe(3) is None
+
+    # a position's new result replaces its own entry, however shallow
+    table.store(4, 1, 41, EXACT, None)
+    assert table.probe(4) == (1, 41, EXACT, None)
+    assert table.probe(1) is not None
+    assert table.get_stats()["stored"] == 2
+
+
+def test_table_replaces_entries_of_older_searches():
+    table = TranspositionTable(0)
+    table.store(1, 9, 10, EXACT, None)
+    table.store(2, 1, 20, EXACT, None)
+    table.store(3, 1, 30, EXACT, None)
+    assert table.probe(1) is not None and table.probe(2) is None
+
+    # in the next search the deep entry is old, and gives way to a shallow one
+    table.new_search()
+    table.store(4, 1, 40, EXACT, None)
+    assert table.probe(4) == (1, 40, EXACT, None)
+    assert table.probe(1) == (9, 10, EXACT, None)
+    assert table.probe(3) is None
+    table.store(5, 0, 50, EXACT, None)
+    assert table.probe(4) is not None and table.probe(1) is None
+
+    table.clear()
+    assert table.probe(4) is None
+    assert table.get_stats() == {"capacity": 2, "stored": 0, "probes": 1, "hits": 0}
+
+
+def get_winning_position():
+    """
+    Plays random games until the player to move has a winning move,
+    and returns that game (the player to move wins in one).
+    """
+    chooser = random.Random(9)
+    while True:
+        game = GessGame()
+        for x in range(300):
+            if game.get_game_state() != "UNFINISHED":
+                break
+            moves = game.generate_legal_moves()
+            if not moves:
+                break
+            player = game.get_game_turn()
+            for move in moves:
+                game.push_move(*move)
+                state = game.get_game_state()
+                game.pop_move()
+                if state == player + "_WON":
+                    return game
+            game.push_move(*chooser.choice(moves))
+
+
+def test_search_returns_a_legal_move_and_leaves_the_game_alone():
+    game = GessGame()
+    board = game.get_game_board()
+    depths = []
+    result = GessEngine(memory_mb=1).search(game, max_depth=2, report=lambda x: depths.append(x.get_depth()))
+
+    assert depths == [1, 2]
+    assert result.get_depth() == 2 and result.get_nodes() > 0
+    assert result.get_best_move() in game.generate_legal_moves()
+    assert result.get_principal_variation()[0] == result.get_best_move()
+    assert game.get_game_board() == board and game.get_game_turn() == "BLACK"
+
+
+def test_search_finds_a_win_in_one():
+    game = get_winning_position()
+    player = game.get_game_turn()
+    result = GessEngine(memory_mb=1).search(game, max_depth=3)
+
+    # a win ends the deepening at once
+    assert result.get_score() == WIN_SCORE - 1
+    assert result.get_depth() == 1
+    assert game.make_move(*result.get_best_move())
+    assert game.get_game_state() == player + "_WON"
+
+
+def test_search_stops_at_the_time_limit():
+    game = GessGame()
+    result = GessEngine(memory_mb=1, time_limit=0.2).search(game)
+    assert result.get_best_move() in game.generate_legal_moves()
+    assert result.as_dict()["seconds"] < 1.0
+
+    # with no time at all, any legal move is still played
+    result = GessEngine(memory_mb=1).search(game, time_limit=0)
+    assert result.get_depth() == 0
+    assert result.get_best_move() in game.generate_legal_moves()
+
+
+def test_search_can_be_limited_to_some_root_moves():
+    game = GessGame()
+    moves = game.generate_legal_squares()[:5]
+    result = GessEngine(memory_mb=1).search(game, max_depth=2, moves=moves)
+    assert tuple(map(parse_square, result.get_best_move())) in moves
+
+
+def test_parallel_search_is_deterministic():
+    chooser = random.Random(7)
+    game = GessGame()
+    for x in range(6):
+        game.make_move(*chooser.choice(game.generate_legal_moves()))
+    weights = {"stones": 3, "rings": 200, "pieces": 4, "mobility": 2}
+
+    with ParallelEngine(1, max_depth=2, weights=weights) as single, \
+            ParallelEngine(3, max_depth=2, weights=weights) as parallel:
+        assert parallel.get_workers() == 3
+        results = [single.search(game), parallel.search(game), parallel.search(game)]
+    serial = GessEngine(2, weights=weights).search(game)
+    assert {(result.get_best_move(), result.get_score()) for result in results} \
+        == {(serial.get_best_move(), serial.get_score())}
+    # the workers evaluate with the engine's weights, not the defaults
+    assert serial.get_score() != GessEngine(2).search(game).get_score()
+
+
+def test_mate_scores_are_relative_to_the_position():
+    game = get_winning_position()
+    engine = GessEngine(memory_mb=1)
+    engine._killers = [[None, None] for x in range(8)]
+
+    score, line = engine.negamax(game, 1, -WIN_SCORE - 1, WIN_SCORE + 1, 3)
+    assert score == WIN_SCORE - 4
+
+    # the same position reached closer to the root comes out of the table as a closer win
+    nodes = engine._nodes
+    score, line = engine.negamax(game, 1, -WIN_SCORE - 1, WIN_SCORE + 1, 1)
+    assert score == WIN_SCORE - 2
+    assert engine._nodes == nodes + 1
+
+    result = engine.search(game, max_depth=3)
+    assert result.get_score() == WIN_SCORE - 1
+    assert result.get_depth() == 1
+
+
+def test_default_search_depth_is_bounded():
+    assert get_search_depth(None, None) == DEFAULT_DEPTH
+    assert get_search_depth(None, 1.0) > DEFAULT_DEPTH
+    assert get_search_depth(2, None) == 2
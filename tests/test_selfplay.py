@@ -0,0 +1,78 @@
+# Description: tests of the batch self-play runner (GessSelfPlay).
+
+
+import io
+import json
+
+from GessBook import build_book
+from GessGame import GessGame
+from GessRecord import GameWriter
+from GessSelfPlay import run_self_play
+
+
+def play(games, black, white, workers, seed, max_moves=8):
+    output = io.StringIO()
+    stats = run_self_play(games, output, black, white, workers=workers, seed=seed, max_moves=max_moves)
+    return output.getvalue(), stats
+
+
+def test_same_seed_writes_same_file():
+    first, stats = play(6, "random", "engine:depth=1", workers=1, seed=7)
+    assert play(6, "random", "engine:depth=1", workers=2, seed=7)[0] == first
+    assert play(6, "random", "engine:depth=1", workers=1, seed=8)[0] != first
+
+    assert stats["games"] == 6
+    assert sum(stats["results"].values()) == 6
+    assert sum(stats["length_histogram"].values()) == 6
+    assert stats["length_min"] <= stats["length_median"] <= stats["length_max"] <= 8
+
+
+def test_written_games_replay():
+    output, stats = play(10, "random", "random", workers=1, seed=2, max_moves=40)
+    records = [json.loads(line) for line in output.splitlines()]
+    assert [record["game"] for record in records] == list(range(10))
+    assert sum(len(record["moves"]) for record in records) == stats["moves"]
+
+    for record in records:
+        game = GessGame()
+        for current, new in record["moves"]:
+            assert game.make_move(current, new)
+        assert game.get_game_state() == record["result"]
+
+
+def test_scripted_player_plays_its_script_first(tmp_path):
+    black = tmp_path / "black.json"
+    black.write_text(json.dumps([["L3", "L6"], ["E3", "E4"]]))
+    white = tmp_path / "white.json"
+    # the second move isn't legal, so white plays randomly from there
+    white.write_text(json.dumps([["L18", "L15"], ["L18", "L15"]]))
+    output, stats = play(2, "scripted:" + str(black), "scripted:" + str(white), workers=1, seed=1)
+    for line in output.splitlines():
+        moves = json.loads(line)["moves"]
+        assert moves[:3] == [["L3", "L6"], ["L18", "L15"], ["E3", "E4"]]
+        assert moves[3][0] != "L18"
+
+
+def test_book_and_mcts_players_repeat_with_the_seed(tmp_path):
+    records = str(tmp_path / "games.gess")
+    with GameWriter(records) as writer:
+        run_self_play(20, writer, workers=1, seed=1, max_moves=6)
+    book = str(tmp_path / "book.bin")
+    assert build_book([records], book, max_ply=6, min_count=1) > 0
+
+    # the book and MCTS players take their choices and seeds from the game's chooser
+    black = "mcts:playouts=2:book=" + book
+    white = "random:book=" + book
+    first = play(3, black, white, workers=1, seed=7)[0]
+    assert play(3, black, white, workers=2, seed=7)[0] == first
+    assert play(3, black, white, workers=1, seed=7)[0] == first
+    assert play(3, black, white, workers=1, seed=8)[0] != first
+
+
+def test_same_seed_writes_same_record_file(tmp_path):
+    paths = []
+    for workers in (1, 2):
+        paths.append(tmp_path / ("games-%d.gess" % workers))
+        with GameWriter(str(paths[-1])) as writer:
+            run_self_play(2, writer, "mcts:playouts=2", "random", workers=workers, seed=3, max_moves=6)
+    assert paths[0].read_bytes() == paths[1].read_bytes()
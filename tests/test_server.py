@@ -0,0 +1,110 @@
+# Description: tests of the game server and its client (GessServer).
+
+
+import asyncio
+
+import pytest
+
+from GessGame import record_random_games
+from GessServer import GessClient, GessServer, load_test
+
+
+async def start_server():
+    server = GessServer()
+    port = await server.start(port=0)
+    client = await GessClient.connect("127.0.0.1", port)
+    return server, client
+
+
+def test_play_and_close_game():
+    async def play():
+        server, client = await start_server()
+        game_id = (await client.request("new"))["game"]
+        state = await client.request("state", game=game_id)
+        move = await client.request("move", game=game_id, current="L3", new="L6")
+        illegal = await client.request("move", game=game_id, current="L3", new="L6")
+        closed = await client.request("close", game=game_id)
+        await client.close()
+        await server.close()
+        return move, illegal, state, closed, server.get_game_count()
+
+    move, illegal, state, closed, games = asyncio.run(play())
+    assert move["ok"] and move["legal"] and move["turn"] == "WHITE"
+    assert illegal["ok"] and not illegal["legal"] and illegal["turn"] == "WHITE"
+    assert state["black_rings"] == ["L3"] and state["white_rings"] == ["L18"]
+    assert closed["ok"]
+    assert games == 0
+
+
+def test_load_test_plays_every_session():
+    scripts = record_random_games(3, seed=2)
+
+    async def play():
+        server = GessServer()
+        port = await server.start(port=0)
+        stats = await load_test(20, "127.0.0.1", port, connections=5, scripts=scripts)
+        await server.close()
+        return stats, server.get_game_count()
+
+    stats, games = asyncio.run(play())
+    assert stats["moves"] == sum(len(scripts[index % 3]) for index in range(20))
+    assert stats["p50_ms"] <= stats["p99_ms"]
+    assert games == 0
+
+
+def test_resign_as_each_color():
+    async def play():
+        server, client = await start_server()
+        black_game = (await client.request("new"))["game"]
+        black = await client.request("resign", game=black_game)
+        white_game = (await client.request("new"))["game"]
+        await client.request("move", game=white_game, current="L3", new="L6")
+        white = await client.request("resign", game=white_game)
+        # a finished game can't be resigned again
+        again = await client.request("resign", game=white_game)
+        await client.close()
+        await server.close()
+        return black, white, again
+
+    black, white, again = asyncio.run(play())
+    assert black["ok"] and black["state"] == "WHITE_WON"
+    assert white["ok"] and white["state"] == "BLACK_WON"
+    assert again["state"] == "BLACK_WON"
+
+
+def test_bad_game_ids_are_answered():
+    async def play():
+        server, client = await start_server()
+        await client.request("new")
+        responses = [await client.request("state", game=game_id) for game_id in ([1], {"a": 1}, "1", True, 99)]
+        # the connection still works afterwards
+        responses.append(await client.request("state", game=1))
+        await client.close()
+        await server.close()
+        return responses
+
+    responses = asyncio.run(play())
+    assert [response["ok"] for response in responses] == [False] * 5 + [True]
+    assert all(response["error"] == "no such game" for response in responses[:5])
+
+
+def test_client_fails_waiters_on_bad_response():
+    async def handle(reader, writer):
+        await reader.readline()
+        writer.write(b"not json\n")
+        await writer.drain()
+
+    async def play():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        client = await GessClient.connect("127.0.0.1", server.sockets[0].getsockname()[1])
+        try:
+            with pytest.raises(ConnectionError):
+                await asyncio.wait_for(client.request("new"), 5)
+            with pytest.raises(ConnectionError):
+                await client.request("new")
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(play())
@@ -0,0 +1,76 @@
+# Description: tests of the large-board game (GessSparse), against the
+# bitboard GessGame on the standard board.
+
+
+import random
+
+from GessGame import SQUARE_NAMES, GessGame
+from GessSparse import SparseGessGame, get_column_name, get_geometry
+
+
+def test_board_size_picks_the_game_class():
+    assert type(GessGame()) is GessGame
+    assert type(GessGame(board_size=30)) is SparseGessGame
+    assert GessGame(board_size=30).get_board_size() == 30
+
+
+def test_square_names():
+    assert [get_column_name(column) for column in (0, 25, 26, 51)] == ["A", "Z", "AA", "AZ"]
+    geometry = get_geometry(100)
+    assert geometry.parse_square("CV100") == 9999
+    assert geometry.get_square_name(geometry.parse_square("AB47")) == "AB47"
+    assert geometry.parse_square("CW1") is None
+    assert geometry.parse_square("A01") is None
+
+
+def test_matches_bitboard_game_on_standard_board():
+    chooser = random.Random(5)
+    for x in range(30):
+        bitboard = GessGame()
+        sparse = SparseGessGame(debug=True)
+        for y in range(100):
+            moves = bitboard.generate_legal_squares()
+            assert sorted(moves) == sorted(sparse.generate_legal_squares())
+            for z in range(20):
+                current, new = chooser.randrange(400), chooser.randrange(400)
+                assert bitboard.get_move_error(current, new) == sparse.get_move_error(current, new)
+            if not moves:
+                break
+
+            move = chooser.choice(moves)
+            if chooser.random() < 0.3:
+                sparse.push_move_squares(*move)
+                sparse.evaluate()
+                sparse.pop_move()
+            names = (SQUARE_NAMES[move[0]], SQUARE_NAMES[move[1]])
+            assert bitboard.make_move(*names) and sparse.make_move(*names)
+            assert bitboard.get_game_board() == sparse.get_game_board()
+            assert bitboard.get_hash() == sparse.get_hash()
+            assert bitboard.get_game_state() == sparse.get_game_state()
+            for color in ("BLACK", "WHITE"):
+                assert bitboard.get_rings(color) == sparse.get_rings(color)
+            assert bitboard.get_features() == sparse.get_features()
+            if bitboard.get_game_state() != "UNFINISHED":
+                break
+
+
+def test_large_board_push_pop_and_features():
+    chooser = random.Random(8)
+    game = GessGame(debug=True, board_size=50)
+    for x in range(60):
+        moves = game.generate_legal_squares()
+        if not moves:
+            break
+        before = (game.get_hash(), game.get_game_board(), game.get_rings("BLACK"), game.get_rings("WHITE"),
+                  game.get_features())
+        assert game.push_move_squares(*chooser.choice(moves))
+        game.evaluate()  # debug mode checks the features against a fresh count
+        fork = game.fork()
+        assert game.pop_move()
+        assert before == (game.get_hash(), game.get_game_board(), game.get_rings("BLACK"),
+                          game.get_rings("WHITE"), game.get_features())
+        fork.evaluate()
+
+        game.push_move_squares(*chooser.choice(moves))
+        if game.get_game_state() != "UNFINISHED":
+            break
@@ -0,0 +1,58 @@
+# Description: tests of the match statistics and of resuming an
+# interrupted match (GessTournament).
+
+
+import json
+
+import pytest
+
+from GessTournament import (get_elo, get_elo_estimate, get_expected_score, get_log_likelihood_ratio, load_match,
+                            run_tournament)
+
+
+MATCH = {"first": "random", "second": "random", "workers": 1, "seed": 5, "max_moves": 20}
+
+
+def test_elo_statistics():
+    for elo in (-200, 0, 35, 400):
+        assert get_elo(get_expected_score(elo)) == pytest.approx(elo)
+    elo, lower, upper = get_elo_estimate([1.0, 0.75, 0.5, 0.75] * 10)
+    assert lower < elo < upper and elo > 0
+    # more wins than expected favour H1, fewer favour H0
+    assert get_log_likelihood_ratio([0.75] * 20, 0, 10) > 0
+    assert get_log_likelihood_ratio([0.25] * 20, 0, 10) < 0
+    assert get_log_likelihood_ratio([], 0, 10) == 0
+
+
+def read_lines(path):
+    with open(path) as match_file:
+        return [json.loads(line) for line in match_file]
+
+
+def test_resume_cuts_partial_line(tmp_path):
+    path = str(tmp_path / "match.jsonl")
+    fresh = str(tmp_path / "fresh.jsonl")
+    run_tournament(fresh, pairs=4, **MATCH)
+    run_tournament(path, pairs=3, **MATCH)
+
+    # the match is interrupted in the middle of writing a pair
+    with open(path, "a") as match_file:
+        match_file.write('{"pair": 3, "sco')
+    settings = read_lines(fresh)[0]["settings"]
+    assert [record["pair"] for record in load_match(path, settings)] == [0, 1, 2]
+    assert (tmp_path / "match.jsonl").read_text().endswith("}\n")
+
+    summary = run_tournament(path, pairs=4, **MATCH)
+    assert summary["pairs"] == 4
+    # the resumed match is the one played in one go
+    assert read_lines(path) == read_lines(fresh)
+
+
+def test_resume_with_other_settings(tmp_path):
+    path = str(tmp_path / "match.jsonl")
+    run_tournament(path, pairs=1, **MATCH)
+    settings = read_lines(path)[0]["settings"]
+    settings["seed"] += 1
+    with pytest.raises(ValueError):
+        load_match(path, settings)
+    assert load_match(str(tmp_path / "missing.jsonl"), settings) == []
@@ -0,0 +1,58 @@
+# Description: tests of push_move / pop_move (the delta undo stack).
+
+
+import random
+
+from GessGame import GessGame
+
+
+def get_state(game):
+    # the legal moves depend on the rings (the last-ring rule) as well as the stones
+    return (game.get_game_board(), game.get_game_turn(), game.get_game_state(),
+            sorted(game.generate_legal_moves()))
+
+
+def test_pop_move_restores_every_position():
+    chooser = random.Random(9)
+    for x in range(20):
+        game = GessGame()
+        states = []
+        for y in range(40):
+            moves = game.generate_legal_moves()
+            if not moves:
+                break
+            states.append(get_state(game))
+            assert game.push_move(*chooser.choice(moves))
+            if game.get_game_state() != "UNFINISHED":
+                break
+
+        while states:
+            assert game.pop_move()
+            assert get_state(game) == states.pop()
+        assert not game.pop_move()
+
+
+def test_rejected_push_move_remembers_nothing():
+    game = GessGame()
+    before = get_state(game)
+    assert not game.push_move("L3", "L19")
+    assert not game.push_move("A1", "B2")
+    assert not game.pop_move()
+    assert get_state(game) == before
+
+
+def test_push_move_matches_make_move():
+    chooser = random.Random(10)
+    for x in range(10):
+        pushed = GessGame()
+        made = GessGame()
+        for y in range(60):
+            moves = made.generate_legal_moves()
+            if not moves:
+                break
+            move = chooser.choice(moves)
+            assert pushed.push_move(*move)
+            assert made.make_move(*move)
+            assert get_state(pushed) == get_state(made)
+            if made.get_game_state() != "UNFINISHED":
+                break
@@ -0,0 +1,41 @@
+# Description: tests of the NumPy ring and footprint scan (GessVector)
+# against the pure-Python path. They're skipped without NumPy.
+
+
+import random
+
+import pytest
+
+from GessGame import GessGame, get_center_names
+
+numpy = pytest.importorskip("numpy")
+
+import GessVector  # noqa: E402 (after the NumPy check)
+
+
+def replay_positions(games=5, max_moves=80, seed=6):
+    """
+    Plays random games and yields the game after every move.
+    """
+    chooser = random.Random(seed)
+    for x in range(games):
+        game = GessGame()
+        yield game
+        for y in range(max_moves):
+            moves = game.generate_legal_moves()
+            if not moves:
+                break
+            game.make_move(*chooser.choice(moves))
+            yield game
+            if game.get_game_state() != "UNFINISHED":
+                break
+
+
+def test_numpy_scan_matches_python_over_replayed_games():
+    for game in replay_positions():
+        assert GessVector.check_equivalence(game)
+        board_array = GessVector.get_board_array(game)
+        black_rings, white_rings = GessVector.find_rings_numpy(board_array)
+        assert get_center_names(black_rings) == game.get_rings("BLACK")
+        assert get_center_names(white_rings) == game.get_rings("WHITE")
+        assert GessVector.get_ownership_numpy(board_array) == GessVector.get_ownership_python(game)